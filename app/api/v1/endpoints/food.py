@@ -0,0 +1,97 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Response
+from typing import Optional, List
+
+from app.models.food import (
+    DetectedIngredient,
+    FoodCheckResponse,
+    FoodCondition,
+    FoodIdentification,
+    IngredientCheckRequest
+)
+from app.services.ai_service import ai_service
+from app.services.food import condition_matrix
+from app.api.v1.uploads import read_image_upload
+from app.core.metrics import stage
+
+router = APIRouter()
+
+
+def _split_conditions(conditions: Optional[List[str]]) -> List[str]:
+    """Accept repeated form fields as well as one comma-separated field."""
+    return [name.strip() for value in conditions or [] for name in value.split(",") if name.strip()]
+
+
+def _resolve_conditions(conditions: List[str]) -> List[str]:
+    condition_ids, unknown = condition_matrix.resolve(conditions)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown conditions: {', '.join(unknown)}. See /api/v1/food/conditions"
+        )
+    return condition_ids
+
+
+@router.post("/check", response_model=FoodCheckResponse)
+async def check_food(
+    response: Response,
+    conditions: Optional[List[str]] = Form(
+        default=None,
+        description="Conditions or allergies to check, repeated or comma-separated (default: all)"
+    ),
+    context: Optional[str] = Form(default=None, description="Optional hint such as the dish name on the menu"),
+    image: UploadFile = File(description="Photo of the food to check")
+):
+    """
+    Check whether the food in a photo is safe for health conditions and allergies.
+    
+    The dish and its ingredients are identified once per image; every
+    requested condition is then scored locally against the precomputed
+    ingredient-to-condition matrix, so checking more conditions costs no
+    extra model calls and a repeated photo costs none at all.
+    """
+    condition_ids = _resolve_conditions(_split_conditions(conditions))
+    prepared, content_hash = await read_image_upload(image)
+    response.headers["X-Image-Bytes-Saved"] = str(prepared.bytes_saved)
+    
+    try:
+        identification = await ai_service.identify_food(
+            image=prepared.data,
+            context=context,
+            mime_type=prepared.mime_type,
+            content_hash=content_hash
+        )
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Food check failed: {str(e)}"
+        )
+    
+    with stage("food_scoring"):
+        return condition_matrix.check(identification, condition_ids)
+
+
+@router.post("/check/ingredients", response_model=FoodCheckResponse)
+async def check_ingredients(request: IngredientCheckRequest):
+    """
+    Check a list of ingredients, e.g. copied from a product label.
+    
+    Runs entirely on the local food index without a model call. Ingredient
+    and condition names may be given in any language the index knows.
+    """
+    condition_ids = _resolve_conditions(request.conditions)
+    identification = FoodIdentification(
+        dish=request.dish or "Ingredient list",
+        ingredients=[DetectedIngredient(name=name) for name in request.ingredients]
+    )
+    
+    with stage("food_scoring"):
+        return condition_matrix.check(identification, condition_ids)
+
+
+@router.get("/conditions", response_model=List[FoodCondition])
+async def get_food_conditions():
+    """
+    List the conditions and allergies food can be checked against.
+    """
+    return condition_matrix.conditions
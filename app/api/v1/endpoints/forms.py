@@ -1,58 +1,156 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
 from typing import Optional
-import base64
+import hashlib
+import json
 
 from app.models.forms import (
     FormAnalysisRequest,
     FormAnalysisResponse,
     FormExplanationRequest,
+    FormJobResponse,
     FormTemplate
 )
 from app.services.ai_service import ai_service
+from app.services.form_fingerprint import form_fingerprints
+from app.services.form_templates import form_template_store
+from app.services.history import history_user, translation_history
+from app.services.jobs import CallbackURLError, IdempotencyConflictError, Job, JobError, form_jobs
+from app.services.image_processing import ImageProcessingError, prepare_image
+from app.services.pdf import PdfError, PdfRasterizer
+from app.services.uploads import UploadedFile, UploadTooLargeError, read_upload
 from app.core.config import settings
+from app.core.metrics import stage
 
 router = APIRouter()
 
+# Pages are fingerprinted at a small size; only coarse structure matters
+FINGERPRINT_MAX_EDGE = 512
 
-@router.post("/analyze", response_model=FormAnalysisResponse)
-async def analyze_form(
-    target_language: str = Form(description="Language for explanations"),
-    document_type: Optional[str] = Form(default=None, description="Known document type"),
-    country: Optional[str] = Form(default=None, description="Country context"),
-    document: UploadFile = File(description="Form document (PDF or image)")
-):
+
+async def _recognize_form(data: bytes, content_type: str) -> Optional[str]:
     """
-    Analyze a form document and provide field-by-field explanations.
+    Identify a known form from its first page.
     
-    This endpoint helps refugees understand government forms, applications,
-    and other official documents by breaking them down into clear, actionable steps.
+    Returns:
+        The template id, or None if the page matches no reference scan
     """
-    # Validate file type
+    if not len(form_fingerprints):
+        return None
+    if content_type != "application/pdf":
+        return await form_fingerprints.classify(data)
+    
+    rasterizer = PdfRasterizer(data, max_edge=FINGERPRINT_MAX_EDGE)
+    try:
+        await rasterizer.open()
+        page = await rasterizer.render(0)
+    except (PdfError, IndexError):
+        # Unreadable documents are reported by the analysis path
+        return None
+    finally:
+        await rasterizer.close()
+    return await form_fingerprints.classify(page.data)
+
+
+def _check_content_type(document: UploadFile) -> None:
     allowed_types = settings.ALLOWED_IMAGE_TYPES + ["application/pdf"]
     if document.content_type not in allowed_types:
         raise HTTPException(
             status_code=400,
             detail=f"Invalid file type. Allowed types: images and PDF"
         )
+
+
+async def _read_document(document: UploadFile) -> UploadedFile:
+    # Check file size while reading, before the upload is buffered
+    try:
+        with stage("upload_read"):
+            return await read_upload(document)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def _record_analysis(user_id: Optional[str], result: FormAnalysisResponse, target_language: str) -> None:
+    """Add a form analysis to the history of ``user_id``."""
+    await translation_history.record(
+        user_id,
+        "form",
+        original_text=result.title,
+        translated_text=result.description,
+        source_language="auto-detected",
+        target_language=target_language,
+        context_explanation=result.form_type
+    )
+
+
+async def _analyze_document(
+    upload: UploadedFile,
+    content_type: str,
+    target_language: str,
+    document_type: Optional[str],
+    country: Optional[str],
+    response: Response
+) -> FormAnalysisResponse:
+    """
+    Analyze an uploaded form, trying known forms before the vision model.
     
-    # Check file size
-    content = await document.read()
-    if len(content) > settings.MAX_FILE_SIZE:
+    Shared by ``/analyze`` and the job workers.
+    
+    Raises:
+        HTTPException: 400 for unreadable documents, 500 if the analysis fails
+    """
+    # Known forms are answered from the precomputed template store, identified
+    # by their document type or recognized from the page itself
+    template = form_template_store.match(document_type, country)
+    if template is None:
+        with stage("fingerprint"):
+            template_id = await _recognize_form(upload.data, content_type)
+        template = form_template_store.get(template_id) if template_id else None
+    if template is not None:
+        result = form_template_store.analysis(template, target_language)
+        if result is not None:
+            response.headers["X-Form-Template"] = template.id
+            return result
+    
+    if content_type == "application/pdf":
+        # Multi-page documents are rasterized and analyzed page by page
+        try:
+            return await ai_service.analyze_pdf_form(
+                content=upload.data,
+                target_language=target_language,
+                document_type=document_type,
+                country=country
+            )
+        except PdfError as e:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid PDF: {str(e)}"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Form analysis failed: {str(e)}"
+            )
+    
+    # Rotate, downscale and re-encode photographed pages
+    try:
+        with stage("preprocess"):
+            prepared = await prepare_image(upload.data, max_edge=settings.FORM_IMAGE_MAX_EDGE)
+    except ImageProcessingError as e:
         raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
+            status_code=400,
+            detail=f"Invalid image file: {str(e)}"
         )
+    response.headers["X-Image-Bytes-Saved"] = str(prepared.bytes_saved)
     
     try:
-        # Encode document to base64
-        document_base64 = base64.b64encode(content).decode('utf-8')
-        
         # Analyze form
         result = await ai_service.analyze_form(
-            document_base64=document_base64,
+            document=prepared.data,
             target_language=target_language,
             document_type=document_type,
-            country=country
+            country=country,
+            mime_type=prepared.mime_type,
+            content_hash=upload.sha256
         )
         
         return result
@@ -64,6 +162,142 @@ async def analyze_form(
         )
 
 
+async def _run_form_job(job: Job) -> FormAnalysisResponse:
+    """Job handler: analyze a queued upload the way ``/analyze`` does."""
+    upload = UploadedFile(data=job.payload, sha256=hashlib.sha256(job.payload).hexdigest())
+    try:
+        result = await _analyze_document(
+            upload,
+            content_type=job.params["content_type"],
+            target_language=job.params["target_language"],
+            document_type=job.params["document_type"],
+            country=job.params["country"],
+            response=Response()
+        )
+    except HTTPException as e:
+        if e.status_code < 500:
+            # Invalid documents fail the same way on every attempt
+            raise JobError(e.detail)
+        raise
+    await _record_analysis(job.params.get("history_user"), result, job.params["target_language"])
+    return result
+
+
+form_jobs.handler = _run_form_job
+
+
+@router.post("/analyze", response_model=FormAnalysisResponse)
+async def analyze_form(
+    request: Request,
+    response: Response,
+    target_language: str = Form(description="Language for explanations"),
+    document_type: Optional[str] = Form(default=None, description="Known document type"),
+    country: Optional[str] = Form(default=None, description="Country context"),
+    document: UploadFile = File(description="Form document (PDF or image)")
+):
+    """
+    Analyze a form document and provide field-by-field explanations.
+    
+    This endpoint helps refugees understand government forms, applications,
+    and other official documents by breaking them down into clear, actionable steps.
+    """
+    _check_content_type(document)
+    
+    # Forms known by their document type are answered without reading the upload
+    template = form_template_store.match(document_type, country)
+    result = form_template_store.analysis(template, target_language) if template is not None else None
+    if result is not None:
+        response.headers["X-Form-Template"] = template.id
+    else:
+        upload = await _read_document(document)
+        result = await _analyze_document(
+            upload, document.content_type, target_language, document_type, country, response
+        )
+    
+    await _record_analysis(history_user(request.scope), result, target_language)
+    return result
+
+
+@router.post("/analyze/jobs", response_model=FormJobResponse, status_code=202)
+async def submit_form_job(
+    request: Request,
+    response: Response,
+    target_language: str = Form(description="Language for explanations"),
+    document_type: Optional[str] = Form(default=None, description="Known document type"),
+    country: Optional[str] = Form(default=None, description="Country context"),
+    callback_url: Optional[str] = Form(default=None, description="URL that receives the finished job as a JSON POST"),
+    document: UploadFile = File(description="Form document (PDF or image)"),
+    idempotency_key: Optional[str] = Header(default=None, description="Key that makes retried submissions return the same job")
+):
+    """
+    Queue a form for analysis and return a job to poll.
+    
+    The request returns as soon as the upload is stored, so clients on
+    unreliable connections are not held open for the whole analysis. The
+    result is fetched from ``/jobs/{job_id}``, optionally long-polling with
+    ``wait``, or POSTed to ``callback_url``. Submissions repeating an
+    ``Idempotency-Key`` return the original job instead of queuing new work;
+    without the header the key is derived from the document and parameters.
+    """
+    _check_content_type(document)
+    if callback_url is not None:
+        try:
+            await form_jobs.check_callback_url(callback_url)
+        except CallbackURLError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    upload = await _read_document(document)
+    params = {
+        "content_type": document.content_type,
+        "target_language": target_language,
+        "document_type": document_type,
+        "country": country,
+    }
+    fingerprint = hashlib.sha256(
+        json.dumps([upload.sha256, params], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    # Recorded by the worker, which has no request; not part of the fingerprint
+    params["history_user"] = history_user(request.scope)
+    
+    try:
+        job, created = await form_jobs.submit(
+            idempotency_key or fingerprint, fingerprint, params, upload.data, callback_url
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    if not created:
+        response.status_code = 200
+    response.headers["Location"] = str(request.url_for("get_form_job", job_id=job.id))
+    return FormJobResponse(**job.view())
+
+
+@router.get("/jobs/{job_id}", response_model=FormJobResponse)
+async def get_form_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, description="Seconds to wait for the job to finish (long-poll)")
+):
+    """
+    Get the status of a form analysis job, with the result once it succeeded.
+    
+    With ``wait`` the request is held until the job finishes or the wait
+    (capped at ``JOB_MAX_WAIT``) runs out.
+    """
+    # Polling also resumes jobs left queued by a restart
+    form_jobs.start()
+    if wait > 0:
+        job = await form_jobs.wait(job_id, min(wait, settings.JOB_MAX_WAIT))
+    else:
+        job = await form_jobs.get(job_id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    return FormJobResponse(**job.view())
+
+
 @router.post("/explain")
 async def explain_form_field(request: FormExplanationRequest):
     """
@@ -78,8 +312,16 @@ async def explain_form_field(request: FormExplanationRequest):
             detail="Field name cannot be empty"
         )
     
+    template = form_template_store.match(request.form_type)
+    if template is not None:
+        explanation = form_template_store.explain_field(
+            template, request.field_name, request.target_language
+        )
+        if explanation is not None:
+            return explanation
+    
     try:
-        # This would use AI service to provide detailed field explanation
+        # Generic guidance for fields of forms not in the template store
         explanation = {
             "field_name": request.field_name,
             "explanation": f"Detailed explanation for {request.field_name} in {request.target_language}",
@@ -114,52 +356,11 @@ async def get_form_templates(
     Returns pre-analyzed forms and templates for common government
     and administrative documents by country and category.
     """
-    # In a real implementation, this would query a database
     templates = [
-        {
-            "id": "visa-application-us",
-            "name": "US Visa Application (I-94)",
-            "country": "US",
-            "category": "immigration",
-            "description": "Tourist and temporary visitor visa application",
-            "difficulty": "medium",
-            "estimated_time": "30-45 minutes"
-        },
-        {
-            "id": "employment-auth-us",
-            "name": "Employment Authorization (I-765)",
-            "country": "US",
-            "category": "employment", 
-            "description": "Work authorization application",
-            "difficulty": "high",
-            "estimated_time": "60-90 minutes"
-        },
-        {
-            "id": "residence-permit-de",
-            "name": "German Residence Permit",
-            "country": "DE",
-            "category": "immigration",
-            "description": "Application for German residence permit",
-            "difficulty": "high",
-            "estimated_time": "45-60 minutes"
-        },
-        {
-            "id": "housing-benefit-uk",
-            "name": "UK Housing Benefit Application",
-            "country": "UK",
-            "category": "benefits",
-            "description": "Application for housing assistance",
-            "difficulty": "medium",
-            "estimated_time": "30-45 minutes"
-        }
+        form_template_store.summary(template, language)
+        for template in form_template_store.find(country, category)
     ]
     
-    # Filter by country and category if provided
-    if country:
-        templates = [t for t in templates if t["country"].upper() == country.upper()]
-    if category:
-        templates = [t for t in templates if t["category"] == category]
-    
     return {
         "templates": templates,
         "categories": ["immigration", "employment", "benefits", "healthcare", "education"],
@@ -2,7 +2,15 @@ from fastapi import APIRouter, HTTPException
 from datetime import datetime
 import os
 
+from app.core.admission import admission_queue, rate_limiter
 from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.services.food import condition_matrix
+from app.services.form_fingerprint import form_fingerprints
+from app.services.form_templates import form_template_store
+from app.services.history import translation_history
+from app.services.jobs import form_jobs
+from app.services.phrase_pack import phrase_pack
 
 router = APIRouter()
 
@@ -36,6 +44,22 @@ async def health_status():
             "version": "1.0.0",
             "environment_checks": env_checks,
             "api_configuration": api_status,
+            "translation_cache": ai_service.translation_cache.stats(),
+            "image_cache": ai_service.image_cache.stats(),
+            "structured_output": ai_service.structured_stats.stats(),
+            "single_flight": ai_service.single_flight.stats(),
+            "model_router": {pool: router.stats() for pool, router in ai_service.routers.items()},
+            "hedging": ai_service.hedging.stats(),
+            "ocr": ai_service.ocr.stats(),
+            "local_backends": [backend.stats() for backend in ai_service.local_backends.values()],
+            "form_templates": form_template_store.stats(),
+            "form_fingerprints": form_fingerprints.stats(),
+            "phrase_pack": phrase_pack.stats(),
+            "food_conditions": condition_matrix.stats(),
+            "form_jobs": form_jobs.stats(),
+            "translation_history": translation_history.stats(),
+            "rate_limiter": rate_limiter.stats(),
+            "admission_queue": admission_queue.stats(),
             "uptime": "Available"
         }
         
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+
+from app.models.translation import TranslationHistoryPage
+from app.services.history import history_user, translation_history
+from app.core.config import settings
+
+router = APIRouter()
+
+
+@router.get("", response_model=TranslationHistoryPage)
+async def get_history(
+    request: Request,
+    kind: Optional[str] = Query(default=None, description="Only entries of this kind (text, image, form)"),
+    target_language: Optional[str] = Query(default=None, description="Only entries translated into this language"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor of the previous page"),
+    limit: int = Query(default=settings.HISTORY_PAGE_SIZE, ge=1, le=settings.HISTORY_MAX_PAGE_SIZE, description="Entries per page")
+):
+    """
+    Get the caller's translation and form analysis history, newest first.
+    
+    History belongs to the API key it was recorded with, so the request must
+    carry the same ``X-API-Key`` or bearer token. Pages are linked by
+    ``next_cursor``.
+    """
+    user_id = history_user(request.scope)
+    if user_id is None:
+        raise HTTPException(
+            status_code=401,
+            detail="History requires an API key"
+        )
+    
+    try:
+        items, next_cursor = await translation_history.query(
+            user_id,
+            kind=kind,
+            target_language=target_language,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"History lookup failed: {str(e)}"
+        )
+    
+    return TranslationHistoryPage(items=items, next_cursor=next_cursor)
@@ -1,20 +1,73 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
-from typing import Optional
-import base64
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional, Any, AsyncIterator, Tuple
+import json
+import time
 
 from app.models.translation import (
     TranslationRequest,
     TextTranslationRequest,
-    TranslationResponse
+    TranslationResponse,
+    BatchTranslationRequest,
+    BatchTranslationItem,
+    BatchTranslationResponse,
+    SUPPORTED_LANGUAGES
 )
 from app.services.ai_service import ai_service
+from app.services.history import history_user, translation_history
+from app.api.v1.uploads import read_image_upload
 from app.core.config import settings
 
 router = APIRouter()
 
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format a Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _sse_translation_stream(
+    events: AsyncIterator[Tuple[str, Any]],
+    started: float,
+    history: Tuple[Optional[str], str]
+) -> AsyncIterator[str]:
+    """
+    Relay service stream events as SSE.
+    
+    Emits ``token`` events while the model generates, one ``result`` event with
+    the structured TranslationResponse, and a closing ``timing`` event that
+    reports time to first byte separately from total latency. The result is
+    recorded in the history of ``history`` (user id, kind).
+    """
+    first_byte_ms = None
+    
+    def elapsed_ms() -> float:
+        return round((time.perf_counter() - started) * 1000, 1)
+    
+    try:
+        async for kind, payload in events:
+            if first_byte_ms is None:
+                first_byte_ms = elapsed_ms()
+            if kind == "token":
+                yield _sse_event("token", {"text": payload})
+            else:
+                yield _sse_event("result", payload.model_dump())
+                await translation_history.record_translation(*history, payload)
+    except Exception as e:
+        yield _sse_event("error", {"detail": f"Translation processing failed: {str(e)}"})
+    
+    yield _sse_event("timing", {
+        "time_to_first_byte_ms": first_byte_ms,
+        "total_ms": elapsed_ms()
+    })
+
 
 @router.post("/image", response_model=TranslationResponse)
 async def translate_image(
+    request: Request,
+    response: Response,
     target_language: str = Form(description="Target language code (e.g., 'English', 'Spanish')"),
     source_language: Optional[str] = Form(default=None, description="Source language hint"),
     context: Optional[str] = Form(default=None, description="Additional context"),
@@ -27,32 +80,20 @@ async def translate_image(
     and provides translations with cultural context to help refugees navigate
     their new environment.
     """
-    # Validate file type
-    if image.content_type not in settings.ALLOWED_IMAGE_TYPES:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
-        )
-    
-    # Check file size
-    content = await image.read()
-    if len(content) > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024*1024)}MB"
-        )
+    prepared, content_hash = await read_image_upload(image)
+    response.headers["X-Image-Bytes-Saved"] = str(prepared.bytes_saved)
     
     try:
-        # Encode image to base64
-        image_base64 = base64.b64encode(content).decode('utf-8')
-        
         # Process translation
         result = await ai_service.translate_image(
-            image_base64=image_base64,
+            image=prepared.data,
             target_language=target_language,
             source_language=source_language,
-            context=context
+            context=context,
+            mime_type=prepared.mime_type,
+            content_hash=content_hash
         )
+        await translation_history.record_translation(history_user(request.scope), "image", result)
         
         return result
         
@@ -64,7 +105,7 @@ async def translate_image(
 
 
 @router.post("/text", response_model=TranslationResponse)
-async def translate_text(request: TextTranslationRequest):
+async def translate_text(request: TextTranslationRequest, http_request: Request):
     """
     Translate text with cultural context.
     
@@ -84,6 +125,7 @@ async def translate_text(request: TextTranslationRequest):
             source_language=request.source_language,
             context=request.context
         )
+        await translation_history.record_translation(history_user(http_request.scope), "text", result)
         
         return result
         
@@ -94,6 +136,115 @@ async def translate_text(request: TextTranslationRequest):
         )
 
 
+@router.post("/text/batch", response_model=BatchTranslationResponse)
+async def translate_text_batch(request: BatchTranslationRequest, http_request: Request):
+    """
+    Translate many texts in one request.
+    
+    Useful for translating a whole screen of UI strings or a list of form
+    labels at once. Items may target different languages. Identical items are
+    translated once, and results are returned in input order with per-item
+    errors instead of failing the whole batch.
+    """
+    if not request.items:
+        raise HTTPException(
+            status_code=400,
+            detail="Batch cannot be empty"
+        )
+    
+    if len(request.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items. Maximum: {settings.BATCH_MAX_ITEMS}"
+        )
+    
+    results = [BatchTranslationItem(index=i) for i in range(len(request.items))]
+    valid = [i for i, item in enumerate(request.items) if item.text.strip()]
+    for i in set(range(len(request.items))) - set(valid):
+        results[i].error = "Text cannot be empty"
+    
+    try:
+        outcomes = await ai_service.translate_text_batch([request.items[i] for i in valid])
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch translation failed: {str(e)}"
+        )
+    
+    user_id = history_user(http_request.scope)
+    for i, outcome in zip(valid, outcomes):
+        if isinstance(outcome, Exception):
+            results[i].error = str(outcome)
+        else:
+            results[i].result = outcome
+            await translation_history.record_translation(user_id, "text", outcome)
+    
+    return BatchTranslationResponse(results=results)
+
+
+@router.post("/image/stream")
+async def translate_image_stream(
+    request: Request,
+    target_language: str = Form(description="Target language code (e.g., 'English', 'Spanish')"),
+    source_language: Optional[str] = Form(default=None, description="Source language hint"),
+    context: Optional[str] = Form(default=None, description="Additional context"),
+    image: UploadFile = File(description="Image file containing text to translate")
+):
+    """
+    Translate text found in an uploaded image, streaming the result.
+    
+    Same as ``/image`` but responds with Server-Sent Events: ``token`` events
+    carry model output as it is generated, followed by a ``result`` event with
+    the full TranslationResponse and a ``timing`` event.
+    """
+    started = time.perf_counter()
+    prepared, content_hash = await read_image_upload(image)
+    events = ai_service.stream_translate_image(
+        image=prepared.data,
+        target_language=target_language,
+        source_language=source_language,
+        context=context,
+        mime_type=prepared.mime_type
+    )
+    
+    headers = {**SSE_HEADERS, "X-Image-Bytes-Saved": str(prepared.bytes_saved)}
+    return StreamingResponse(
+        _sse_translation_stream(events, started, (history_user(request.scope), "image")),
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+
+@router.post("/text/stream")
+async def translate_text_stream(request: TextTranslationRequest, http_request: Request):
+    """
+    Translate text with cultural context, streaming the result.
+    
+    Same as ``/text`` but responds with Server-Sent Events: ``token`` events
+    carry model output as it is generated, followed by a ``result`` event with
+    the full TranslationResponse and a ``timing`` event.
+    """
+    started = time.perf_counter()
+    if not request.text.strip():
+        raise HTTPException(
+            status_code=400,
+            detail="Text cannot be empty"
+        )
+    
+    events = ai_service.stream_translate_text(
+        text=request.text,
+        target_language=request.target_language,
+        source_language=request.source_language,
+        context=request.context
+    )
+    
+    return StreamingResponse(
+        _sse_translation_stream(events, started, (history_user(http_request.scope), "text")),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+
 @router.get("/languages")
 async def get_supported_languages():
     """
@@ -102,27 +253,4 @@ async def get_supported_languages():
     Returns commonly used languages with their codes and native names
     to help users select their preferred languages.
     """
-    # In a real implementation, this would come from your translation service
-    languages = [
-        {"code": "English", "name": "English", "native_name": "English"},
-        {"code": "Spanish", "name": "Spanish", "native_name": "Español"},
-        {"code": "French", "name": "French", "native_name": "Français"},
-        {"code": "German", "name": "German", "native_name": "Deutsch"},
-        {"code": "Arabic", "name": "Arabic", "native_name": "العربية"},
-        {"code": "Ukrainian", "name": "Ukrainian", "native_name": "Українська"},
-        {"code": "Russian", "name": "Russian", "native_name": "Русский"},
-        {"code": "Polish", "name": "Polish", "native_name": "Polski"},
-        {"code": "Turkish", "name": "Turkish", "native_name": "Türkçe"},
-        {"code": "Persian", "name": "Persian", "native_name": "فارسی"},
-        {"code": "Pashto", "name": "Pashto", "native_name": "پښتو"},
-        {"code": "Dari", "name": "Dari", "native_name": "دری"},
-        {"code": "Portuguese", "name": "Portuguese", "native_name": "Português"},
-        {"code": "Italian", "name": "Italian", "native_name": "Italiano"},
-        {"code": "Dutch", "name": "Dutch", "native_name": "Nederlands"},
-        {"code": "Swedish", "name": "Swedish", "native_name": "Svenska"},
-        {"code": "Norwegian", "name": "Norwegian", "native_name": "Norsk"},
-        {"code": "Danish", "name": "Danish", "native_name": "Dansk"},
-        {"code": "Finnish", "name": "Finnish", "native_name": "Suomi"}
-    ]
-    
-    return {"languages": languages} 
\ No newline at end of file
+    return {"languages": SUPPORTED_LANGUAGES} 
\ No newline at end of file
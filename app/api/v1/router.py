@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import translation, forms, health
+from app.api.v1.endpoints import translation, forms, food, history, health
 
 api_router = APIRouter()
 
@@ -17,6 +17,18 @@ api_router.include_router(
     tags=["forms"]
 )
 
+api_router.include_router(
+    food.router,
+    prefix="/food",
+    tags=["food"]
+)
+
+api_router.include_router(
+    history.router,
+    prefix="/history",
+    tags=["history"]
+)
+
 api_router.include_router(
     health.router,
     prefix="/health",
@@ -0,0 +1,39 @@
+from fastapi import HTTPException, UploadFile
+from typing import Tuple
+
+from app.services.image_processing import ImageProcessingError, ProcessedImage, prepare_image
+from app.services.uploads import UploadTooLargeError, read_upload
+from app.core.config import settings
+from app.core.metrics import stage
+
+
+async def read_image_upload(image: UploadFile) -> Tuple[ProcessedImage, str]:
+    """
+    Validate an uploaded image and preprocess it for the vision model.
+    
+    Returns:
+        Tuple of (preprocessed image, SHA-256 of the original upload)
+    """
+    # Validate file type
+    if image.content_type not in settings.ALLOWED_IMAGE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(settings.ALLOWED_IMAGE_TYPES)}"
+        )
+    
+    # Check file size while reading, before the upload is buffered
+    try:
+        with stage("upload_read"):
+            upload = await read_upload(image)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    
+    # Rotate, downscale and re-encode before sending to the vision model
+    try:
+        with stage("preprocess"):
+            return await prepare_image(upload.data), upload.sha256
+    except ImageProcessingError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid image file: {str(e)}"
+        )
@@ -0,0 +1,305 @@
+import asyncio
+import hashlib
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, Callable, Deque, Iterable, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed instead of admitted."""
+
+    def __init__(self, reason: str, retry_after: float, detail: str):
+        super().__init__(detail)
+        self.reason = reason
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting per client.
+
+    Each client gets a bucket of ``burst`` tokens refilled at ``rate`` tokens
+    per second; a request takes one token. Buckets of the least recently
+    seen clients are dropped beyond ``max_clients``, which only ever gives
+    a returning client a full bucket.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_clients: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+
+    @classmethod
+    def from_settings(cls) -> "RateLimiter":
+        return cls(
+            rate=settings.RATE_LIMIT_PER_MINUTE / 60,
+            burst=settings.RATE_LIMIT_BURST,
+            max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+        )
+
+    def check(self, client: str) -> float:
+        """
+        Take a token from the client's bucket.
+
+        Returns:
+            0.0 if the request is allowed, otherwise the seconds until the
+            client has a token again
+        """
+        now = self.clock()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+            self.allowed += 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.limited += 1
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def reset(self) -> None:
+        self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Limiter counters for monitoring."""
+        return {
+            "enabled": settings.RATE_LIMIT_ENABLED,
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "clients": len(self._buckets),
+            "allowed": self.allowed,
+            "limited": self.limited,
+        }
+
+
+class FairQueue:
+    """
+    Concurrency cap with a bounded, per-client round-robin wait queue.
+
+    Up to ``max_concurrency`` requests run at once. Further requests wait in
+    a queue per client, and freed slots go to the waiting clients in turn,
+    so a client with many queued requests cannot starve one with a single
+    request. Requests are shed with ``AdmissionRejected`` when ``max_queue``
+    requests are already waiting or after waiting ``max_wait`` seconds.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait: float, alpha: float = 0.2):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.in_flight = 0
+        self.waiting = 0
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.service_time: Optional[float] = None
+        self.admitted = 0
+        self.shed = 0
+
+    @classmethod
+    def from_settings(cls) -> "FairQueue":
+        return cls(
+            max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            max_wait=settings.ADMISSION_MAX_WAIT,
+        )
+
+    def retry_after(self) -> float:
+        """Estimated seconds until the current queue has drained."""
+        if self.service_time is None:
+            return self.max_wait
+        return self.service_time * (self.waiting + 1) / self.max_concurrency
+
+    def _reject(self, reason: str, detail: str) -> AdmissionRejected:
+        self.shed += 1
+        return AdmissionRejected(reason, self.retry_after(), detail)
+
+    def _remove(self, client: str, future: asyncio.Future) -> None:
+        queue = self._waiters.get(client)
+        if queue is not None and future in queue:
+            queue.remove(future)
+            self.waiting -= 1
+            if not queue:
+                del self._waiters[client]
+
+    async def acquire(self, client: str) -> None:
+        """
+        Wait for a slot.
+
+        Raises:
+            AdmissionRejected: If the queue is full or the wait times out
+        """
+        if self.in_flight < self.max_concurrency and not self.waiting:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.waiting >= self.max_queue:
+            raise self._reject("queue_full", "Server is busy, please retry later")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(client, deque()).append(future)
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(future, self.max_wait)
+        except asyncio.TimeoutError:
+            if not (future.done() and not future.cancelled()):
+                self._remove(client, future)
+                raise self._reject("queue_timeout", "Server is busy, please retry later")
+            # The slot was handed over as the wait ran out; keep it rather than leak it
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the client went away
+                self.release()
+            else:
+                self._remove(client, future)
+            raise
+        finally:
+            metrics.ADMISSION_QUEUE_WAIT.observe(time.perf_counter() - started)
+        self.admitted += 1
+
+    def release(self, elapsed: Optional[float] = None) -> None:
+        """Free a slot, handing it to the next client in turn if any are waiting."""
+        if elapsed is not None:
+            if self.service_time is None:
+                self.service_time = elapsed
+            else:
+                self.service_time = (1 - self.alpha) * self.service_time + self.alpha * elapsed
+
+        while self._waiters:
+            client, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            self.waiting -= 1
+            if queue:
+                self._waiters.move_to_end(client)
+            else:
+                del self._waiters[client]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue state and counters for monitoring."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "waiting_clients": len(self._waiters),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "service_time_ms": round(self.service_time * 1000, 1) if self.service_time is not None else None,
+        }
+
+
+def client_key(scope, trust_forwarded: bool = False) -> str:
+    """
+    Identify the client of a request.
+
+    API keys (``X-API-Key`` or a bearer token) identify a client across
+    addresses and are hashed so they never sit in memory in the clear;
+    otherwise the client IP is used, taken from ``X-Forwarded-For`` only
+    behind a trusted proxy.
+    """
+    headers = dict(scope.get("headers") or [])
+    api_key = headers.get(b"x-api-key")
+    authorization = headers.get(b"authorization", b"")
+    if not api_key and authorization[:7].lower() == b"bearer ":
+        api_key = authorization[7:].strip()
+    if api_key:
+        return "key:" + hashlib.sha256(api_key).hexdigest()[:16]
+
+    forwarded = headers.get(b"x-forwarded-for")
+    if trust_forwarded and forwarded:
+        return "ip:" + forwarded.split(b",")[0].strip().decode("latin-1")
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware shedding load before it reaches the model.
+
+    Every request outside ``exempt`` prefixes takes a token from its
+    client's bucket. Requests to ``model_paths`` additionally need a slot in
+    the fair queue, which they hold until the response, including a
+    streamed one, is finished. Shed requests get a 429 with ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        app,
+        limiter: Optional[RateLimiter] = None,
+        queue: Optional[FairQueue] = None,
+        model_paths: Iterable[str] = (),
+        exempt: Iterable[str] = (),
+        trust_forwarded: bool = False
+    ):
+        self.app = app
+        self.limiter = limiter
+        self.queue = queue
+        self.model_paths = frozenset(model_paths)
+        self.exempt = tuple(exempt)
+        self.trust_forwarded = trust_forwarded
+
+    async def _reject(self, scope, receive, send, rejected: AdmissionRejected) -> None:
+        metrics.ADMISSION_REJECTIONS.inc(reason=rejected.reason)
+        response = JSONResponse(
+            status_code=429,
+            content={"detail": rejected.detail},
+            headers={"Retry-After": str(max(1, math.ceil(rejected.retry_after)))}
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or path.startswith(self.exempt):
+            await self.app(scope, receive, send)
+            return
+
+        client = client_key(scope, self.trust_forwarded)
+        if self.limiter is not None:
+            wait = self.limiter.check(client)
+            if wait:
+                rejected = AdmissionRejected("rate_limited", wait, "Rate limit exceeded, please slow down")
+                await self._reject(scope, receive, send, rejected)
+                return
+
+        if self.queue is None or path.rstrip("/") not in self.model_paths:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.queue.acquire(client)
+        except AdmissionRejected as rejected:
+            await self._reject(scope, receive, send, rejected)
+            return
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.queue.release(time.perf_counter() - started)
+
+
+# Create admission control instances
+rate_limiter = RateLimiter.from_settings()
+admission_queue = FairQueue.from_settings()
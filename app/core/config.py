@@ -1,5 +1,6 @@
 from pydantic import Field
 from pydantic_settings import BaseSettings
+from pathlib import Path
 from typing import List
 
 
@@ -27,14 +28,181 @@ class Settings(BaseSettings):
     VISION_MODEL: str = Field(default="google/gemma-3n-e4b-it", description="Vision AI model identifier")
     TEXT_MODEL: str = Field(default="google/gemma-3n-e4b-it", description="Text AI model identifier")
     MAX_TOKENS: int = Field(default=1000, description="Maximum tokens for AI responses")
+    MODEL_TIMEOUT: float = Field(default=60.0, description="Timeout in seconds for a single model call")
+    MODEL_MAX_CONCURRENCY: int = Field(default=16, description="Maximum concurrent model calls per worker")
+    MODEL_MAX_CONNECTIONS: int = Field(default=32, description="Maximum open connections to the model provider")
+    MODEL_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=16, description="Maximum idle keep-alive connections to the model provider")
+    
+    MODEL_MAX_RETRIES: int = Field(default=2, description="Client-level retries per model target before falling back")
+    
+    SINGLE_FLIGHT_ENABLED: bool = Field(default=True, description="Share one model call among identical in-flight requests")
+    
+    # Prompt Budgets
+    PROMPT_CONTEXT_MAX_TOKENS: int = Field(default=128, description="Estimated token budget for user-supplied context in prompts")
+    PROMPT_TEXT_MAX_TOKENS: int = Field(default=2000, description="Estimated token budget for the text to translate")
+    PROMPT_FIELD_MAX_TOKENS: int = Field(default=16, description="Estimated token budget for short fields such as languages and country")
+    
+    # Model Routing
+    VISION_FALLBACK_MODELS: List[str] = Field(
+        default=[],
+        description="Fallback vision targets after VISION_MODEL, as model or model@base_url"
+    )
+    TEXT_FALLBACK_MODELS: List[str] = Field(
+        default=[],
+        description="Fallback text targets after TEXT_MODEL, as model or model@base_url (model@local runs on CPU)"
+    )
+    ROUTER_EWMA_ALPHA: float = Field(default=0.3, description="Weight of the newest sample in latency and error rate averages")
+    ROUTER_FAILURE_THRESHOLD: int = Field(default=3, description="Consecutive failures that open a target's circuit breaker")
+    ROUTER_COOLDOWN: float = Field(default=30.0, description="Seconds an open circuit rejects traffic before a probe call")
+    ROUTER_MAX_ATTEMPTS: int = Field(default=2, description="Maximum targets tried for one model call")
+    
+    # Local Inference
+    LOCAL_MAX_BATCH_SIZE: int = Field(default=8, description="Maximum concurrent requests decoded in one local forward pass")
+    LOCAL_BATCH_WINDOW: float = Field(default=0.01, description="Seconds a local request waits for others to batch with")
+    LOCAL_QUANTIZE: bool = Field(default=True, description="Quantize local model linear layers to int8")
+    LOCAL_THREADS: int = Field(default=0, description="CPU threads for local inference (0 = library default)")
+    
+    # Admission Control
+    RATE_LIMIT_ENABLED: bool = Field(default=True, description="Limit request rates per API key or client IP")
+    RATE_LIMIT_PER_MINUTE: float = Field(default=120.0, description="Sustained requests per minute allowed per client")
+    RATE_LIMIT_BURST: int = Field(default=40, description="Requests a client may make in a burst above the sustained rate")
+    RATE_LIMIT_MAX_CLIENTS: int = Field(default=10000, description="Clients whose rate limit state is kept in memory")
+    RATE_LIMIT_TRUST_FORWARDED: bool = Field(default=False, description="Identify clients by X-Forwarded-For (only behind a trusted proxy)")
+    ADMISSION_MAX_CONCURRENCY: int = Field(default=32, description="Maximum model-backed requests served at once per worker")
+    ADMISSION_MAX_QUEUE: int = Field(default=128, description="Maximum model-backed requests waiting for a slot before new ones are shed")
+    ADMISSION_MAX_WAIT: float = Field(default=10.0, description="Seconds a request may wait for a slot before it is shed")
+    ADMISSION_MODEL_PATHS: List[str] = Field(
+        default=[
+            "/api/v1/translate/image",
+            "/api/v1/translate/image/stream",
+            "/api/v1/translate/text",
+            "/api/v1/translate/text/stream",
+            "/api/v1/translate/text/batch",
+            "/api/v1/forms/analyze",
+            "/api/v1/food/check",
+        ],
+        description="Paths of model-backed endpoints subject to the concurrency cap"
+    )
+    
+    # Hedged Vision Requests
+    HEDGE_ENABLED: bool = Field(default=False, description="Duplicate slow vision calls and keep the first reply")
+    HEDGE_QUANTILE: float = Field(default=0.95, description="Latency quantile after which a vision call is hedged")
+    HEDGE_BUDGET: float = Field(default=0.05, description="Maximum fraction of vision calls that may be hedged")
+    HEDGE_MIN_DELAY: float = Field(default=2.0, description="Hedge delay in seconds until enough latencies are observed")
+    HEDGE_MIN_SAMPLES: int = Field(default=20, description="Observed calls needed before the quantile delay is used")
+    
+    # Batch Translation
+    BATCH_MAX_ITEMS: int = Field(default=100, description="Maximum items in a batch translation request")
+    BATCH_CONCURRENCY: int = Field(default=8, description="Maximum concurrent model calls per batch request")
+    BATCH_PACK_MAX_CHARS: int = Field(default=200, description="Texts up to this length may be packed into a shared prompt")
+    BATCH_PACK_MAX_ITEMS: int = Field(default=20, description="Maximum texts packed into a single prompt")
+    
+    # Translation Cache
+    TRANSLATION_CACHE_ENABLED: bool = Field(default=True, description="Cache text translations in front of the model")
+    TRANSLATION_CACHE_MAX_ENTRIES: int = Field(default=10000, description="Maximum entries in the in-process translation cache")
+    TRANSLATION_CACHE_TTL: int = Field(default=24 * 60 * 60, description="Translation cache entry lifetime in seconds")
+    TRANSLATION_CACHE_PERSISTENT: bool = Field(default=False, description="Share cached translations across workers via SQLite")
+    
+    # Phrase Pack
+    PHRASE_PACK_ENABLED: bool = Field(default=True, description="Serve common phrases from the precomputed phrase pack")
+    PHRASE_PACK_PATH: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "data" / "phrase_pack.bin"),
+        description="Phrase pack written by precompute_phrases.py"
+    )
+    PHRASE_CORPUS_PATH: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "data" / "phrases.txt"),
+        description="Phrases to precompute, one per line"
+    )
+    
+    # Image Result Cache
+    IMAGE_CACHE_ENABLED: bool = Field(default=True, description="Reuse vision results for near-identical images")
+    IMAGE_CACHE_MAX_ENTRIES: int = Field(default=100000, description="Maximum entries in the perceptual image cache")
+    IMAGE_CACHE_TTL: int = Field(default=7 * 24 * 60 * 60, description="Image cache entry lifetime in seconds")
+    IMAGE_CACHE_MAX_DISTANCE: int = Field(default=4, description="Maximum Hamming distance between perceptual hashes to count as a hit")
+    IMAGE_CACHE_HASH_METHOD: str = Field(default="dhash", description="Perceptual hash algorithm (dhash or phash)")
     
     # File Upload
     MAX_FILE_SIZE: int = Field(default=10 * 1024 * 1024, description="Maximum file upload size in bytes")
+    UPLOAD_CHUNK_SIZE: int = Field(default=256 * 1024, description="Chunk size in bytes for reading uploads")
     ALLOWED_IMAGE_TYPES: List[str] = Field(
         default=["image/jpeg", "image/png", "image/webp"], 
         description="Allowed image MIME types"
     )
     
+    # Image Preprocessing
+    IMAGE_MAX_EDGE: int = Field(default=1600, description="Longest edge in pixels for images sent to the vision model")
+    FORM_IMAGE_MAX_EDGE: int = Field(default=2200, description="Longest edge in pixels for form pages sent to the vision model")
+    IMAGE_OUTPUT_FORMAT: str = Field(default="JPEG", description="Re-encoding format for vision input (JPEG or WEBP)")
+    IMAGE_OUTPUT_QUALITY: int = Field(default=85, description="Encoder quality for re-encoded images")
+    FORM_MAX_PAGES: int = Field(default=20, description="Maximum pages analyzed in a PDF form")
+    FORM_PAGE_CONCURRENCY: int = Field(default=4, description="Maximum PDF pages analyzed concurrently per request")
+    IMAGE_PROCESSING_WORKERS: int = Field(default=4, description="Thread pool size for image preprocessing")
+    
+    # Local OCR
+    OCR_ENABLED: bool = Field(default=False, description="Read image text with Tesseract and skip the vision model when confident")
+    OCR_MIN_CONFIDENCE: float = Field(default=80.0, description="Minimum mean OCR word confidence (0-100) to use the text path")
+    OCR_MIN_CHARS: int = Field(default=2, description="Minimum characters of OCR text to use the text path")
+    OCR_LANGUAGES: str = Field(default="eng", description="Tesseract language codes, e.g. eng+deu+ukr")
+    
+    # Form Templates
+    FORM_TEMPLATES_PATH: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "data" / "form_templates.json"),
+        description="JSON file with precomputed form templates"
+    )
+    FORM_FINGERPRINTS_PATH: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "data" / "form_fingerprints.json"),
+        description="JSON file with fingerprints of reference scans of known forms"
+    )
+    FORM_FINGERPRINT_MAX_DISTANCE: int = Field(
+        default=6,
+        description="Maximum visual hash distance in bits for a page to match a known form"
+    )
+    FORM_LAYOUT_MAX_DISTANCE: int = Field(
+        default=12,
+        description="Maximum layout hash distance in bits to confirm a known form match"
+    )
+    
+    # Food Safety
+    FOOD_CONDITIONS_PATH: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "data" / "food_conditions.json"),
+        description="JSON file with conditions, ingredient risks, synonyms and translated names"
+    )
+    FOOD_INDEX_PATH: str = Field(
+        default=str(Path(__file__).resolve().parent.parent / "data" / "food_index.bin"),
+        description="Memory-mapped food index compiled from FOOD_CONDITIONS_PATH (rebuilt when stale)"
+    )
+    FOOD_AVOID_THRESHOLD: float = Field(default=0.7, description="Weighted ingredient risk (0-1) from which a dish should be avoided")
+    FOOD_CAUTION_THRESHOLD: float = Field(default=0.3, description="Weighted ingredient risk (0-1) from which a dish needs caution")
+    FOOD_MIN_INGREDIENT_CONFIDENCE: float = Field(default=0.3, description="Identified ingredients below this confidence are ignored")
+    
+    # Form Jobs
+    JOB_WORKERS: int = Field(default=2, description="In-process form analysis workers (0 = run form_worker.py separately)")
+    JOB_MAX_ATTEMPTS: int = Field(default=3, description="Attempts per form analysis job before it is marked failed")
+    JOB_LEASE: float = Field(default=300.0, description="Seconds a claimed job may run before another worker takes it over")
+    JOB_POLL_INTERVAL: float = Field(default=0.5, description="Seconds between queue checks of idle workers and long-polls")
+    JOB_MAX_WAIT: float = Field(default=30.0, description="Longest long-poll wait in seconds")
+    JOB_TTL: int = Field(default=24 * 60 * 60, description="Seconds finished jobs and their idempotency keys are kept")
+    JOB_WEBHOOK_TIMEOUT: float = Field(default=10.0, description="Timeout in seconds for job completion webhooks")
+    JOB_WEBHOOK_ALLOWED_HOSTS: List[str] = Field(
+        default=[],
+        description="Webhook hosts allowed even though they resolve to private or loopback addresses"
+    )
+    JOB_DATABASE_PATH: str = Field(default="", description="SQLite file for form jobs (default: the DATABASE_URL file)")
+    
+    # Translation History
+    HISTORY_ENABLED: bool = Field(default=True, description="Record translations and form analyses for the history endpoint")
+    HISTORY_DATABASE_URL: str = Field(default="", description="Database for history (default: DATABASE_URL)")
+    HISTORY_RECORD_ANONYMOUS: bool = Field(default=False, description="Also record requests without an API key, which no one can query")
+    HISTORY_BUFFER_SIZE: int = Field(default=10000, description="Entries buffered in memory while waiting to be written")
+    HISTORY_BATCH_SIZE: int = Field(default=500, description="Most entries written per bulk insert")
+    HISTORY_FLUSH_INTERVAL: float = Field(default=1.0, description="Seconds between writes of a partially filled batch")
+    HISTORY_OVERFLOW: str = Field(default="drop_oldest", description="What gives when the buffer is full (drop_oldest, drop_newest, block)")
+    HISTORY_BLOCK_TIMEOUT: float = Field(default=0.05, description="Longest wait in seconds for buffer space with the block policy")
+    HISTORY_POOL_SIZE: int = Field(default=5, description="Database connections kept open for history writes and queries")
+    HISTORY_MAX_OVERFLOW: int = Field(default=5, description="Extra history connections opened under load")
+    HISTORY_PAGE_SIZE: int = Field(default=50, description="History entries per page by default")
+    HISTORY_MAX_PAGE_SIZE: int = Field(default=200, description="Most history entries per page")
+    
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,37 @@
+from typing import Optional
+
+
+def sqlite_path(database_url: str) -> Optional[str]:
+    """
+    Extract the file path from a SQLite database URL.
+    
+    Args:
+        database_url: SQLAlchemy-style URL such as ``sqlite:///./app.db``
+        
+    Returns:
+        Filesystem path of the database, or None for non-SQLite URLs
+    """
+    for prefix in ("sqlite+aiosqlite:///", "sqlite:///"):
+        if database_url.startswith(prefix):
+            return database_url[len(prefix):] or None
+    return None
+
+
+def async_database_url(database_url: str) -> str:
+    """
+    Select the async driver for a database URL.
+    
+    Args:
+        database_url: SQLAlchemy-style URL, with or without a driver
+        
+    Returns:
+        URL using aiosqlite for SQLite and asyncpg for PostgreSQL
+    """
+    for prefix, driver in (
+        ("sqlite://", "sqlite+aiosqlite://"),
+        ("postgresql://", "postgresql+asyncpg://"),
+        ("postgres://", "postgresql+asyncpg://"),
+    ):
+        if database_url.startswith(prefix):
+            return driver + database_url[len(prefix):]
+    return database_url
@@ -0,0 +1,341 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Callable, Iterator, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage timings recorded during the current request, labelled with the
+# matched route by the middleware once routing has happened
+_request_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_stages", default=None)
+# Estimated prompt tokens sent to the model for the current request, as a
+# one-element list so tasks spawned by the request add to the same total
+_request_prompt_tokens: ContextVar[Optional[List[int]]] = ContextVar("request_prompt_tokens", default=None)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class for labelled metrics."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.description}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(line + "\n" for line in self.samples())
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        self._values[self._key(labels)] = value
+
+
+class CallbackGauge(Metric):
+    """Gauge whose samples are computed at scrape time, e.g. from cache stats."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], List[Tuple[Dict[str, Any], float]]]
+    ):
+        super().__init__(name, description, labelnames)
+        self.callback = callback
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, self._key(labels))} {_format_value(value)}"
+            for labels, value in self.callback()
+        ]
+
+
+class Histogram(Metric):
+    """Bucketed distribution of observed values."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Collection of metrics rendered together in the Prometheus text format.
+
+    Metrics are plain dictionaries updated on the event loop, so recording
+    costs a dict lookup and an addition; nothing is formatted until
+    ``/metrics`` is scraped.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, description, labelnames))
+
+    def gauge(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, description, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, description, labelnames, buckets))
+
+    def callback_gauge(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], List[Tuple[Dict[str, Any], float]]]
+    ) -> CallbackGauge:
+        return self.register(CallbackGauge(name, description, labelnames, callback))
+
+    def render(self) -> str:
+        return "".join(metric.render() for metric in self._metrics.values())
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "End-to-end HTTP request latency", ("route",)
+)
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+STAGE_LATENCY = registry.histogram(
+    "request_stage_duration_seconds",
+    "Latency of request stages (upload_read, preprocess, ocr, base64_encode, model_call, parse, food_scoring)",
+    ("route", "stage")
+)
+MODEL_TOKENS = registry.counter(
+    "model_tokens_total", "Model tokens by model and direction (in/out)", ("model", "direction")
+)
+MODEL_IN_FLIGHT = registry.gauge(
+    "model_calls_in_flight", "Model calls currently awaiting a response"
+)
+MODEL_HEDGES = registry.counter(
+    "model_hedges_total", "Hedged model calls by whether the hedge won", ("outcome",)
+)
+HEDGED_CALL_LATENCY = registry.histogram(
+    "hedged_call_duration_seconds", "Served latency of model calls eligible for hedging"
+)
+OCR_ROUTES = registry.counter(
+    "ocr_routes_total", "Image translations by path taken after the OCR stage (text/vision)", ("path",)
+)
+OCR_LATENCY_SAVED = registry.counter(
+    "ocr_latency_saved_seconds_total", "Estimated latency saved by answering images through OCR and the text model"
+)
+ADMISSION_REJECTIONS = registry.counter(
+    "admission_rejections_total", "Requests shed with 429 by reason (rate_limited/queue_full/queue_timeout)", ("reason",)
+)
+ADMISSION_QUEUE_WAIT = registry.histogram(
+    "admission_queue_wait_seconds", "Time model-backed requests waited for a concurrency slot"
+)
+FORM_JOBS = registry.counter(
+    "form_jobs_total", "Form analysis jobs by outcome (submitted/deduplicated/retried/succeeded/failed)", ("outcome",)
+)
+HISTORY_ENTRIES = registry.counter(
+    "translation_history_entries_total", "Translation history entries by outcome (recorded/written/dropped)", ("outcome",)
+)
+PROMPT_TOKENS = registry.histogram(
+    "model_prompt_tokens",
+    "Estimated prompt tokens per model request by task",
+    ("task",),
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192)
+)
+PROMPT_TRUNCATIONS = registry.counter(
+    "model_prompt_truncations_total", "Prompt fields cut to their token budget", ("task", "field")
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a request stage.
+
+    Inside a request the timing is labelled with the matched route once the
+    response is done; outside a request it is recorded under ``background``.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((name, elapsed))
+        else:
+            STAGE_LATENCY.observe(elapsed, route="background", stage=name)
+
+
+def record_tokens(model: str, usage: Any) -> None:
+    """Count prompt and completion tokens from an OpenAI-style usage object."""
+    if usage is None:
+        return
+    MODEL_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, direction="in")
+    MODEL_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, direction="out")
+
+
+def record_prompt(task: str, tokens: int, truncated: Sequence[str] = ()) -> None:
+    """Record the estimated size of a prompt and add it to the current request's total."""
+    PROMPT_TOKENS.observe(tokens, task=task)
+    for field in truncated:
+        PROMPT_TRUNCATIONS.inc(task=task, field=field)
+    total = _request_prompt_tokens.get()
+    if total is not None:
+        total[0] += tokens
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latency and per-stage timings.
+
+    Responses of requests that prompted a model report the estimated prompt
+    size in an ``X-Prompt-Tokens`` header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        stages: List[Tuple[str, float]] = []
+        prompt_tokens = [0]
+        token = _request_stages.set(stages)
+        prompt_token = _request_prompt_tokens.set(prompt_tokens)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if prompt_tokens[0]:
+                    headers = [*message.get("headers", []), (b"x-prompt-tokens", str(prompt_tokens[0]).encode())]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_stages.reset(token)
+            _request_prompt_tokens.reset(prompt_token)
+
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_REQUESTS.inc(route=path, method=scope["method"], status=status)
+            HTTP_LATENCY.observe(elapsed, route=path)
+            for name, seconds in stages:
+                STAGE_LATENCY.observe(seconds, route=path, stage=name)
@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, List
+
+
+class FoodCondition(BaseModel):
+    """A health condition or allergy food can be checked against."""
+    id: str = Field(description="Stable condition identifier")
+    name: str = Field(description="Display name")
+    aliases: List[str] = Field(default=[], description="Other names the condition may be requested by")
+    names: Dict[str, List[str]] = Field(default={}, description="Names of the condition by language")
+
+
+class DetectedIngredient(BaseModel):
+    """An ingredient identified in a food image."""
+    name: str = Field(description="Common English ingredient name, e.g. 'wheat flour'")
+    confidence: float = Field(default=1.0, description="Likelihood from 0 to 1 that the dish contains it")
+
+
+class IngredientCheckRequest(BaseModel):
+    """Request model for checking a known list of ingredients, e.g. from a label."""
+    ingredients: List[str] = Field(description="Ingredient names in any indexed language")
+    conditions: List[str] = Field(default=[], description="Conditions or allergies to check (default: all)")
+    dish: Optional[str] = Field(default=None, description="Name of the dish or product")
+
+
+class FoodIdentification(BaseModel):
+    """Dish and ingredients identified in a food image."""
+    dish: str = Field(description="Name of the dish or food item")
+    ingredients: List[DetectedIngredient] = Field(description="Visible and typical hidden ingredients")
+    cached: bool = Field(default=False, description="Whether the result was served from cache")
+
+
+class IngredientRisk(BaseModel):
+    """Why an ingredient matters for a condition."""
+    ingredient: str = Field(description="Ingredient name")
+    risk: float = Field(description="Risk from 0 to 1, weighted by ingredient confidence")
+    reason: str = Field(description="Why the ingredient is a concern")
+
+
+class ConditionAssessment(BaseModel):
+    """Safety verdict of a dish for one condition."""
+    condition: str = Field(description="Condition identifier")
+    name: str = Field(description="Condition display name")
+    verdict: str = Field(description="Verdict (safe, caution, avoid, unknown)")
+    risk: float = Field(description="Highest ingredient risk for the condition, from 0 to 1")
+    triggers: List[IngredientRisk] = Field(default=[], description="Ingredients of concern, riskiest first")
+
+
+class FoodCheckResponse(BaseModel):
+    """Response model for a food safety check."""
+    dish: str = Field(description="Identified dish")
+    ingredients: List[DetectedIngredient] = Field(description="Identified ingredients")
+    assessments: List[ConditionAssessment] = Field(description="One assessment per requested condition")
+    unrecognized_ingredients: List[str] = Field(
+        default=[],
+        description="Identified ingredients missing from the condition matrix"
+    )
+    cached: bool = Field(default=False, description="Whether the identification was served from cache")
+    note: Optional[str] = Field(default=None, description="Advice on how to read the result")
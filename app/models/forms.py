@@ -31,6 +31,18 @@ class FormAnalysisResponse(BaseModel):
     required_documents: List[str] = Field(default=[], description="Required supporting documents")
     estimated_time: Optional[str] = Field(default=None, description="Estimated completion time")
     tips: List[str] = Field(default=[], description="Helpful tips for form completion")
+    cached: bool = Field(default=False, description="Whether the result was served from cache")
+
+
+class FormJobResponse(BaseModel):
+    """Status of an asynchronous form analysis job."""
+    job_id: str = Field(description="Job identifier to poll")
+    status: str = Field(description="Job status (queued, running, succeeded, failed)")
+    attempts: int = Field(default=0, description="Processing attempts so far")
+    created_at: str = Field(description="Submission time (ISO 8601, UTC)")
+    updated_at: str = Field(description="Time of the last status change (ISO 8601, UTC)")
+    result: Optional[FormAnalysisResponse] = Field(default=None, description="Analysis once the job has succeeded")
+    error: Optional[str] = Field(default=None, description="Failure reason once the job has failed")
 
 
 class FormExplanationRequest(BaseModel):
@@ -42,6 +54,16 @@ class FormExplanationRequest(BaseModel):
     user_situation: Optional[str] = Field(default=None, description="User's specific situation")
 
 
+class TemplateField(BaseModel):
+    """Language-independent definition of a field on a known form."""
+    field_name: str = Field(description="Name or identifier of the field")
+    field_type: str = Field(description="Type of field (text, checkbox, dropdown, etc.)")
+    label: str = Field(description="Field label as printed on the form")
+    required: bool = Field(default=False, description="Whether field is required")
+    example_value: Optional[str] = Field(default=None, description="Example of acceptable input")
+    validation_rules: List[str] = Field(default=[], description="Field validation requirements")
+
+
 class FormTemplate(BaseModel):
     """Model for form templates."""
     id: str = Field(description="Template unique identifier")
@@ -52,6 +74,14 @@ class FormTemplate(BaseModel):
     field_explanations: Dict[str, Dict[str, str]] = Field(description="Field explanations by language")
     sample_data: Optional[Dict[str, Any]] = Field(default=None, description="Sample data for fields")
     created_at: Optional[str] = Field(default=None, description="Template creation date")
+    aliases: List[str] = Field(default=[], description="Form numbers and document types that identify this template")
+    difficulty: Optional[str] = Field(default=None, description="How hard the form is to complete")
+    estimated_time: Optional[str] = Field(default=None, description="Estimated completion time")
+    fields: List[TemplateField] = Field(default=[], description="Fields on the form, in order")
+    descriptions: Dict[str, str] = Field(default={}, description="Form description by language")
+    instructions: Dict[str, List[str]] = Field(default={}, description="Completion steps by language")
+    tips: Dict[str, List[str]] = Field(default={}, description="Completion tips by language")
+    required_documents: List[str] = Field(default=[], description="Required supporting documents")
     
     class Config:
         from_attributes = True 
\ No newline at end of file
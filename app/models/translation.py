@@ -1,8 +1,32 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
+# Target languages offered to users; phrase packs are precomputed for these
+SUPPORTED_LANGUAGES = [
+    {"code": "English", "name": "English", "native_name": "English"},
+    {"code": "Spanish", "name": "Spanish", "native_name": "Español"},
+    {"code": "French", "name": "French", "native_name": "Français"},
+    {"code": "German", "name": "German", "native_name": "Deutsch"},
+    {"code": "Arabic", "name": "Arabic", "native_name": "العربية"},
+    {"code": "Ukrainian", "name": "Ukrainian", "native_name": "Українська"},
+    {"code": "Russian", "name": "Russian", "native_name": "Русский"},
+    {"code": "Polish", "name": "Polish", "native_name": "Polski"},
+    {"code": "Turkish", "name": "Turkish", "native_name": "Türkçe"},
+    {"code": "Persian", "name": "Persian", "native_name": "فارسی"},
+    {"code": "Pashto", "name": "Pashto", "native_name": "پښتو"},
+    {"code": "Dari", "name": "Dari", "native_name": "دری"},
+    {"code": "Portuguese", "name": "Portuguese", "native_name": "Português"},
+    {"code": "Italian", "name": "Italian", "native_name": "Italiano"},
+    {"code": "Dutch", "name": "Dutch", "native_name": "Nederlands"},
+    {"code": "Swedish", "name": "Swedish", "native_name": "Svenska"},
+    {"code": "Norwegian", "name": "Norwegian", "native_name": "Norsk"},
+    {"code": "Danish", "name": "Danish", "native_name": "Dansk"},
+    {"code": "Finnish", "name": "Finnish", "native_name": "Suomi"}
+]
+
+
 class TranslationRequest(BaseModel):
     """Request model for image translation."""
     image: str = Field(description="Base64 encoded image data")
@@ -28,12 +52,31 @@ class TranslationResponse(BaseModel):
     context_explanation: Optional[str] = Field(default=None, description="Cultural context and explanation")
     confidence: Optional[float] = Field(default=None, description="Translation confidence score")
     detected_objects: Optional[list] = Field(default=[], description="Objects detected in image")
+    cached: bool = Field(default=False, description="Whether the result was served from cache")
+
+
+class BatchTranslationRequest(BaseModel):
+    """Request model for translating many texts in one call."""
+    items: List[TextTranslationRequest] = Field(description="Texts to translate; target languages may differ per item")
+
+
+class BatchTranslationItem(BaseModel):
+    """Result for a single item of a batch translation."""
+    index: int = Field(description="Position of the item in the request")
+    result: Optional[TranslationResponse] = Field(default=None, description="Translation if the item succeeded")
+    error: Optional[str] = Field(default=None, description="Error message if the item failed")
+
+
+class BatchTranslationResponse(BaseModel):
+    """Response model for batch translation, in request order."""
+    results: List[BatchTranslationItem] = Field(description="Per-item results in input order")
 
 
 class TranslationHistory(BaseModel):
     """Model for translation history."""
     id: str = Field(description="Unique translation ID")
     user_id: Optional[str] = Field(default=None, description="User ID if authenticated")
+    kind: str = Field(default="text", description="What was translated (text, image, form)")
     original_text: str = Field(description="Original text")
     translated_text: str = Field(description="Translated text")
     source_language: str = Field(description="Source language")
@@ -43,4 +86,10 @@ class TranslationHistory(BaseModel):
     created_at: datetime = Field(description="Timestamp of translation")
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+class TranslationHistoryPage(BaseModel):
+    """One page of a user's translation history, newest first."""
+    items: List[TranslationHistory] = Field(description="History entries")
+    next_cursor: Optional[str] = Field(default=None, description="Cursor of the next page; absent on the last page")
@@ -1,78 +1,524 @@
-import base64
+import asyncio
+import hashlib
 import json
-from typing import Optional, Dict, Any, List
-from openai import OpenAI
+import time
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator, Union, Type, Callable, Awaitable
+from openai import AsyncOpenAI
+from pydantic import BaseModel
 import httpx
 
+from app.core import metrics
 from app.core.config import settings
-from app.models.translation import TranslationResponse
-from app.models.forms import FormAnalysisResponse, FormField
+from app.models.translation import TranslationResponse, TextTranslationRequest
+from app.models.forms import FormAnalysisResponse
+from app.models.food import FoodIdentification
+from app.services.backends import LOCAL, LocalBackend, ModelBackend, OpenAIBackend
+from app.services.cache import TranslationCache, translation_cache
+from app.services.hedging import HedgePolicy
+from app.services.image_cache import ImageResultCache, image_cache
+from app.services.ocr import OcrResult, OcrStage
+from app.services import prompts
+from app.services.pdf import PdfError, PdfRasterizer
+from app.services.phrase_pack import PhrasePack, phrase_pack
+from app.services.prompts import PromptTemplate
+from app.services.router import CLOSED, ModelRouter, ModelTarget, ModelUnavailableError, is_client_error
+from app.services.singleflight import SingleFlight
+from app.services.structured_output import (
+    StructuredOutputError,
+    StructuredOutputStats,
+    output_model,
+    repair_messages,
+    response_format
+)
+from app.services.uploads import encode_data_url
+
+# Model-facing schemas: response models minus the fields the server fills in
+IMAGE_TRANSLATION_OUTPUT = output_model(TranslationResponse, exclude=["target_language", "cached"])
+TEXT_TRANSLATION_OUTPUT = output_model(
+    TranslationResponse, exclude=["original_text", "target_language", "detected_objects", "cached"]
+)
+FORM_ANALYSIS_OUTPUT = output_model(FormAnalysisResponse, exclude=["cached"])
+FOOD_IDENTIFICATION_OUTPUT = output_model(FoodIdentification, exclude=["cached"])
+
+# Structured calls carry the schema summary in the cacheable prompt prefix
+IMAGE_TRANSLATION_PROMPT = prompts.IMAGE_TRANSLATION.structured(IMAGE_TRANSLATION_OUTPUT)
+TEXT_TRANSLATION_PROMPT = prompts.TEXT_TRANSLATION.structured(TEXT_TRANSLATION_OUTPUT)
+FORM_ANALYSIS_PROMPT = prompts.FORM_ANALYSIS.structured(FORM_ANALYSIS_OUTPUT)
+FOOD_IDENTIFICATION_PROMPT = prompts.FOOD_IDENTIFICATION.structured(FOOD_IDENTIFICATION_OUTPUT)
 
 
 class AIService:
     """Service for AI-powered text and vision processing."""
     
-    def __init__(self):
-        self.client = OpenAI(
-            base_url=settings.OPENROUTER_BASE_URL,
+    def __init__(
+        self,
+        cache: Optional[TranslationCache] = None,
+        vision_cache: Optional[ImageResultCache] = None,
+        phrases: Optional[PhrasePack] = None
+    ):
+        self._client: Optional[AsyncOpenAI] = None
+        self._clients: Dict[str, AsyncOpenAI] = {}
+        self.local_backends: Dict[str, LocalBackend] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.translation_cache = cache or translation_cache
+        self.image_cache = vision_cache or image_cache
+        self.phrase_pack = phrases if phrases is not None else phrase_pack
+        self.structured_stats = StructuredOutputStats()
+        self.single_flight = SingleFlight()
+        self.hedging = HedgePolicy.from_settings()
+        self.ocr = OcrStage.from_settings()
+        self.routers: Dict[str, ModelRouter] = {
+            "vision": ModelRouter.from_settings(settings.VISION_MODEL, settings.VISION_FALLBACK_MODELS),
+            "text": ModelRouter.from_settings(settings.TEXT_MODEL, settings.TEXT_FALLBACK_MODELS),
+        }
+    
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """
+        Shared connection pool, created on first use.
+        
+        All calls in a worker reuse one bounded connection pool, so concurrent
+        requests multiplex over keep-alive connections instead of blocking the
+        event loop on a synchronous HTTP call.
+        """
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.MODEL_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.MODEL_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+                timeout=settings.MODEL_TIMEOUT,
+            )
+        return self._http_client
+    
+    def _new_client(self, base_url: str) -> AsyncOpenAI:
+        return AsyncOpenAI(
+            base_url=base_url,
             api_key=settings.OPENROUTER_API_KEY,
+            http_client=self.http_client,
+            max_retries=settings.MODEL_MAX_RETRIES,
+        )
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """Model client for the default provider, created on first use."""
+        if self._client is None:
+            self._client = self._new_client(settings.OPENROUTER_BASE_URL)
+        return self._client
+    
+    def client_for(self, base_url: str) -> AsyncOpenAI:
+        """Model client for a routing target's endpoint, sharing the connection pool."""
+        if base_url == settings.OPENROUTER_BASE_URL.rstrip("/"):
+            return self.client
+        if base_url not in self._clients:
+            self._clients[base_url] = self._new_client(base_url)
+        return self._clients[base_url]
+    
+    def backend_for(self, target: ModelTarget) -> ModelBackend:
+        """
+        Inference backend for a routing target.
+        
+        Targets whose base URL is ``local`` run on an on-device backend, one
+        per model; all others go to their OpenAI-compatible endpoint.
+        """
+        if target.base_url == LOCAL:
+            if target.model not in self.local_backends:
+                self.local_backends[target.model] = LocalBackend.from_settings(target.model)
+            return self.local_backends[target.model]
+        return OpenAIBackend(self.client_for(target.base_url))
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Per-worker limit on in-flight model calls."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.MODEL_MAX_CONCURRENCY)
+        return self._semaphore
+    
+    async def close(self) -> None:
+        """Close the model clients and release pooled connections."""
+        if self._client is not None:
+            await self._client.close()
+        for client in self._clients.values():
+            await client.close()
+        for backend in self.local_backends.values():
+            await backend.close()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._client = None
+        self._clients = {}
+        self.local_backends = {}
+        self._http_client = None
+        self._semaphore = None
+    
+    async def _route(
+        self,
+        pool: str,
+        call: Callable[[ModelTarget], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run a model call on the best available target of a pool.
+        
+        Upstream errors are recorded against the target and the call falls
+        back to the next candidate, up to ``ROUTER_MAX_ATTEMPTS`` targets.
+        Requests the provider rejects as invalid (4xx) are raised at once.
+        
+        Args:
+            pool: Router pool name (``vision`` or ``text``)
+            call: Coroutine factory performing the call against one target
+            
+        Returns:
+            Result of the first successful call
+        """
+        router = self.routers[pool]
+        last_error: Optional[Exception] = None
+        attempts = 0
+        
+        for target in router.candidates():
+            if attempts >= settings.ROUTER_MAX_ATTEMPTS:
+                break
+            if not router.acquire(target):
+                continue
+            attempts += 1
+            
+            started = time.perf_counter()
+            try:
+                result = await call(target)
+            except asyncio.CancelledError:
+                router.release(target)
+                raise
+            except Exception as e:
+                if is_client_error(e):
+                    router.release(target)
+                    raise
+                router.record_failure(target)
+                last_error = e
+                continue
+            router.record_success(target, time.perf_counter() - started)
+            return result
+        
+        if last_error is not None:
+            raise last_error
+        raise ModelUnavailableError(f"All {pool} model targets are unavailable")
+    
+    async def _complete(
+        self,
+        pool: str,
+        messages: List[Dict[str, Any]],
+        **options: Any
+    ) -> str:
+        """
+        Run a routed chat completion under the per-worker concurrency limit.
+        
+        Vision calls are hedged when ``HEDGE_ENABLED`` is set: a slow call is
+        duplicated (in its own concurrency slot) and the first reply wins.
+        
+        Args:
+            pool: Router pool name (``vision`` or ``text``)
+            messages: Chat messages to send
+            **options: Extra completion parameters such as ``response_format``
+            
+        Returns:
+            Content of the first completion choice
+        """
+        async def call(target: ModelTarget) -> str:
+            metrics.MODEL_IN_FLIGHT.inc()
+            try:
+                with metrics.stage("model_call"):
+                    completion = await self.backend_for(target).complete(
+                        model=target.model,
+                        messages=messages,
+                        max_tokens=settings.MAX_TOKENS,
+                        temperature=0.3,
+                        **options
+                    )
+            finally:
+                metrics.MODEL_IN_FLIGHT.dec()
+            
+            metrics.record_tokens(target.model, completion.usage)
+            return completion.content
+        
+        async def attempt() -> str:
+            async with self.semaphore:
+                return await self._route(pool, call)
+        
+        if pool == "vision" and settings.HEDGE_ENABLED:
+            return await self.hedging.run(attempt)
+        return await attempt()
+    
+    async def _complete_structured(
+        self,
+        task: str,
+        pool: str,
+        messages: List[Dict[str, Any]],
+        output: Type[BaseModel]
+    ) -> BaseModel:
+        """
+        Run a completion constrained to a JSON schema and validate the reply.
+        
+        The schema is sent as ``response_format``; for providers that ignore
+        it, the messages are expected to come from a structured prompt template
+        that summarizes it in the system prompt. A reply that fails validation
+        gets exactly one repair retry with the validation errors attached.
+        
+        Args:
+            task: Task name for parse statistics
+            pool: Router pool name (``vision`` or ``text``)
+            messages: Chat messages to send
+            output: Pydantic model the reply must validate against
+            
+        Returns:
+            Validated instance of ``output``
+        """
+        options = {"response_format": response_format(output)}
+        self.structured_stats.record_call(task)
+        
+        content = await self._complete(pool, messages, **options)
+        parsed = self.structured_stats.parse(task, output, content)
+        if parsed is not None:
+            return parsed
+        
+        self.structured_stats.record_repair(task)
+        content = await self._complete(pool, repair_messages(messages, content, output), **options)
+        parsed = self.structured_stats.parse(task, output, content)
+        if parsed is not None:
+            return parsed
+        
+        self.structured_stats.record_failure(task)
+        raise StructuredOutputError(f"Model reply did not match the {output.__name__} schema")
+    
+    async def _coalesce(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one model call among identical in-flight requests."""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await func()
+        return await self.single_flight.do(key, func)
+    
+    def _flight_key(
+        self,
+        task: str,
+        payload: bytes,
+        digest: Optional[str] = None,
+        **params: Optional[str]
+    ) -> str:
+        """
+        Content key for single-flight: exact payload digest plus request parameters.
+        
+        A digest computed while the upload was read can be passed in to avoid
+        hashing the payload a second time.
+        """
+        digest = digest or hashlib.sha256(payload).hexdigest()
+        return f"{task}:{ImageResultCache.namespace(task, **params)}:{digest}"
+    
+    async def _lookup_image_result(
+        self,
+        task: str,
+        image: bytes,
+        **params: Optional[str]
+    ) -> Tuple[Optional[Tuple[str, int]], Optional[Any]]:
+        """
+        Look up a vision result for a near-identical image.
+        
+        Args:
+            task: Name of the vision task
+            image: Raw image bytes
+            **params: Request parameters that change the result
+            
+        Returns:
+            Tuple of (cache key to store a fresh result under, cached result).
+            The key is None when caching is disabled or the document is not
+            a decodable image.
+        """
+        if not settings.IMAGE_CACHE_ENABLED:
+            return None, None
+        
+        image_hash = await asyncio.to_thread(self.image_cache.hash, image)
+        if image_hash is None:
+            return None, None
+        
+        key = (ImageResultCache.namespace(task, **params), image_hash)
+        cached = self.image_cache.get(*key)
+        if cached is not None:
+            cached = cached.model_copy(update={"cached": True})
+        return key, cached
+    
+    async def _lookup_text_result(
+        self,
+        text: str,
+        target_language: str,
+        source_language: Optional[str],
+        context: Optional[str],
+        task: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[TranslationResponse]]:
+        """
+        Look up a precomputed or cached text translation.
+        
+        Args:
+            task: Cache namespace for results that are not schema-validated
+            
+        Returns:
+            Tuple of (cache key to store a fresh result under, cached result)
+        """
+        precomputed = self.phrase_pack.get(text, target_language, source_language, context)
+        if precomputed is not None:
+            return None, precomputed
+        
+        if not settings.TRANSLATION_CACHE_ENABLED:
+            return None, None
+        
+        cache_key = TranslationCache.make_key(
+            text, target_language, source_language, context, settings.TEXT_MODEL, task
         )
+        cached = await self.translation_cache.get(cache_key)
+        if cached is not None:
+            cached = cached.model_copy(update={"original_text": text})
+        return cache_key, cached
+    
+    async def _stream_complete(
+        self,
+        pool: str,
+        messages: List[Dict[str, Any]]
+    ) -> AsyncIterator[str]:
+        """
+        Stream a routed chat completion under the per-worker concurrency limit.
+        
+        The router picks the target when the stream is opened; once the first
+        delta has been yielded the stream is committed to that target.
+        
+        Yields:
+            Content deltas as they arrive from the model
+        """
+        async with self.semaphore:
+            async def open_stream(target: ModelTarget) -> Tuple[ModelTarget, Any]:
+                stream = await self.backend_for(target).stream(
+                    model=target.model,
+                    messages=messages,
+                    max_tokens=settings.MAX_TOKENS,
+                    temperature=0.3
+                )
+                return target, stream
+            
+            metrics.MODEL_IN_FLIGHT.inc()
+            try:
+                with metrics.stage("model_call"):
+                    target, stream = await self._route(pool, open_stream)
+                    async for delta, usage in stream:
+                        if delta:
+                            yield delta
+                        metrics.record_tokens(target.model, usage)
+            finally:
+                metrics.MODEL_IN_FLIGHT.dec()
     
     async def translate_image(
         self,
-        image_base64: str,
+        image: bytes,
         target_language: str,
         source_language: Optional[str] = None,
-        context: Optional[str] = None
+        context: Optional[str] = None,
+        mime_type: str = "image/jpeg",
+        content_hash: Optional[str] = None
     ) -> TranslationResponse:
         """
         Translate text found in an image.
         
+        With ``OCR_ENABLED``, images whose text is read confidently by local
+        OCR are translated through the text model instead of the vision model,
+        and the recognized word boxes are returned in ``detected_objects``.
+        
         Args:
-            image_base64: Base64 encoded image
+            image: Raw image bytes
             target_language: Target language for translation
             source_language: Optional source language hint
             context: Optional context for better translation
+            mime_type: MIME type of the image
+            content_hash: Optional SHA-256 of the original upload, used as the
+                coalescing key instead of hashing the payload again
             
         Returns:
             TranslationResponse with translation and context
         """
-        try:
-            data_url = f"data:image/jpeg;base64,{image_base64}"
-            
-            system_prompt = (
-                "You are a multilingual translation assistant specialized in helping refugees and immigrants. "
-                "Analyze the image, detect any text, and provide accurate translations with cultural context. "
-                "Always include explanations about what the text means in the target culture. "
-                "Focus on practical, helpful information that assists with daily life navigation."
-            )
+        cache_key, cached = await self._lookup_image_result(
+            "translate_image",
+            image,
+            target_language=target_language,
+            source_language=source_language,
+            context=context,
+            model=settings.VISION_MODEL
+        )
+        if cached is not None:
+            return cached
+        
+        async def run() -> TranslationResponse:
+            started = time.perf_counter()
+            if self.ocr.active:
+                recognized = await self.ocr.read(image)
+                if recognized is not None:
+                    result = await self._translate_recognized(
+                        recognized, target_language, source_language, context
+                    )
+                    if result is not None:
+                        self.ocr.record_text_route(time.perf_counter() - started)
+                        if cache_key is not None:
+                            self.image_cache.set(*cache_key, result)
+                        return result
             
-            user_prompt = self._build_translation_prompt(target_language, source_language, context)
-            
-            completion = self.client.chat.completions.create(
-                model=settings.VISION_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": user_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": data_url}
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=settings.MAX_TOKENS,
-                temperature=0.3
-            )
+            try:
+                output = await self._complete_structured(
+                    "translate_image",
+                    pool="vision",
+                    messages=self._image_translation_messages(
+                        self._data_url(image, mime_type), target_language, source_language, context,
+                        structured=True
+                    ),
+                    output=IMAGE_TRANSLATION_OUTPUT
+                )
+                
+                result = TranslationResponse(**output.model_dump(), target_language=target_language)
+                
+            except Exception as e:
+                raise Exception(f"Translation failed: {str(e)}")
             
-            response_content = completion.choices[0].message.content
-            return self._parse_translation_response(response_content, target_language)
+            if self.ocr.enabled:
+                self.ocr.record_vision_route(time.perf_counter() - started)
+            if cache_key is not None:
+                self.image_cache.set(*cache_key, result)
             
-        except Exception as e:
-            raise Exception(f"Translation failed: {str(e)}")
+            return result
+        
+        flight_key = self._flight_key(
+            "translate_image",
+            image,
+            content_hash,
+            target_language=target_language,
+            source_language=source_language,
+            context=context,
+            mime_type=mime_type
+        )
+        return await self._coalesce(flight_key, run)
+    
+    async def _translate_recognized(
+        self,
+        recognized: OcrResult,
+        target_language: str,
+        source_language: Optional[str],
+        context: Optional[str]
+    ) -> Optional[TranslationResponse]:
+        """
+        Translate OCR text through the text model.
+        
+        Returns:
+            The translation with the OCR word boxes, or None if the text path
+            failed and the image should go to the vision model instead
+        """
+        try:
+            translation = await self.translate_text(
+                text=recognized.text,
+                target_language=target_language,
+                source_language=source_language,
+                context=context
+            )
+        except Exception:
+            return None
+        return translation.model_copy(update={"detected_objects": recognized.detected_objects()})
     
     async def translate_text(
         self,
@@ -93,155 +539,608 @@ class AIService:
         Returns:
             TranslationResponse with translation and context
         """
-        try:
-            system_prompt = (
-                "You are a cultural translation assistant for refugees and immigrants. "
-                "Provide accurate translations with cultural context and practical explanations. "
-                "Help users understand not just what words mean, but how to use them appropriately."
-            )
+        cache_key, cached = await self._lookup_text_result(
+            text, target_language, source_language, context
+        )
+        if cached is not None:
+            return cached
+        
+        async def run() -> TranslationResponse:
+            try:
+                output = await self._complete_structured(
+                    "translate_text",
+                    pool="text",
+                    messages=self._text_translation_messages(
+                        text, target_language, source_language, context, structured=True
+                    ),
+                    output=TEXT_TRANSLATION_OUTPUT
+                )
+                
+                result = TranslationResponse(
+                    **output.model_dump(),
+                    original_text=text,
+                    target_language=target_language
+                )
+                
+            except Exception as e:
+                raise Exception(f"Text translation failed: {str(e)}")
+            
+            if cache_key is not None:
+                await self.translation_cache.set(cache_key, result)
             
-            user_prompt = (
-                f"Translate this text to {target_language}: '{text}'\n"
-                f"Source language: {source_language or 'auto-detect'}\n"
-                f"Context: {context or 'general'}\n"
-                "Provide: 1) Translation 2) Cultural context 3) Usage tips"
+            return result
+        
+        flight_key = "translate_text:" + TranslationCache.make_key(
+            text, target_language, source_language, context, settings.TEXT_MODEL
+        )
+        result = await self._coalesce(flight_key, run)
+        return result.model_copy(update={"original_text": text})
+    
+    async def translate_text_batch(
+        self,
+        items: List[TextTranslationRequest]
+    ) -> List[Union[TranslationResponse, Exception]]:
+        """
+        Translate many texts with as few model calls as possible.
+        
+        Identical items are translated once. Short single-line texts that share
+        target language, source language and context are packed into one
+        prompt; everything else runs as individual calls. Model calls run
+        concurrently, capped at BATCH_CONCURRENCY per batch.
+        
+        Args:
+            items: Texts to translate
+            
+        Returns:
+            One entry per input item, in input order: a TranslationResponse,
+            or the exception that item failed with
+        """
+        # Dedupe on the normalized cache key
+        keys = [
+            TranslationCache.make_key(
+                item.text, item.target_language, item.source_language, item.context, settings.TEXT_MODEL
+            )
+            for item in items
+        ]
+        unique: Dict[str, TextTranslationRequest] = {}
+        for key, item in zip(keys, items):
+            unique.setdefault(key, item)
+        
+        results: Dict[str, Union[TranslationResponse, Exception]] = {}
+        for key, item in unique.items():
+            precomputed = self.phrase_pack.get(
+                item.text, item.target_language, item.source_language, item.context
             )
+            if precomputed is not None:
+                results[key] = precomputed
+        # Packed replies are parsed free text, kept apart from the schema-validated
+        # ``translate_text`` results; a batch accepts either
+        packed_keys = {
+            key: TranslationCache.make_key(
+                item.text, item.target_language, item.source_language, item.context, settings.TEXT_MODEL,
+                task="translate_packed"
+            )
+            for key, item in unique.items()
+        }
+        if settings.TRANSLATION_CACHE_ENABLED:
+            for key, item in unique.items():
+                if key in results:
+                    continue
+                cached = await self.translation_cache.get(key) or await self.translation_cache.get(packed_keys[key])
+                if cached is not None:
+                    results[key] = cached
+        pending = {key: item for key, item in unique.items() if key not in results}
+        
+        # Group packable items by everything except the text itself
+        groups: Dict[Tuple[str, str, str], List[str]] = {}
+        singles: List[str] = []
+        for key, item in pending.items():
+            if len(item.text) <= settings.BATCH_PACK_MAX_CHARS and "\n" not in item.text:
+                group = (item.target_language, item.source_language or "", item.context or "")
+                groups.setdefault(group, []).append(key)
+            else:
+                singles.append(key)
+        
+        units: List[List[str]] = [[key] for key in singles]
+        for group_keys in groups.values():
+            for start in range(0, len(group_keys), settings.BATCH_PACK_MAX_ITEMS):
+                units.append(group_keys[start:start + settings.BATCH_PACK_MAX_ITEMS])
+        
+        limit = asyncio.Semaphore(settings.BATCH_CONCURRENCY)
+        
+        async def run_single(key: str) -> None:
+            item = pending[key]
+            try:
+                async with limit:
+                    results[key] = await self.translate_text(
+                        text=item.text,
+                        target_language=item.target_language,
+                        source_language=item.source_language,
+                        context=item.context
+                    )
+            except Exception as e:
+                results[key] = e
+        
+        async def run_unit(unit: List[str]) -> None:
+            if len(unit) == 1:
+                await run_single(unit[0])
+                return
+            
+            try:
+                async with limit:
+                    packed = await self._translate_packed([pending[key] for key in unit])
+            except Exception:
+                packed = None
             
-            completion = self.client.chat.completions.create(
-                model=settings.TEXT_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                max_tokens=settings.MAX_TOKENS,
-                temperature=0.3
+            if packed is None:
+                # The model did not honour the packed format; translate one by one
+                await asyncio.gather(*[run_single(key) for key in unit])
+                return
+            
+            for key, result in zip(unit, packed):
+                results[key] = result
+                if settings.TRANSLATION_CACHE_ENABLED:
+                    await self.translation_cache.set(packed_keys[key], result)
+        
+        await asyncio.gather(*[run_unit(unit) for unit in units])
+        
+        ordered = []
+        for key, item in zip(keys, items):
+            result = results[key]
+            if isinstance(result, TranslationResponse):
+                result = result.model_copy(update={"original_text": item.text})
+            ordered.append(result)
+        return ordered
+    
+    async def _translate_packed(
+        self,
+        items: List[TextTranslationRequest]
+    ) -> Optional[List[TranslationResponse]]:
+        """
+        Translate several short texts sharing languages and context in one call.
+        
+        Returns:
+            Translations in item order, or None if the model reply could not
+            be matched to the items
+        """
+        first = items[0]
+        texts = [item.text for item in items]
+        
+        response_content = await self._complete(
+            pool="text",
+            messages=self._render_prompt(
+                prompts.PACKED_TRANSLATION,
+                target_language=first.target_language,
+                source_language=first.source_language,
+                context=first.context,
+                texts=json.dumps(texts, ensure_ascii=False)
             )
+        )
+        
+        start, end = response_content.find("["), response_content.rfind("]")
+        if start == -1 or end < start:
+            return None
+        try:
+            parsed = json.loads(response_content[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+        
+        if not isinstance(parsed, list) or len(parsed) != len(items):
+            return None
+        if not all(isinstance(entry, dict) and entry.get("translation") for entry in parsed):
+            return None
+        
+        return [
+            TranslationResponse(
+                original_text=item.text,
+                translated_text=str(entry["translation"]),
+                source_language=item.source_language or "auto-detected",
+                target_language=item.target_language,
+                context_explanation=entry.get("cultural_context"),
+                confidence=0.90
+            )
+            for item, entry in zip(items, parsed)
+        ]
+    
+    async def stream_translate_text(
+        self,
+        text: str,
+        target_language: str,
+        source_language: Optional[str] = None,
+        context: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Translate text, streaming model output as it is generated.
+        
+        Args:
+            text: Text to translate
+            target_language: Target language
+            source_language: Optional source language
+            context: Optional context
+            
+        Yields:
+            ``("token", str)`` for each content delta, then a single
+            ``("result", TranslationResponse)`` with the parsed translation
+        """
+        # Streamed replies are free text, so they are cached apart from the
+        # schema-validated translations of ``translate_text``
+        cache_key, cached = await self._lookup_text_result(
+            text, target_language, source_language, context, task="stream_translate_text"
+        )
+        if cached is not None:
+            yield "result", cached
+            return
+        
+        try:
+            chunks = []
+            async for delta in self._stream_complete(
+                pool="text",
+                messages=self._text_translation_messages(
+                    text, target_language, source_language, context
+                )
+            ):
+                chunks.append(delta)
+                yield "token", delta
             
-            response_content = completion.choices[0].message.content
-            return self._parse_text_translation_response(
-                response_content, text, target_language, source_language
+            result = self._parse_text_translation_response(
+                "".join(chunks), text, target_language, source_language
             )
             
         except Exception as e:
             raise Exception(f"Text translation failed: {str(e)}")
+        
+        if cache_key is not None:
+            await self.translation_cache.set(cache_key, result)
+        
+        yield "result", result
+    
+    async def stream_translate_image(
+        self,
+        image: bytes,
+        target_language: str,
+        source_language: Optional[str] = None,
+        context: Optional[str] = None,
+        mime_type: str = "image/jpeg"
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Translate text found in an image, streaming model output as it is generated.
+        
+        Args:
+            image: Raw image bytes
+            target_language: Target language for translation
+            source_language: Optional source language hint
+            context: Optional context for better translation
+            mime_type: MIME type of the image
+            
+        Yields:
+            ``("token", str)`` for each content delta, then a single
+            ``("result", TranslationResponse)`` with the parsed translation
+        """
+        # Free-text results are kept apart from the schema-validated ``translate_image``
+        cache_key, cached = await self._lookup_image_result(
+            "stream_translate_image",
+            image,
+            target_language=target_language,
+            source_language=source_language,
+            context=context,
+            model=settings.VISION_MODEL
+        )
+        if cached is not None:
+            yield "result", cached
+            return
+        
+        try:
+            chunks = []
+            async for delta in self._stream_complete(
+                pool="vision",
+                messages=self._image_translation_messages(
+                    self._data_url(image, mime_type), target_language, source_language, context
+                )
+            ):
+                chunks.append(delta)
+                yield "token", delta
+            
+            result = self._parse_text_translation_response(
+                "".join(chunks), "Text detected in image", target_language, source_language
+            )
+            
+        except Exception as e:
+            raise Exception(f"Translation failed: {str(e)}")
+        
+        if cache_key is not None:
+            self.image_cache.set(*cache_key, result)
+        
+        yield "result", result
     
     async def analyze_form(
         self,
-        document_base64: str,
+        document: bytes,
         target_language: str,
         document_type: Optional[str] = None,
-        country: Optional[str] = None
+        country: Optional[str] = None,
+        mime_type: str = "image/jpeg",
+        content_hash: Optional[str] = None
     ) -> FormAnalysisResponse:
         """
         Analyze a form and provide field-by-field explanations.
         
         Args:
-            document_base64: Base64 encoded form document
+            document: Raw form document bytes
             target_language: Language for explanations
             document_type: Optional known document type
             country: Country context
+            mime_type: MIME type of the document
+            content_hash: Optional SHA-256 of the original upload, used as the
+                coalescing key instead of hashing the payload again
             
         Returns:
             FormAnalysisResponse with detailed field explanations
         """
-        try:
-            data_url = f"data:image/jpeg;base64,{document_base64}"
+        cache_key, cached = await self._lookup_image_result(
+            "analyze_form",
+            document,
+            target_language=target_language,
+            document_type=document_type,
+            country=country,
+            model=settings.VISION_MODEL
+        )
+        if cached is not None:
+            return cached
+        
+        async def run() -> FormAnalysisResponse:
+            try:
+                output = await self._complete_structured(
+                    "analyze_form",
+                    pool="vision",
+                    messages=self._form_analysis_messages(
+                        self._data_url(document, mime_type), target_language, document_type, country
+                    ),
+                    output=FORM_ANALYSIS_OUTPUT
+                )
+                
+                result = FormAnalysisResponse(**output.model_dump())
+                
+            except Exception as e:
+                raise Exception(f"Form analysis failed: {str(e)}")
             
-            system_prompt = (
-                "You are a form analysis assistant for refugees and immigrants. "
-                "Analyze forms and provide clear, step-by-step explanations in the user's language. "
-                "Focus on practical guidance that helps people fill out forms correctly. "
-                "Be sensitive to cultural differences and varying levels of bureaucratic familiarity."
-            )
+            if cache_key is not None:
+                self.image_cache.set(*cache_key, result)
             
-            user_prompt = (
-                f"Analyze this form and explain it in {target_language}:\n"
-                f"Document type: {document_type or 'unknown'}\n"
-                f"Country context: {country or 'general'}\n"
-                "Provide detailed field-by-field explanations, required documents, and completion tips."
-            )
+            return result
+        
+        flight_key = self._flight_key(
+            "analyze_form",
+            document,
+            content_hash,
+            target_language=target_language,
+            document_type=document_type,
+            country=country,
+            mime_type=mime_type
+        )
+        return await self._coalesce(flight_key, run)
+    
+    async def analyze_pdf_form(
+        self,
+        content: bytes,
+        target_language: str,
+        document_type: Optional[str] = None,
+        country: Optional[str] = None
+    ) -> FormAnalysisResponse:
+        """
+        Analyze a multi-page PDF form page by page.
+        
+        Pages are rasterized lazily: a page is only rendered once one of the
+        FORM_PAGE_CONCURRENCY analysis slots is free, so memory stays bounded
+        and the document costs exactly one vision call per page.
+        
+        Args:
+            content: Raw PDF bytes
+            target_language: Language for explanations
+            document_type: Optional known document type
+            country: Country context
             
-            completion = self.client.chat.completions.create(
-                model=settings.VISION_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": user_prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {"url": data_url}
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=settings.MAX_TOKENS,
-                temperature=0.3
-            )
+        Returns:
+            FormAnalysisResponse merged across all pages
+        """
+        rasterizer = PdfRasterizer(content, max_edge=settings.FORM_IMAGE_MAX_EDGE)
+        page_count = await rasterizer.open()
+        
+        try:
+            if page_count == 0:
+                raise PdfError("PDF has no pages")
+            if page_count > settings.FORM_MAX_PAGES:
+                raise PdfError(f"PDF has {page_count} pages. Maximum: {settings.FORM_MAX_PAGES}")
             
-            response_content = completion.choices[0].message.content
-            return self._parse_form_response(response_content)
+            slots = asyncio.Semaphore(settings.FORM_PAGE_CONCURRENCY)
             
-        except Exception as e:
-            raise Exception(f"Form analysis failed: {str(e)}")
+            async def analyze_page(page) -> FormAnalysisResponse:
+                try:
+                    return await self.analyze_form(
+                        document=page.data,
+                        target_language=target_language,
+                        document_type=document_type,
+                        country=country,
+                        mime_type=page.mime_type
+                    )
+                finally:
+                    slots.release()
+            
+            tasks = []
+            try:
+                for index in range(page_count):
+                    await slots.acquire()
+                    try:
+                        with metrics.stage("preprocess"):
+                            page = await rasterizer.render(index)
+                    except BaseException:
+                        slots.release()
+                        raise
+                    tasks.append(asyncio.create_task(analyze_page(page)))
+                
+                pages = await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
+        finally:
+            await rasterizer.close()
+        
+        return self._merge_form_pages(pages)
     
-    def _build_translation_prompt(
-        self,
-        target_language: str,
-        source_language: Optional[str],
-        context: Optional[str]
-    ) -> str:
-        """Build translation prompt for image analysis."""
-        prompt = f"Analyze this image and translate any text to {target_language}. "
+    def _merge_form_pages(self, pages: List[FormAnalysisResponse]) -> FormAnalysisResponse:
+        """Combine per-page analyses into one response, keeping first occurrences."""
+        if len(pages) == 1:
+            return pages[0]
         
-        if source_language:
-            prompt += f"The source language is likely {source_language}. "
+        def unique(values):
+            return list(dict.fromkeys(values))
         
-        if context:
-            prompt += f"Context: {context}. "
+        fields = {}
+        for page in pages:
+            for field in page.fields:
+                fields.setdefault(field.field_name, field)
         
-        prompt += (
-            "Provide: 1) Original detected text 2) Translation 3) Cultural context "
-            "4) What this means for daily life 5) Any important tips or warnings"
+        first = pages[0]
+        return FormAnalysisResponse(
+            form_type=first.form_type,
+            title=first.title,
+            description="\n\n".join(unique(page.description for page in pages)),
+            fields=list(fields.values()),
+            instructions=unique(i for page in pages for i in page.instructions),
+            required_documents=unique(d for page in pages for d in page.required_documents),
+            estimated_time=first.estimated_time,
+            tips=unique(t for page in pages for t in page.tips),
+            cached=all(page.cached for page in pages)
         )
-        
-        return prompt
     
-    def _parse_translation_response(
+    async def identify_food(
         self,
-        response: str,
-        target_language: str
-    ) -> TranslationResponse:
-        """Parse AI response into structured translation data."""
-        # This is a simplified parser - in production, you'd want more robust parsing
-        lines = response.split('\n')
-        
-        # Extract information with fallbacks
-        original_text = "Text detected in image"
-        translated_text = response  # Fallback to full response
-        context_explanation = None
-        
-        # Try to extract structured information
-        for i, line in enumerate(lines):
-            if "original" in line.lower() or "detected" in line.lower():
-                if i + 1 < len(lines):
-                    original_text = lines[i + 1].strip()
-            elif "translation" in line.lower():
-                if i + 1 < len(lines):
-                    translated_text = lines[i + 1].strip()
-            elif "context" in line.lower() or "cultural" in line.lower():
-                if i + 1 < len(lines):
-                    context_explanation = lines[i + 1].strip()
+        image: bytes,
+        context: Optional[str] = None,
+        mime_type: str = "image/jpeg",
+        content_hash: Optional[str] = None
+    ) -> FoodIdentification:
+        """
+        Identify the dish and its ingredients in a food image.
         
-        return TranslationResponse(
-            original_text=original_text,
-            translated_text=translated_text,
-            source_language="auto-detected",
+        The result does not depend on the conditions being checked, so one
+        cached identification serves every later check of the same dish.
+        
+        Args:
+            image: Raw food image bytes
+            context: Optional hint such as the menu name of the dish
+            mime_type: MIME type of the image
+            content_hash: Optional SHA-256 of the original upload, used as the
+                coalescing key instead of hashing the payload again
+            
+        Returns:
+            FoodIdentification with the dish and its likely ingredients
+        """
+        cache_key, cached = await self._lookup_image_result(
+            "identify_food",
+            image,
+            context=context,
+            model=settings.VISION_MODEL
+        )
+        if cached is not None:
+            return cached
+        
+        async def run() -> FoodIdentification:
+            try:
+                output = await self._complete_structured(
+                    "identify_food",
+                    pool="vision",
+                    messages=self._render_prompt(
+                        FOOD_IDENTIFICATION_PROMPT,
+                        image_url=self._data_url(image, mime_type),
+                        context=context
+                    ),
+                    output=FOOD_IDENTIFICATION_OUTPUT
+                )
+                
+                result = FoodIdentification(**output.model_dump())
+                
+            except Exception as e:
+                raise Exception(f"Food identification failed: {str(e)}")
+            
+            if cache_key is not None:
+                self.image_cache.set(*cache_key, result)
+            
+            return result
+        
+        flight_key = self._flight_key(
+            "identify_food",
+            image,
+            content_hash,
+            context=context,
+            mime_type=mime_type
+        )
+        return await self._coalesce(flight_key, run)
+    
+    def _render_prompt(
+        self,
+        template: PromptTemplate,
+        image_url: Optional[str] = None,
+        **values: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Render a prompt template and record its estimated size."""
+        prompt = template.render(image_url=image_url, **values)
+        metrics.record_prompt(prompt.task, prompt.tokens, prompt.truncated)
+        return prompt.messages
+    
+    def _data_url(self, data: bytes, mime_type: str) -> str:
+        """Encode an image once, straight into the data URL sent to the model."""
+        with metrics.stage("base64_encode"):
+            return encode_data_url(data, mime_type)
+    
+    def _image_translation_messages(
+        self,
+        image_url: str,
+        target_language: str,
+        source_language: Optional[str],
+        context: Optional[str],
+        structured: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Build chat messages for image translation."""
+        return self._render_prompt(
+            IMAGE_TRANSLATION_PROMPT if structured else prompts.IMAGE_TRANSLATION,
+            image_url=image_url,
             target_language=target_language,
-            context_explanation=context_explanation,
-            confidence=0.85,  # Default confidence
-            detected_objects=[]
+            source_language=source_language,
+            context=context
+        )
+    
+    def _text_translation_messages(
+        self,
+        text: str,
+        target_language: str,
+        source_language: Optional[str],
+        context: Optional[str],
+        structured: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Build chat messages for text translation."""
+        return self._render_prompt(
+            TEXT_TRANSLATION_PROMPT if structured else prompts.TEXT_TRANSLATION,
+            text=text,
+            target_language=target_language,
+            source_language=source_language,
+            context=context
+        )
+    
+    def _form_analysis_messages(
+        self,
+        image_url: str,
+        target_language: str,
+        document_type: Optional[str],
+        country: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Build chat messages for form analysis."""
+        return self._render_prompt(
+            FORM_ANALYSIS_PROMPT,
+            image_url=image_url,
+            target_language=target_language,
+            document_type=document_type,
+            country=country
         )
     
     def _parse_text_translation_response(
@@ -251,7 +1150,7 @@ class AIService:
         target_language: str,
         source_language: Optional[str]
     ) -> TranslationResponse:
-        """Parse text translation response."""
+        """Wrap a free-text (streamed) model response as a translation."""
         return TranslationResponse(
             original_text=original_text,
             translated_text=response,
@@ -260,33 +1159,68 @@ class AIService:
             context_explanation=response,  # Full response includes context
             confidence=0.90
         )
-    
-    def _parse_form_response(self, response: str) -> FormAnalysisResponse:
-        """Parse form analysis response into structured data."""
-        # Simplified parsing - in production, use more sophisticated extraction
-        return FormAnalysisResponse(
-            form_type="Government Form",
-            title="Analyzed Form",
-            description=response,
-            fields=[
-                FormField(
-                    field_name="sample_field",
-                    field_type="text",
-                    label="Sample Field",
-                    explanation="This is a sample field explanation",
-                    required=True,
-                    example_value="Example value"
-                )
-            ],
-            instructions=[
-                "Fill out all required fields",
-                "Provide accurate information",
-                "Review before submission"
-            ],
-            required_documents=["ID document", "Proof of address"],
-            estimated_time="15-30 minutes"
-        )
 
 
 # Create service instance
-ai_service = AIService() 
\ No newline at end of file
+ai_service = AIService()
+
+
+def _cache_metrics() -> List[Tuple[Dict[str, Any], float]]:
+    samples = []
+    for name, stats in (
+        ("translation", ai_service.translation_cache.stats()),
+        ("image", ai_service.image_cache.stats()),
+    ):
+        samples.append(({"cache": name, "result": "hit"}, stats["hits"]))
+        samples.append(({"cache": name, "result": "miss"}, stats["misses"]))
+    return samples
+
+
+def _cache_hit_ratio() -> List[Tuple[Dict[str, Any], float]]:
+    return [
+        ({"cache": "translation"}, ai_service.translation_cache.stats()["hit_rate"]),
+        ({"cache": "image"}, ai_service.image_cache.stats()["hit_rate"]),
+    ]
+
+
+metrics.registry.callback_gauge(
+    "cache_lookups", "Cache lookups by cache and result since start", ("cache", "result"), _cache_metrics
+)
+metrics.registry.callback_gauge(
+    "cache_hit_ratio", "Cache hit ratio since start", ("cache",), _cache_hit_ratio
+)
+
+
+def _router_samples(
+    value: Callable[[ModelRouter, ModelTarget], Optional[float]]
+) -> Callable[[], List[Tuple[Dict[str, Any], float]]]:
+    def samples() -> List[Tuple[Dict[str, Any], float]]:
+        return [
+            ({"pool": pool, "target": target.name}, value(router, target))
+            for pool, router in ai_service.routers.items()
+            for target in router.targets
+            if value(router, target) is not None
+        ]
+    return samples
+
+
+metrics.registry.callback_gauge(
+    "model_target_latency_seconds", "EWMA latency per routing target", ("pool", "target"),
+    _router_samples(lambda router, target: target.latency)
+)
+metrics.registry.callback_gauge(
+    "model_target_error_rate", "EWMA error rate per routing target", ("pool", "target"),
+    _router_samples(lambda router, target: target.error_rate)
+)
+metrics.registry.callback_gauge(
+    "model_target_circuit_open", "1 when a routing target's circuit breaker is open or half-open", ("pool", "target"),
+    _router_samples(lambda router, target: float(router.state(target) != CLOSED))
+)
+metrics.registry.callback_gauge(
+    "model_hedge_rate", "Fraction of hedging-eligible calls that were hedged since start", (),
+    lambda: [({}, ai_service.hedging.stats()["hedge_rate"])]
+)
+metrics.registry.callback_gauge(
+    "single_flight_coalesced", "Requests served by another in-flight model call since start", (),
+    lambda: [({}, ai_service.single_flight.coalesced)]
+) 
\ No newline at end of file
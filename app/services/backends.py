@@ -0,0 +1,366 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, AsyncIterator, List, Set, Tuple
+
+from app.core.config import settings
+
+# Routing targets with this base URL run on the local backend, e.g. ``google/gemma-3-1b-it@local``
+LOCAL = "local"
+
+
+class BackendUnavailableError(RuntimeError):
+    """Raised when a backend's optional dependencies are not installed."""
+
+
+@dataclass
+class Completion:
+    """Reply of a non-streaming model call."""
+    content: str
+    # OpenAI-style usage with prompt_tokens and completion_tokens, if reported
+    usage: Any = None
+
+
+class ModelBackend:
+    """
+    Interface between AIService and an inference engine.
+
+    Backends take OpenAI-style chat messages. ``stream`` is awaited to open
+    the stream, so connection errors surface before the first delta and the
+    router can still fall back; the returned iterator yields
+    ``(delta, usage)`` pairs.
+    """
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float,
+        **options: Any
+    ) -> Completion:
+        raise NotImplementedError
+
+    async def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class OpenAIBackend(ModelBackend):
+    """Remote inference through an OpenAI-compatible API such as OpenRouter."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float,
+        **options: Any
+    ) -> Completion:
+        completion = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            **options
+        )
+        return Completion(
+            content=completion.choices[0].message.content,
+            usage=getattr(completion, "usage", None)
+        )
+
+    async def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        stream = await self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        return self._deltas(stream)
+
+    @staticmethod
+    async def _deltas(stream) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        async for chunk in stream:
+            # The final chunk carries usage and no choices
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            yield delta, getattr(chunk, "usage", None)
+
+
+def text_conversation(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """
+    Reduce chat messages to plain-text turns for a local chat template.
+
+    The system prompt is folded into the first user turn, since not every
+    chat template accepts a system role.
+
+    Raises:
+        ValueError: If a message carries an image
+    """
+    system = []
+    turns = []
+    for message in messages:
+        content = message["content"]
+        if not isinstance(content, str):
+            if any(part.get("type") != "text" for part in content):
+                raise ValueError("The local backend only supports text messages")
+            content = "\n".join(part["text"] for part in content)
+        if message["role"] == "system":
+            system.append(content)
+        else:
+            turns.append({"role": message["role"], "content": content})
+    if system and turns:
+        turns[0] = {**turns[0], "content": "\n\n".join([*system, turns[0]["content"]])}
+    return turns
+
+
+class TransformersEngine:
+    """
+    Batched CPU generation with a Hugging Face causal language model.
+
+    Linear layers are dynamically quantized to int8 unless ``quantize`` is
+    off, which cuts memory use and speeds up matrix multiplies on CPU.
+    """
+
+    def __init__(self, model_name: str, quantize: bool = True, threads: int = 0):
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+        except ImportError as e:
+            raise BackendUnavailableError(
+                "Local inference needs the optional 'local' dependencies (transformers, torch)"
+            ) from e
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, padding_side="left")
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+    def generate(
+        self,
+        conversations: List[List[Dict[str, str]]],
+        max_new_tokens: int,
+        temperature: float
+    ) -> List[Tuple[str, int, int]]:
+        """
+        Generate replies for a batch of conversations in one padded pass.
+
+        Returns:
+            ``(text, prompt_tokens, completion_tokens)`` per conversation
+        """
+        prompts = [
+            self.tokenizer.apply_chat_template(conversation, tokenize=False, add_generation_prompt=True)
+            for conversation in conversations
+        ]
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True, add_special_tokens=False)
+        sampling = {"do_sample": True, "temperature": temperature} if temperature > 0 else {"do_sample": False}
+        with self.torch.inference_mode():
+            output = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                pad_token_id=self.tokenizer.pad_token_id,
+                **sampling
+            )
+
+        prompt_length = inputs["input_ids"].shape[1]
+        results = []
+        for row, mask in zip(output, inputs["attention_mask"]):
+            generated = row[prompt_length:]
+            completion_tokens = int((generated != self.tokenizer.pad_token_id).sum())
+            text = self.tokenizer.decode(generated, skip_special_tokens=True).strip()
+            results.append((text, int(mask.sum()), completion_tokens))
+        return results
+
+
+@dataclass
+class _Request:
+    conversation: List[Dict[str, str]]
+    max_tokens: int
+    temperature: float
+    future: asyncio.Future = field(repr=False)
+
+
+class LocalBackend(ModelBackend):
+    """
+    On-device text inference with micro-batching.
+
+    Concurrent requests are queued and, after waiting at most
+    ``batch_window`` seconds for company, up to ``max_batch_size`` requests
+    with the same generation parameters are decoded together in a single
+    batched ``generate`` call. The engine runs on one dedicated thread and
+    is loaded on first use. ``response_format`` is not enforced; structured
+    calls rely on the schema summary in the prompt and the repair retry.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_batch_size: int = 8,
+        batch_window: float = 0.01,
+        quantize: bool = True,
+        threads: int = 0,
+        engine: Any = None
+    ):
+        self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.quantize = quantize
+        self.threads = threads
+        self._engine = engine
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-model")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        # Futures of requests queued or being decoded, failed on close
+        self._pending: Set[asyncio.Future] = set()
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+
+    @classmethod
+    def from_settings(cls, model_name: str) -> "LocalBackend":
+        return cls(
+            model_name,
+            max_batch_size=settings.LOCAL_MAX_BATCH_SIZE,
+            batch_window=settings.LOCAL_BATCH_WINDOW,
+            quantize=settings.LOCAL_QUANTIZE,
+            threads=settings.LOCAL_THREADS,
+        )
+
+    def _generate(self, batch: List[_Request]) -> List[Tuple[str, int, int]]:
+        if self._engine is None:
+            self._engine = TransformersEngine(self.model_name, self.quantize, self.threads)
+        return self._engine.generate(
+            [request.conversation for request in batch],
+            max_new_tokens=batch[0].max_tokens,
+            temperature=batch[0].temperature
+        )
+
+    async def _next_batch(self) -> List[_Request]:
+        first = await self._queue.get()
+        batch = [first]
+        held = []
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                request = await asyncio.wait_for(self._queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            same_params = (request.max_tokens, request.temperature) == (first.max_tokens, first.temperature)
+            (batch if same_params else held).append(request)
+        for request in held:
+            self._queue.put_nowait(request)
+        return [request for request in batch if not request.future.cancelled()]
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            self.batches += 1
+            self.batched_requests += len(batch)
+            try:
+                results = await loop.run_in_executor(self._executor, self._generate, batch)
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            for request, result in zip(batch, results):
+                if not request.future.done():
+                    request.future.set_result(result)
+
+    async def _submit(self, messages: List[Dict[str, Any]], max_tokens: int, temperature: float) -> Completion:
+        conversation = text_conversation(messages)
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        self.requests += 1
+        self._queue.put_nowait(_Request(conversation, max_tokens, temperature, future))
+        text, prompt_tokens, completion_tokens = await future
+        return Completion(
+            content=text,
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        )
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float,
+        **options: Any
+    ) -> Completion:
+        return await self._submit(messages, max_tokens, temperature)
+
+    async def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        max_tokens: int,
+        temperature: float
+    ) -> AsyncIterator[Tuple[Optional[str], Any]]:
+        # Batched generation finishes all sequences together, so the reply arrives as one delta
+        completion = await self._submit(messages, max_tokens, temperature)
+
+        async def deltas() -> AsyncIterator[Tuple[Optional[str], Any]]:
+            yield completion.content, completion.usage
+        return deltas()
+
+    async def close(self) -> None:
+        """Stop the batching worker and fail every request still waiting on it."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        # Queued requests and the batch being decoded would otherwise wait forever
+        for future in list(self._pending):
+            if not future.done():
+                future.set_exception(RuntimeError("backend closed"))
+        self._queue = None
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching counters for monitoring."""
+        return {
+            "model": self.model_name,
+            "loaded": self._engine is not None,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+        }
@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+from app.core.config import settings
+from app.core.database import sqlite_path
+from app.models.translation import TranslationResponse
+
+
+class LRUCache:
+    """In-process LRU cache with a per-entry time to live."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live entry and mark it most recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store an entry, evicting the least recently used ones when full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk key/value tier shared by all workers using the same database file."""
+
+    def __init__(self, path: str, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS translation_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM translation_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translation_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class TranslationCache:
+    """
+    Content-addressed cache for text translations.
+
+    Lookups hit the in-process LRU tier first and fall back to the optional
+    SQLite tier; disk hits are promoted into memory.
+    """
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None):
+        self.memory = memory
+        self.disk = disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "TranslationCache":
+        """Build the cache tiers described by the application settings."""
+        memory = LRUCache(
+            max_entries=settings.TRANSLATION_CACHE_MAX_ENTRIES,
+            ttl=settings.TRANSLATION_CACHE_TTL
+        )
+
+        disk = None
+        path = sqlite_path(settings.DATABASE_URL)
+        if settings.TRANSLATION_CACHE_PERSISTENT and path:
+            disk = SQLiteCache(path, ttl=settings.TRANSLATION_CACHE_TTL)
+
+        return cls(memory, disk)
+
+    @staticmethod
+    def make_key(
+        text: str,
+        target_language: str,
+        source_language: Optional[str],
+        context: Optional[str],
+        model: str,
+        task: Optional[str] = None
+    ) -> str:
+        """
+        Build a cache key from the normalized request.
+
+        Whitespace is collapsed and language names are case-folded, so
+        trivially different spellings of the same request share an entry.
+        A ``task`` keeps results produced another way, e.g. by a free-text
+        stream, apart from the structured translations.
+        """
+        normalized = [
+            " ".join(text.split()),
+            target_language.strip().casefold(),
+            (source_language or "").strip().casefold(),
+            " ".join((context or "").split()),
+            model,
+        ]
+        if task is not None:
+            normalized.append(task)
+        payload = json.dumps(normalized, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[TranslationResponse]:
+        """Look up a cached translation, or None on a miss."""
+        response = self.memory.get(key)
+
+        if response is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                response = TranslationResponse.model_validate_json(value)
+                self.memory.set(key, response)
+                self.disk_hits += 1
+
+        if response is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return response.model_copy(update={"cached": True})
+
+    async def set(self, key: str, response: TranslationResponse) -> None:
+        """Store a fresh translation in every tier."""
+        self.memory.set(key, response)
+        if self.disk is not None:
+            try:
+                await asyncio.to_thread(self.disk.set, key, response.model_dump_json())
+            except sqlite3.Error:
+                # The disk tier is best effort; the memory tier already has the entry
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.TRANSLATION_CACHE_ENABLED,
+            "persistent": self.disk is not None,
+            "size": len(self.memory),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Create cache instance
+translation_cache = TranslationCache.from_settings()
@@ -0,0 +1,265 @@
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.models.food import (
+    ConditionAssessment,
+    FoodCheckResponse,
+    FoodCondition,
+    FoodIdentification,
+    IngredientRisk
+)
+from app.services.food_index import FoodIndex, normalize, singular
+
+SAFE = "safe"
+CAUTION = "caution"
+AVOID = "avoid"
+UNKNOWN = "unknown"
+
+DISCLAIMER = (
+    "Based on typical recipes for the identified dish; check the packaging "
+    "or ask the cook when a condition is severe."
+)
+UNSCORED_NOTE = (
+    "Some ingredients could not be checked ({}), so no condition is marked "
+    "safe; check them yourself before eating."
+)
+UNSURE_NOTE = (
+    "Some ingredients were identified too uncertainly to rule out ({}), so "
+    "conditions they affect are not marked safe; check them yourself before eating."
+)
+
+
+class ConditionMatrix:
+    """
+    Scores identified dishes against conditions using the food index.
+
+    The index holds the risk (0 = no concern, 1 = avoid) of each ingredient
+    for each condition. A dish is scored against every requested condition
+    at once: the identified ingredients select their sparse rows, are
+    weighted by how likely the dish contains them, and the highest weighted
+    risk per condition decides the verdict. No model call is needed per
+    condition, so checking one condition costs the same as checking all.
+    A dish with an ingredient missing from the index is never called safe,
+    and neither is a condition that an uncertain ingredient could affect.
+    """
+
+    def __init__(
+        self,
+        index: FoodIndex,
+        avoid_threshold: float = 0.7,
+        caution_threshold: float = 0.3,
+        min_confidence: float = 0.3
+    ):
+        self.index = index
+        self.avoid_threshold = avoid_threshold
+        self.caution_threshold = caution_threshold
+        self.min_confidence = min_confidence
+        self._conditions: Optional[List[FoodCondition]] = None
+        # Column and display name of conditions already asked for, by id
+        self._resolved: Dict[str, Tuple[int, str]] = {}
+        self.checks = 0
+
+    @classmethod
+    def from_source(cls, source: Dict[str, Any], **options: float) -> "ConditionMatrix":
+        """Build a matrix from parsed condition data without an index file."""
+        return cls(FoodIndex.compile(source), **options)
+
+    @classmethod
+    def from_settings(cls) -> "ConditionMatrix":
+        return cls(
+            FoodIndex.load(settings.FOOD_INDEX_PATH, settings.FOOD_CONDITIONS_PATH),
+            avoid_threshold=settings.FOOD_AVOID_THRESHOLD,
+            caution_threshold=settings.FOOD_CAUTION_THRESHOLD,
+            min_confidence=settings.FOOD_MIN_INGREDIENT_CONFIDENCE,
+        )
+
+    @property
+    def conditions(self) -> List[FoodCondition]:
+        """Every condition with its names, decoded from the index on first use."""
+        if self._conditions is None:
+            self._conditions = list(self.index.conditions())
+        return self._conditions
+
+    def column(self, name: str) -> Optional[int]:
+        """Index column of a condition id, name or alias in any indexed language."""
+        key = normalize(name)
+        column = self.index.condition(key)
+        if column is None and singular(key) != key:
+            column = self.index.condition(singular(key))
+        return column
+
+    def resolve(self, names: Sequence[str]) -> Tuple[List[str], List[str]]:
+        """
+        Map requested condition names or aliases to condition ids.
+
+        Returns:
+            Tuple of (condition ids in request order without duplicates,
+            names that match no condition). No names means every condition.
+        """
+        columns = range(self.index.condition_count) if not names else [self.column(name) for name in names]
+        ids: List[str] = []
+        unknown = []
+        for name, column in zip(names or columns, columns):
+            if column is None:
+                unknown.append(name)
+                continue
+            condition_id = self.index.condition_id(column)
+            if condition_id not in self._resolved:
+                self._resolved[condition_id] = (column, self.index.condition_name(column))
+            if condition_id not in ids:
+                ids.append(condition_id)
+        return ids, unknown
+
+    def _condition(self, condition_id: str) -> Tuple[int, str]:
+        resolved = self._resolved.get(condition_id)
+        if resolved is None:
+            column = self.column(condition_id)
+            if column is None:
+                raise KeyError(condition_id)
+            resolved = self._resolved[condition_id] = (column, self.index.condition_name(column))
+        return resolved
+
+    def _lookup(self, name: str) -> Optional[int]:
+        row = self.index.ingredient(name)
+        if row is None and singular(name) != name:
+            row = self.index.ingredient(singular(name))
+        return row
+
+    def rows(self, ingredient: str) -> List[int]:
+        """
+        Index rows of every ingredient named in an ingredient name.
+
+        The name is split into the longest known names from left to right,
+        also trying singular forms, so ``almond milk`` finds both ``almond``
+        and ``milk`` and ``whole wheat breads`` finds ``wheat`` and ``bread``,
+        while ``peanut butter`` stays one ingredient. Words that are not part
+        of any known name are skipped.
+        """
+        words = normalize(ingredient).split()
+        rows = []
+        start = 0
+        while start < len(words):
+            for end in range(len(words), start, -1):
+                row = self._lookup(" ".join(words[start:end]))
+                if row is not None:
+                    rows.append(row)
+                    start = end
+                    break
+            else:
+                start += 1
+        return rows
+
+    def check(self, identification: FoodIdentification, condition_ids: List[str]) -> FoodCheckResponse:
+        """
+        Score an identified dish against conditions.
+
+        Args:
+            identification: Dish and ingredients identified in the image
+            condition_ids: Conditions to assess, as returned by ``resolve``
+
+        Returns:
+            FoodCheckResponse with one assessment per condition
+        """
+        rows = []
+        weights = []
+        unrecognized = []
+        # Likely ingredients that could not be scored and may carry any risk
+        unscored = []
+        # Known ingredients below min_confidence: too unsure to score, too risky to ignore
+        unsure_rows = []
+        unsure_names = []
+        for ingredient in identification.ingredients:
+            matched = self.rows(ingredient.name)
+            if not matched:
+                unrecognized.append(ingredient.name)
+                if ingredient.confidence >= self.min_confidence:
+                    unscored.append(ingredient.name)
+            elif ingredient.confidence >= self.min_confidence:
+                rows.extend(matched)
+                weights.extend([min(max(ingredient.confidence, 0.0), 1.0)] * len(matched))
+            else:
+                unsure_rows.extend(matched)
+                unsure_names.extend([ingredient.name] * len(matched))
+        recognized = bool(rows)
+
+        conditions = [self._condition(condition_id) for condition_id in condition_ids]
+        columns = np.array([column for column, _ in conditions], dtype=np.int64)
+
+        # Requested conditions an unsure ingredient could affect cannot be called safe
+        unsure_owners, unsure_columns, unsure_scores, _ = self.index.risks(np.array(unsure_rows, dtype=np.int64))
+        affecting = (unsure_scores > 0) & np.isin(unsure_columns, columns)
+        doubtful = np.isin(columns, unsure_columns[affecting])
+        doubted = list(dict.fromkeys(unsure_names[k] for k in unsure_owners[affecting]))
+        owners, risk_columns, scores, reasons = self.index.risks(np.array(rows, dtype=np.int64))
+
+        # Keep the risks of requested conditions, as positions in ``columns``
+        order = np.argsort(columns)
+        found = np.minimum(np.searchsorted(columns[order], risk_columns), max(len(columns) - 1, 0))
+        requested = columns[order][found] == risk_columns if len(columns) else np.zeros(0, dtype=bool)
+        positions = order[found[requested]]
+        owners = owners[requested]
+        weighted = np.asarray(weights, dtype=np.float32)[owners] * scores[requested]
+        reasons = reasons[requested]
+
+        peaks = np.zeros(len(columns), dtype=np.float32)
+        np.maximum.at(peaks, positions, weighted)
+        # Riskiest trigger first within each condition
+        triggers: Dict[int, List[IngredientRisk]] = {}
+        for k in np.lexsort((-weighted, positions)):
+            if weighted[k] > 0:
+                triggers.setdefault(int(positions[k]), []).append(IngredientRisk(
+                    ingredient=self.index.ingredient_name(rows[owners[k]]),
+                    risk=round(float(weighted[k]), 3),
+                    reason=self.index.string(reasons[k])
+                ))
+
+        assessments = []
+        for position, (condition_id, (_, name)) in enumerate(zip(condition_ids, conditions)):
+            risk = float(peaks[position])
+            if not recognized:
+                verdict = UNKNOWN
+            elif risk >= self.avoid_threshold:
+                verdict = AVOID
+            elif risk >= self.caution_threshold:
+                verdict = CAUTION
+            elif unscored or doubtful[position]:
+                verdict = UNKNOWN
+            else:
+                verdict = SAFE
+            assessments.append(ConditionAssessment(
+                condition=condition_id,
+                name=name,
+                verdict=verdict,
+                risk=round(risk, 3),
+                triggers=triggers.get(position, [])
+            ))
+
+        self.checks += 1
+        return FoodCheckResponse(
+            dish=identification.dish,
+            ingredients=identification.ingredients,
+            assessments=assessments,
+            unrecognized_ingredients=unrecognized,
+            cached=identification.cached,
+            note=self._note(unscored, doubted)
+        )
+
+    @staticmethod
+    def _note(unscored: List[str], doubted: List[str]) -> str:
+        """Explain which ingredients kept conditions from being marked safe."""
+        notes = []
+        if unscored:
+            notes.append(UNSCORED_NOTE.format(", ".join(unscored)))
+        if doubted:
+            notes.append(UNSURE_NOTE.format(", ".join(doubted)))
+        return " ".join(notes) or DISCLAIMER
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and usage for monitoring."""
+        return {**self.index.stats(), "checks": self.checks}
+
+
+# Create condition matrix instance
+condition_matrix = ConditionMatrix.from_settings()
@@ -0,0 +1,392 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import unicodedata
+from typing import Optional, Dict, Any, List, Iterator, Tuple, Union
+
+import numpy as np
+
+from app.models.food import FoodCondition
+
+MAGIC = b"FOODIDX1"
+LENGTH = struct.Struct("<I")
+# Sections start on 8-byte boundaries so they can be viewed as arrays in place
+ALIGN = 8
+
+
+def normalize(value: str) -> str:
+    """
+    Lookup form of a name in any script.
+
+    Case, accents and punctuation are folded away, so ``Crème-Fraîche``
+    matches ``creme fraiche`` and ``أرز`` matches ``ارز``.
+    """
+    decomposed = unicodedata.normalize("NFKD", value)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[\W_]+", " ", stripped.casefold()).split())
+
+
+def singular(key: str) -> str:
+    """Crude English singular of the last word, enough for ingredient names."""
+    for suffix, replacement in (("ies", "y"), ("oes", "o"), ("shes", "sh"), ("s", "")):
+        if key.endswith(suffix) and not key.endswith("ss"):
+            return key[: -len(suffix)] + replacement
+    return key
+
+
+def name_key(normalized: str) -> int:
+    """64-bit lookup key of a normalized name."""
+    return int.from_bytes(hashlib.blake2b(normalized.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _align(position: int) -> int:
+    return (position + ALIGN - 1) // ALIGN * ALIGN
+
+
+class _Strings:
+    """Deduplicating string table."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def add(self, value: str) -> int:
+        return self.ids.setdefault(value, len(self.ids))
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        encoded = [value.encode("utf-8") for value in self.ids]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(encoded), dtype="u1")
+
+
+def _name_table(
+    names: Dict[str, int],
+    strings: _Strings,
+    kind: str
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sorted key, target and normalized-name arrays for a name-to-index map."""
+    entries = sorted((name_key(name), target, strings.add(name)) for name, target in names.items())
+    for (key, _, first), (next_key, _, second) in zip(entries, entries[1:]):
+        if key == next_key:
+            raise ValueError(f"{kind} names collide on their lookup key: {first}, {second}")
+    return (
+        np.array([e[0] for e in entries], dtype="<u8"),
+        np.array([e[1] for e in entries], dtype="<u4"),
+        np.array([e[2] for e in entries], dtype="<u4"),
+    )
+
+
+def _register(names: Dict[str, int], name: str, target: int, kind: str, labels: List[str]) -> None:
+    key = normalize(name)
+    if not key:
+        return
+    if names.setdefault(key, target) != target:
+        raise ValueError(
+            f"{kind} name '{name}' refers to both '{labels[names[key]]}' and '{labels[target]}'"
+        )
+
+
+def build_index(source: Dict[str, Any], **metadata: Any) -> bytes:
+    """
+    Compile condition data into the binary index format.
+
+    The layout is the magic bytes, a length-prefixed JSON header describing
+    every section, and the sections themselves: a string table, sorted
+    64-bit name keys for ingredient and condition lookups (canonical names,
+    synonyms and names in every language), the ingredient-to-condition risks
+    as a sparse CSR matrix, and per-condition name lists for listings.
+
+    Args:
+        source: Parsed ``food_conditions.json`` with ``conditions``,
+            ``ingredients`` and optional ``synonyms``
+        **metadata: Extra header fields such as the source checksum
+
+    Returns:
+        The index file contents
+
+    Raises:
+        ValueError: If a risk refers to an unknown condition or one name
+            refers to two ingredients or conditions
+    """
+    strings = _Strings()
+    languages: List[str] = [""]
+
+    conditions = [FoodCondition.model_validate(item) for item in source["conditions"]]
+    columns = {condition.id: j for j, condition in enumerate(conditions)}
+    condition_labels = [condition.id for condition in conditions]
+    condition_names: Dict[str, int] = {}
+    alias_ptr = [0]
+    alias_strings: List[int] = []
+    alias_languages: List[int] = []
+    for j, condition in enumerate(conditions):
+        named = [("", condition.id.replace("_", " ")), ("", condition.name)]
+        named += [("", alias) for alias in condition.aliases]
+        named += [(language, name) for language, names in condition.names.items() for name in names]
+        for language, name in named:
+            _register(condition_names, name, j, "Condition", condition_labels)
+        for language, name in named[2:]:
+            if language not in languages:
+                languages.append(language)
+            alias_strings.append(strings.add(name))
+            alias_languages.append(languages.index(language))
+        alias_ptr.append(len(alias_strings))
+
+    ingredients: Dict[str, Dict[str, Any]] = source["ingredients"]
+    ingredient_labels = list(ingredients)
+    rows = {name: i for i, name in enumerate(ingredient_labels)}
+    ingredient_names: Dict[str, int] = {}
+    risk_ptr = [0]
+    risk_columns: List[int] = []
+    risk_scores: List[float] = []
+    risk_reasons: List[int] = []
+    for name, risks in ingredients.items():
+        _register(ingredient_names, name, rows[name], "Ingredient", ingredient_labels)
+        for condition_id, (score, reason) in sorted(risks.items(), key=lambda item: columns.get(item[0], -1)):
+            if condition_id not in columns:
+                raise ValueError(f"Ingredient '{name}' refers to unknown condition '{condition_id}'")
+            risk_columns.append(columns[condition_id])
+            risk_scores.append(score)
+            risk_reasons.append(strings.add(reason))
+        risk_ptr.append(len(risk_columns))
+
+    for name, by_language in source.get("synonyms", {}).items():
+        if name not in rows:
+            raise ValueError(f"Synonyms given for unknown ingredient '{name}'")
+        for language, synonyms in by_language.items():
+            if language not in languages:
+                languages.append(language)
+            for synonym in synonyms:
+                _register(ingredient_names, synonym, rows[name], "Ingredient", ingredient_labels)
+
+    ingredient_keys, ingredient_targets, ingredient_key_names = _name_table(ingredient_names, strings, "Ingredient")
+    condition_keys, condition_targets, condition_key_names = _name_table(condition_names, strings, "Condition")
+    sections = {
+        "ingredient_names": np.array([strings.add(name) for name in ingredient_labels], dtype="<u4"),
+        "ingredient_keys": ingredient_keys,
+        "ingredient_targets": ingredient_targets,
+        "ingredient_key_names": ingredient_key_names,
+        "condition_ids": np.array([strings.add(c.id) for c in conditions], dtype="<u4"),
+        "condition_names": np.array([strings.add(c.name) for c in conditions], dtype="<u4"),
+        "condition_keys": condition_keys,
+        "condition_targets": condition_targets,
+        "condition_key_names": condition_key_names,
+        "condition_alias_ptr": np.array(alias_ptr, dtype="<u4"),
+        "condition_alias_strings": np.array(alias_strings, dtype="<u4"),
+        "condition_alias_languages": np.array(alias_languages, dtype="u1"),
+        "risk_ptr": np.array(risk_ptr, dtype="<u4"),
+        "risk_columns": np.array(risk_columns, dtype="<u4"),
+        "risk_scores": np.array(risk_scores, dtype="<f4"),
+        "risk_reasons": np.array(risk_reasons, dtype="<u4"),
+    }
+    sections["string_offsets"], sections["string_data"] = strings.arrays()
+
+    layout = {}
+    body = bytearray()
+    for name, array in sections.items():
+        body += bytes(_align(len(body)) - len(body))
+        layout[name] = [len(body), array.dtype.str, len(array)]
+        body += array.tobytes()
+
+    header = json.dumps({
+        **metadata,
+        "conditions": len(conditions),
+        "ingredients": len(ingredient_labels),
+        "ingredient_names": len(ingredient_keys),
+        "condition_names": len(condition_keys),
+        "languages": languages,
+        "sections": layout,
+    }, ensure_ascii=False).encode("utf-8")
+    start = len(MAGIC) + LENGTH.size + len(header)
+    return MAGIC + LENGTH.pack(len(header)) + header + bytes(_align(start) - start) + bytes(body)
+
+
+def source_checksum(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def write_index(path: str, source_path: str) -> int:
+    """
+    Compile a condition data file and write the index atomically.
+
+    Returns:
+        Size of the written index in bytes
+    """
+    with open(source_path, encoding="utf-8") as f:
+        source = json.load(f)
+    data = build_index(source, source_sha256=source_checksum(source_path))
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class FoodIndex:
+    """
+    Memory-mapped ingredient and condition knowledge index.
+
+    Opening an index maps the file and wraps its sections as NumPy views
+    without copying or parsing them, so startup takes milliseconds however
+    many conditions it holds, and worker processes share the pages. Name
+    lookups hash the normalized name and binary-search the sorted key
+    array; the stored name settles the rare 64-bit key collision. Risks
+    are kept as a sparse ingredient-by-condition matrix, so thousands of
+    conditions cost memory only for the ingredient pairs that matter.
+    """
+
+    def __init__(self, buffer: Union[bytes, mmap.mmap], path: Optional[str] = None):
+        if buffer[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a food index: {path or 'buffer'}")
+        self.path = path
+        self._buffer = buffer
+        (header_length,) = LENGTH.unpack_from(buffer, len(MAGIC))
+        start = len(MAGIC) + LENGTH.size
+        self.metadata: Dict[str, Any] = json.loads(buffer[start:start + header_length])
+        base = _align(start + header_length)
+        self._sections: Dict[str, np.ndarray] = {}
+        for name, (offset, dtype, count) in self.metadata["sections"].items():
+            self._sections[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=base + offset)
+        self._string_base = base + self.metadata["sections"]["string_data"][0]
+        self.languages: List[str] = self.metadata["languages"]
+        self.lookups = 0
+
+    @classmethod
+    def open(cls, path: str) -> "FoodIndex":
+        """Map an index file."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    @classmethod
+    def compile(cls, source: Dict[str, Any]) -> "FoodIndex":
+        """Build an index in memory from parsed condition data."""
+        return cls(build_index(source))
+
+    @classmethod
+    def load(cls, path: str, source_path: str) -> "FoodIndex":
+        """
+        Open the index at ``path``, rebuilding it first if it is missing or
+        was compiled from a different version of ``source_path``.
+
+        If the index cannot be written (e.g. a read-only deployment), it is
+        served from memory instead.
+        """
+        checksum = source_checksum(source_path)
+        if os.path.exists(path):
+            index = cls.open(path)
+            if index.metadata.get("source_sha256") == checksum:
+                return index
+            index.close()
+        try:
+            write_index(path, source_path)
+        except OSError:
+            with open(source_path, encoding="utf-8") as f:
+                return cls(build_index(json.load(f), source_sha256=checksum))
+        return cls.open(path)
+
+    @property
+    def condition_count(self) -> int:
+        return self.metadata["conditions"]
+
+    @property
+    def ingredient_count(self) -> int:
+        return self.metadata["ingredients"]
+
+    def string(self, i: int) -> str:
+        offsets = self._sections["string_offsets"]
+        start, end = int(offsets[i]), int(offsets[i + 1])
+        return bytes(self._buffer[self._string_base + start:self._string_base + end]).decode("utf-8")
+
+    def _find(self, table: str, normalized: str) -> Optional[int]:
+        keys = self._sections[f"{table}_keys"]
+        key = np.uint64(name_key(normalized))
+        i = int(np.searchsorted(keys, key))
+        if i < len(keys) and keys[i] == key and self.string(self._sections[f"{table}_key_names"][i]) == normalized:
+            return int(self._sections[f"{table}_targets"][i])
+        return None
+
+    def ingredient(self, normalized: str) -> Optional[int]:
+        """Row of an ingredient by any of its normalized names."""
+        self.lookups += 1
+        return self._find("ingredient", normalized)
+
+    def condition(self, normalized: str) -> Optional[int]:
+        """Column of a condition by any of its normalized names."""
+        return self._find("condition", normalized)
+
+    def ingredient_name(self, row: int) -> str:
+        return self.string(self._sections["ingredient_names"][row])
+
+    def condition_id(self, column: int) -> str:
+        return self.string(self._sections["condition_ids"][column])
+
+    def condition_name(self, column: int) -> str:
+        return self.string(self._sections["condition_names"][column])
+
+    def condition_info(self, column: int) -> FoodCondition:
+        """Condition with its aliases and names per language."""
+        ptr = self._sections["condition_alias_ptr"]
+        aliases: List[str] = []
+        names: Dict[str, List[str]] = {}
+        for k in range(int(ptr[column]), int(ptr[column + 1])):
+            name = self.string(self._sections["condition_alias_strings"][k])
+            language = self.languages[self._sections["condition_alias_languages"][k]]
+            if language:
+                names.setdefault(language, []).append(name)
+            else:
+                aliases.append(name)
+        return FoodCondition(
+            id=self.condition_id(column),
+            name=self.condition_name(column),
+            aliases=aliases,
+            names=names
+        )
+
+    def conditions(self) -> Iterator[FoodCondition]:
+        for column in range(self.condition_count):
+            yield self.condition_info(column)
+
+    def risks(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Nonzero risks of a set of ingredients.
+
+        Returns:
+            Tuple of (position in ``rows``, condition column, score, reason
+            string id), one entry per ingredient-condition pair
+        """
+        ptr = self._sections["risk_ptr"]
+        starts = ptr[rows].astype(np.int64)
+        counts = ptr[rows + 1].astype(np.int64) - starts
+        owners = np.repeat(np.arange(len(rows)), counts)
+        entries = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+        return (
+            owners,
+            self._sections["risk_columns"][entries],
+            self._sections["risk_scores"][entries],
+            self._sections["risk_reasons"][entries],
+        )
+
+    def close(self) -> None:
+        self._sections.clear()
+        if isinstance(self._buffer, mmap.mmap):
+            try:
+                self._buffer.close()
+            except BufferError:
+                # Views handed out earlier still reference the mapping
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size for monitoring."""
+        return {
+            "path": self.path,
+            "mapped": isinstance(self._buffer, mmap.mmap),
+            "conditions": self.condition_count,
+            "ingredients": self.ingredient_count,
+            "ingredient_names": self.metadata["ingredient_names"],
+            "condition_names": self.metadata["condition_names"],
+            "languages": [language for language in self.languages if language],
+            "lookups": self.lookups,
+        }
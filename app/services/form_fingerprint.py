@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.services.image_cache import MultiIndexHash, dhash
+
+# Side length of the ink-profile grid; the layout hash has two bits per band
+LAYOUT_BANDS = 32
+NAMESPACE = "form"
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """Layout and visual hashes of a form page."""
+    layout: int
+    visual: int
+
+
+def layout_hash(image: Image.Image) -> int:
+    """
+    Hash the page structure from its row and column ink profiles.
+
+    The page is reduced to the average darkness of ``LAYOUT_BANDS``
+    horizontal and vertical bands; each bit records whether a band holds
+    more ink than the median band. Ruled lines, boxes and text blocks of a
+    form dominate the profile, while handwriting and small shifts barely
+    change it.
+    """
+    gray = ImageOps.autocontrast(image.convert("L"))
+    rows = list(gray.resize((1, LAYOUT_BANDS), Image.Resampling.BOX).getdata())
+    cols = list(gray.resize((LAYOUT_BANDS, 1), Image.Resampling.BOX).getdata())
+
+    value = 0
+    for profile in (rows, cols):
+        median = sorted(profile)[len(profile) // 2]
+        for darkness in profile:
+            value = (value << 1) | (darkness < median)
+    return value
+
+
+def fingerprint_image(image: Image.Image) -> Fingerprint:
+    image = ImageOps.exif_transpose(image)
+    return Fingerprint(layout=layout_hash(image), visual=dhash(image))
+
+
+def fingerprint(image_bytes: bytes) -> Optional[Fingerprint]:
+    """
+    Fingerprint encoded image bytes.
+
+    Returns:
+        The fingerprint, or None if the bytes are not a decodable image
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return fingerprint_image(image)
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+class FormFingerprintIndex:
+    """
+    Precomputed fingerprints of known form pages.
+
+    Candidates are retrieved by visual hash through multi-index hashing and
+    then confirmed on the layout hash, so a match needs both the look and
+    the structure of the page to agree. Pages are keyed by
+    ``(template_id, page)``; pages that share a visual hash are filed
+    together under it, so neither overwrites the other.
+    """
+
+    def __init__(self, max_distance: int = 6, layout_max_distance: int = 12):
+        self.layout_max_distance = layout_max_distance
+        self._index = MultiIndexHash(max_distance=max_distance, max_entries=1_000_000, ttl=float("inf"))
+        self._entries: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        # Pages sharing a visual hash; the same dict is the item stored in the index
+        self._by_visual: Dict[int, Dict[Tuple[str, int], Dict[str, Any]]] = {}
+        self.matches = 0
+        self.misses = 0
+
+    @classmethod
+    def load(cls, path: str, **options: int) -> "FormFingerprintIndex":
+        index = cls(**options)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for entry in json.load(f):
+                    index.add(
+                        entry["template_id"],
+                        Fingerprint(layout=int(entry["layout"], 16), visual=int(entry["visual"], 16)),
+                        page=entry.get("page", 1)
+                    )
+        return index
+
+    @classmethod
+    def from_settings(cls) -> "FormFingerprintIndex":
+        return cls.load(
+            settings.FORM_FINGERPRINTS_PATH,
+            max_distance=settings.FORM_FINGERPRINT_MAX_DISTANCE,
+            layout_max_distance=settings.FORM_LAYOUT_MAX_DISTANCE,
+        )
+
+    def add(self, template_id: str, print_: Fingerprint, page: int = 1) -> None:
+        """Index a reference page, replacing any earlier fingerprint of the same page."""
+        self.remove(template_id, page)
+        key = (template_id, page)
+        entry = {"template_id": template_id, "page": page, "layout": print_.layout, "visual": print_.visual}
+        self._entries[key] = entry
+        pages = self._by_visual.get(print_.visual)
+        if pages is None:
+            pages = self._by_visual[print_.visual] = {}
+            self._index.add(NAMESPACE, print_.visual, pages)
+        pages[key] = entry
+
+    def remove(self, template_id: str, page: int = 1) -> None:
+        """Drop one reference page; other pages with the same visual hash stay indexed."""
+        key = (template_id, page)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        pages = self._by_visual[entry["visual"]]
+        del pages[key]
+        if not pages:
+            del self._by_visual[entry["visual"]]
+            self._index.remove(NAMESPACE, entry["visual"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(self, print_: Fingerprint) -> Optional[str]:
+        """
+        Find the known template a page belongs to.
+
+        Returns:
+            The template id, or None if no indexed page is close enough
+        """
+        found = self._index.search(NAMESPACE, print_.visual)
+        if found is not None:
+            _, pages = found
+            entry = min(pages.values(), key=lambda entry: (entry["layout"] ^ print_.layout).bit_count())
+            if (entry["layout"] ^ print_.layout).bit_count() <= self.layout_max_distance:
+                self.matches += 1
+                return entry["template_id"]
+        self.misses += 1
+        return None
+
+    async def classify(self, image_bytes: bytes) -> Optional[str]:
+        """Fingerprint an uploaded page off the event loop and match it."""
+        if not len(self):
+            return None
+        print_ = await asyncio.to_thread(fingerprint, image_bytes)
+        return self.match(print_) if print_ is not None else None
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([
+                {
+                    "template_id": entry["template_id"],
+                    "page": entry["page"],
+                    "layout": f"{entry['layout']:016x}",
+                    "visual": f"{entry['visual']:016x}",
+                }
+                for entry in self._entries.values()
+            ], f, indent=2)
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and match counters for monitoring."""
+        return {"pages": len(self), "matches": self.matches, "misses": self.misses}
+
+
+def _reference_pages(path: str) -> List[Image.Image]:
+    if path.lower().endswith(".pdf"):
+        import pypdfium2 as pdfium
+
+        document = pdfium.PdfDocument(path)
+        try:
+            return [page.render(scale=1.0).to_pil() for page in document]
+        finally:
+            document.close()
+    with Image.open(path) as image:
+        image.load()
+        return [image]
+
+
+def main() -> None:
+    """Add reference scans of a known form to the fingerprint index."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("template_id", help="Template id from the form template store")
+    parser.add_argument("files", nargs="+", help="Blank reference scans (images or PDF)")
+    parser.add_argument("--output", default=settings.FORM_FINGERPRINTS_PATH)
+    args = parser.parse_args()
+
+    index = FormFingerprintIndex.load(args.output)
+    for path in args.files:
+        for page, image in enumerate(_reference_pages(path), start=1):
+            index.add(args.template_id, fingerprint_image(image), page=page)
+    index.save(args.output)
+    print(f"{len(index)} reference pages indexed in {args.output}")
+
+
+# Create index instance
+form_fingerprints = FormFingerprintIndex.from_settings()
+
+
+if __name__ == "__main__":
+    main()
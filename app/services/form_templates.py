@@ -0,0 +1,204 @@
+import json
+import re
+from collections import defaultdict
+from typing import Optional, Dict, Any, List, Tuple
+
+from app.core.config import settings
+from app.models.forms import FormAnalysisResponse, FormField, FormTemplate, TemplateField
+
+
+def normalize(value: str) -> str:
+    """Case- and punctuation-insensitive lookup key, so ``I-94`` matches ``i94``."""
+    return re.sub(r"[^0-9a-z]+", "", value.lower())
+
+
+class FormTemplateStore:
+    """
+    In-memory knowledge base of known form templates.
+
+    Templates are loaded once and indexed by id, alias, country, category
+    and language, so every lookup is a dictionary access. Field
+    explanations are precomputed per language in the template data; the
+    analysis built from a template is memoized per language, so repeated
+    requests for a popular form are served without rebuilding it.
+    """
+
+    def __init__(self, templates: List[FormTemplate]):
+        self._by_id: Dict[str, FormTemplate] = {}
+        self._by_alias: Dict[str, FormTemplate] = {}
+        self._by_country: Dict[str, List[FormTemplate]] = defaultdict(list)
+        self._by_category: Dict[str, List[FormTemplate]] = defaultdict(list)
+        self._by_country_category: Dict[Tuple[str, str], List[FormTemplate]] = defaultdict(list)
+        self._languages: Dict[str, Dict[str, str]] = {}
+        self._fields: Dict[Tuple[str, str], TemplateField] = {}
+        self._analyses: Dict[Tuple[str, str], FormAnalysisResponse] = {}
+        self.hits = 0
+        self.misses = 0
+        for template in templates:
+            self.add(template)
+
+    @classmethod
+    def load(cls, path: str) -> "FormTemplateStore":
+        """Load templates from a JSON file holding a list of FormTemplate objects."""
+        with open(path, encoding="utf-8") as f:
+            return cls([FormTemplate.model_validate(item) for item in json.load(f)])
+
+    @classmethod
+    def from_settings(cls) -> "FormTemplateStore":
+        return cls.load(settings.FORM_TEMPLATES_PATH)
+
+    def add(self, template: FormTemplate) -> None:
+        country, category = template.country.upper(), template.category.lower()
+        self._by_id[template.id] = template
+        for alias in [template.id, template.name, *template.aliases]:
+            self._by_alias[normalize(alias)] = template
+        self._by_country[country].append(template)
+        self._by_category[category].append(template)
+        self._by_country_category[(country, category)].append(template)
+        self._languages[template.id] = {
+            language.lower(): language for language in template.field_explanations
+        }
+        for field in template.fields:
+            self._fields[(template.id, normalize(field.field_name))] = field
+            self._fields[(template.id, normalize(field.label))] = field
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def get(self, template_id: str) -> Optional[FormTemplate]:
+        return self._by_id.get(template_id)
+
+    def find(
+        self,
+        country: Optional[str] = None,
+        category: Optional[str] = None
+    ) -> List[FormTemplate]:
+        """Templates for a country and/or category, in load order."""
+        if country and category:
+            return self._by_country_category.get((country.upper(), category.lower()), [])
+        if country:
+            return self._by_country.get(country.upper(), [])
+        if category:
+            return self._by_category.get(category.lower(), [])
+        return list(self._by_id.values())
+
+    def match(self, document_type: Optional[str], country: Optional[str] = None) -> Optional[FormTemplate]:
+        """
+        Identify a known template from a document type hint.
+
+        Args:
+            document_type: Form number, template id or name, e.g. ``I-765``
+            country: Optional country the form must belong to
+
+        Returns:
+            The matching template, or None
+        """
+        if not document_type:
+            return None
+        template = self._by_alias.get(normalize(document_type))
+        if template is None or (country and template.country.upper() != country.upper()):
+            return None
+        return template
+
+    def language(self, template: FormTemplate, language: str) -> Optional[str]:
+        """The template's key for a language, matched case-insensitively."""
+        return self._languages[template.id].get(language.lower())
+
+    def field(self, template: FormTemplate, field_name: str) -> Optional[TemplateField]:
+        """Look up a field by name or printed label."""
+        return self._fields.get((template.id, normalize(field_name)))
+
+    def analysis(self, template: FormTemplate, language: str) -> Optional[FormAnalysisResponse]:
+        """
+        Precomputed field-by-field breakdown of a template.
+
+        Returns:
+            FormAnalysisResponse in the requested language, or None if the
+            template has no explanations in that language
+        """
+        key = self.language(template, language)
+        if key is None:
+            self.misses += 1
+            return None
+
+        cached = self._analyses.get((template.id, key))
+        if cached is None:
+            explanations = template.field_explanations[key]
+            cached = FormAnalysisResponse(
+                form_type=template.id,
+                title=template.name,
+                description=template.descriptions.get(key, template.description),
+                fields=[
+                    FormField(
+                        **field.model_dump(),
+                        explanation=explanations.get(field.field_name, field.label)
+                    )
+                    for field in template.fields
+                ],
+                instructions=template.instructions.get(key, []),
+                required_documents=template.required_documents,
+                estimated_time=template.estimated_time,
+                tips=template.tips.get(key, []),
+                cached=True
+            )
+            self._analyses[(template.id, key)] = cached
+        self.hits += 1
+        return cached
+
+    def explain_field(
+        self,
+        template: FormTemplate,
+        field_name: str,
+        language: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Precomputed explanation of one field of a template.
+
+        Returns:
+            Explanation payload for ``/forms/explain``, or None if the field or
+            language is unknown
+        """
+        field = self.field(template, field_name)
+        key = self.language(template, language)
+        if field is None or key is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return {
+            "field_name": field.field_name,
+            "label": field.label,
+            "explanation": template.field_explanations[key].get(field.field_name, field.label),
+            "example_values": [field.example_value] if field.example_value else [],
+            "common_mistakes": field.validation_rules,
+            "required_documents": template.required_documents,
+            "tips": template.tips.get(key, []),
+            "template_id": template.id,
+        }
+
+    def summary(self, template: FormTemplate, language: Optional[str] = None) -> Dict[str, Any]:
+        """Catalogue entry for ``/forms/templates``, flagging whether ``language`` is precomputed."""
+        return {
+            "id": template.id,
+            "name": template.name,
+            "country": template.country,
+            "category": template.category,
+            "description": template.description,
+            "difficulty": template.difficulty,
+            "estimated_time": template.estimated_time,
+            "languages": list(template.field_explanations),
+            "precomputed": language is not None and self.language(template, language) is not None,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Store size and lookup counters for monitoring."""
+        return {
+            "templates": len(self._by_id),
+            "hits": self.hits,
+            "misses": self.misses,
+            "memoized_analyses": len(self._analyses),
+        }
+
+
+# Create store instance
+form_template_store = FormTemplateStore.from_settings()
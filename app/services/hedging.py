@@ -0,0 +1,156 @@
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Any, Optional, TypeVar
+
+from app.core import metrics
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+def percentile(values, q: float) -> Optional[float]:
+    """Nearest-rank percentile of a collection, or None if it is empty."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(math.ceil(q * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class HedgePolicy:
+    """
+    Hedged requests for tail-latency reduction.
+
+    If a call has not finished within the ``quantile`` of recently observed
+    call latencies, a duplicate is started; the first to succeed wins and
+    the other is cancelled. Hedges are paid for from a credit that grows by
+    ``budget`` per request and is capped at ``burst`` hedges, so over time
+    they never exceed that fraction of traffic. Until ``min_samples``
+    latencies are known the delay is ``min_delay``.
+    """
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        budget: float = 0.05,
+        min_delay: float = 1.0,
+        min_samples: int = 20,
+        burst: float = 5.0,
+        window: int = 1000
+    ):
+        self.quantile = quantile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.burst = burst
+        self._latencies: deque = deque(maxlen=window)
+        self._served: deque = deque(maxlen=window)
+        # Start with one hedge of credit so a cold worker can still hedge
+        self._credit = 1.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    @classmethod
+    def from_settings(cls) -> "HedgePolicy":
+        return cls(
+            quantile=settings.HEDGE_QUANTILE,
+            budget=settings.HEDGE_BUDGET,
+            min_delay=settings.HEDGE_MIN_DELAY,
+            min_samples=settings.HEDGE_MIN_SAMPLES,
+        )
+
+    def delay(self) -> float:
+        """Seconds to wait for the first call before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return self.min_delay
+        return percentile(self._latencies, self.quantile)
+
+    def _take_credit(self) -> bool:
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            return True
+        self.over_budget += 1
+        return False
+
+    async def _timed(self, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # A cancelled loser took at least this long; dropping it would bias
+            # the threshold towards fast calls
+            self._latencies.append(time.perf_counter() - started)
+            raise
+        self._latencies.append(time.perf_counter() - started)
+        return result
+
+    def _start(self, call: Callable[[], Awaitable[T]]) -> asyncio.Future:
+        task = asyncio.ensure_future(self._timed(call))
+        # Retrieve a losing attempt's exception so it is not logged as unhandled
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        return task
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a call, hedging it if it is slower than the current threshold.
+
+        Args:
+            call: Coroutine factory for one attempt; invoked at most twice
+
+        Returns:
+            The result of whichever attempt succeeded first
+        """
+        self.requests += 1
+        self._credit = min(self._credit + self.budget, self.burst)
+        started = time.perf_counter()
+
+        primary = self._start(call)
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.delay())
+            if not done and self._take_credit():
+                self.hedges += 1
+                tasks.add(self._start(call))
+
+            # First success wins; an error only counts once every attempt has failed
+            pending = set(tasks)
+            winner = None
+            while winner is None and pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+
+            if winner is None:
+                return primary.result()
+
+            elapsed = time.perf_counter() - started
+            self._served.append(elapsed)
+            metrics.HEDGED_CALL_LATENCY.observe(elapsed)
+            if len(tasks) > 1:
+                won = winner is not primary
+                if won:
+                    self.hedge_wins += 1
+                metrics.MODEL_HEDGES.inc(outcome="won" if won else "lost")
+            return winner.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hedge rate and served-latency percentiles for monitoring."""
+        p50 = percentile(self._served, 0.5)
+        p99 = percentile(self._served, 0.99)
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "over_budget": self.over_budget,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "delay_ms": round(self.delay() * 1000, 1),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+        }
@@ -0,0 +1,400 @@
+import asyncio
+import base64
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Deque, List, Tuple
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Index,
+    MetaData,
+    String,
+    Table,
+    Text,
+    and_,
+    insert,
+    make_url,
+    or_,
+    select
+)
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.core import metrics
+from app.core.admission import client_key
+from app.core.config import settings
+from app.core.database import async_database_url
+from app.models.translation import TranslationHistory, TranslationResponse
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+BLOCK = "block"
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+metadata = MetaData()
+
+history_table = Table(
+    "translation_history",
+    metadata,
+    Column("id", String(32), primary_key=True),
+    Column("user_id", String(64)),
+    Column("kind", String(16), nullable=False),
+    Column("original_text", Text, nullable=False),
+    Column("translated_text", Text, nullable=False),
+    Column("source_language", String(64), nullable=False),
+    Column("target_language", String(64), nullable=False),
+    Column("context_explanation", Text),
+    Column("image_url", Text),
+    # Naive UTC, so SQLite and PostgreSQL order and compare the same way
+    Column("created_at", DateTime, nullable=False),
+    # Serves the per-user, newest-first keyset pagination of ``query``
+    Index("ix_translation_history_user_created", "user_id", "created_at", "id"),
+    Index("ix_translation_history_created", "created_at"),
+)
+
+
+def history_user(scope) -> Optional[str]:
+    """
+    History owner of a request: the hashed API key, or None for anonymous callers.
+
+    Client IPs are shared and reassigned, so they never own history.
+    """
+    key = client_key(scope)
+    return key if key.startswith("key:") else None
+
+
+def encode_cursor(created_at: datetime, entry_id: str) -> str:
+    """Opaque pagination cursor pointing just past an entry."""
+    raw = f"{created_at.isoformat()}|{entry_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Parse a cursor produced by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, entry_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), entry_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class HistoryRecorder:
+    """
+    Translation history written in bulk by a background task.
+
+    ``record`` only appends to an in-memory ring buffer of ``capacity``
+    entries, so the request path never waits for the database. A flush task,
+    started by the first record, inserts up to ``batch_size`` entries per
+    statement whenever a batch fills or ``flush_interval`` seconds pass,
+    through a pooled async engine created on first use. When the buffer is
+    full, ``overflow`` decides what gives: ``drop_oldest`` evicts the oldest
+    unwritten entry, ``drop_newest`` discards the new one, and ``block``
+    waits up to ``block_timeout`` seconds for the flusher to make room
+    before discarding it. Entries of a failed insert go back to the front
+    of the buffer as far as there is room and are retried at the next flush.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        enabled: bool = True,
+        capacity: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow: str = DROP_OLDEST,
+        block_timeout: float = 0.05,
+        pool_size: int = 5,
+        max_overflow: int = 5,
+        record_anonymous: bool = False
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; use one of {', '.join(OVERFLOW_POLICIES)}")
+        self.database_url = database_url
+        self.enabled = enabled
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.record_anonymous = record_anonymous
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._engine: Optional[AsyncEngine] = None
+        self._schema_ready = False
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._flushing: Optional[asyncio.Lock] = None
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_error: Optional[str] = None
+
+    @classmethod
+    def from_settings(cls) -> "HistoryRecorder":
+        return cls(
+            settings.HISTORY_DATABASE_URL or settings.DATABASE_URL,
+            enabled=settings.HISTORY_ENABLED,
+            capacity=settings.HISTORY_BUFFER_SIZE,
+            batch_size=settings.HISTORY_BATCH_SIZE,
+            flush_interval=settings.HISTORY_FLUSH_INTERVAL,
+            overflow=settings.HISTORY_OVERFLOW,
+            block_timeout=settings.HISTORY_BLOCK_TIMEOUT,
+            pool_size=settings.HISTORY_POOL_SIZE,
+            max_overflow=settings.HISTORY_MAX_OVERFLOW,
+            record_anonymous=settings.HISTORY_RECORD_ANONYMOUS,
+        )
+
+    def _events(self) -> Tuple[asyncio.Event, asyncio.Event, asyncio.Lock]:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+            self._space = asyncio.Event()
+            self._flushing = asyncio.Lock()
+        return self._wakeup, self._space, self._flushing
+
+    def start(self) -> None:
+        """Start the flush task if it is not running."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Write everything still buffered and release the connection pool."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        self._wakeup = self._space = self._flushing = None
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+            self._schema_ready = False
+
+    async def record(
+        self,
+        user_id: Optional[str],
+        kind: str,
+        original_text: str,
+        translated_text: str,
+        source_language: str,
+        target_language: str,
+        context_explanation: Optional[str] = None,
+        image_url: Optional[str] = None
+    ) -> bool:
+        """
+        Queue a history entry for the next bulk insert.
+
+        Returns:
+            True if the entry was buffered, False if it was not kept
+        """
+        if not self.enabled or (user_id is None and not self.record_anonymous):
+            return False
+        wakeup, space, _ = self._events()
+        self.start()
+
+        if len(self._buffer) >= self.capacity:
+            if self.overflow == BLOCK:
+                space.clear()
+                wakeup.set()
+                try:
+                    await asyncio.wait_for(space.wait(), self.block_timeout)
+                except asyncio.TimeoutError:
+                    pass
+            if len(self._buffer) >= self.capacity:
+                if self.overflow != DROP_OLDEST:
+                    self._drop(1)
+                    return False
+                self._buffer.popleft()
+                self._drop(1)
+
+        self._buffer.append({
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "kind": kind,
+            "original_text": original_text,
+            "translated_text": translated_text,
+            "source_language": source_language,
+            "target_language": target_language,
+            "context_explanation": context_explanation,
+            "image_url": image_url,
+            "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+        })
+        self.recorded += 1
+        metrics.HISTORY_ENTRIES.inc(outcome="recorded")
+        if len(self._buffer) >= self.batch_size:
+            wakeup.set()
+        return True
+
+    async def record_translation(self, user_id: Optional[str], kind: str, result: TranslationResponse) -> bool:
+        """Queue a translation result for the history of ``user_id``."""
+        return await self.record(
+            user_id,
+            kind,
+            original_text=result.original_text,
+            translated_text=result.translated_text,
+            source_language=result.source_language,
+            target_language=result.target_language,
+            context_explanation=result.context_explanation
+        )
+
+    def _drop(self, count: int) -> None:
+        self.dropped += count
+        metrics.HISTORY_ENTRIES.inc(count, outcome="dropped")
+
+    async def _flush_loop(self) -> None:
+        wakeup, _, _ = self._events()
+        failed = False
+        while True:
+            # Full batches go out at once, unless the database just failed
+            if failed or len(self._buffer) < self.batch_size:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            wakeup.clear()
+            failures = self.failed_flushes
+            await self.flush()
+            failed = self.failed_flushes != failures
+
+    async def flush(self) -> int:
+        """
+        Insert buffered entries in batches until the buffer is empty.
+
+        Returns:
+            Number of entries written
+        """
+        async with self._events()[2]:
+            return await self._flush()
+
+    async def _flush(self) -> int:
+        written = 0
+        while self._buffer:
+            batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            if self._space is not None:
+                self._space.set()
+            try:
+                await self._insert(batch)
+            except BaseException as e:
+                # Retry later, keeping the oldest entries that still fit
+                room = max(self.capacity - len(self._buffer), 0)
+                self._buffer.extendleft(reversed(batch[:room]))
+                if len(batch) > room:
+                    self._drop(len(batch) - room)
+                if not isinstance(e, Exception):
+                    raise
+                self.failed_flushes += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                break
+            written += len(batch)
+            self.written += len(batch)
+            metrics.HISTORY_ENTRIES.inc(len(batch), outcome="written")
+        return written
+
+    async def _connect(self) -> AsyncEngine:
+        if self._engine is None:
+            url = make_url(async_database_url(self.database_url))
+            options: Dict[str, Any] = {}
+            # In-memory SQLite lives in a single shared connection
+            if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+                options = {"pool_size": self.pool_size, "max_overflow": self.max_overflow, "pool_pre_ping": True}
+            self._engine = create_async_engine(url, **options)
+        if not self._schema_ready:
+            async with self._engine.begin() as conn:
+                await conn.run_sync(metadata.create_all)
+            self._schema_ready = True
+        return self._engine
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        engine = await self._connect()
+        async with engine.begin() as conn:
+            # A list of parameter sets becomes one multi-row insert per batch
+            await conn.execute(insert(history_table), rows)
+
+    async def query(
+        self,
+        user_id: str,
+        kind: Optional[str] = None,
+        target_language: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> Tuple[List[TranslationHistory], Optional[str]]:
+        """
+        Page through a user's history, newest first.
+
+        Buffered entries are written first, so callers see their own
+        latest requests.
+
+        Args:
+            user_id: History owner
+            kind: Only entries of this kind (text, image, form)
+            target_language: Only entries translated into this language
+            cursor: ``next_cursor`` of the previous page
+            limit: Maximum entries per page
+
+        Returns:
+            Tuple of (entries, cursor of the next page or None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions = [history_table.c.user_id == user_id]
+        if kind is not None:
+            conditions.append(history_table.c.kind == kind)
+        if target_language is not None:
+            conditions.append(history_table.c.target_language == target_language)
+        if cursor is not None:
+            created_at, entry_id = decode_cursor(cursor)
+            conditions.append(or_(
+                history_table.c.created_at < created_at,
+                and_(history_table.c.created_at == created_at, history_table.c.id < entry_id)
+            ))
+
+        statement = (
+            select(history_table)
+            .where(*conditions)
+            .order_by(history_table.c.created_at.desc(), history_table.c.id.desc())
+            .limit(limit + 1)
+        )
+        try:
+            # Under the flush lock, so entries written in the background are committed
+            async with self._events()[2]:
+                await self._flush()
+                engine = await self._connect()
+            async with engine.connect() as conn:
+                rows = (await conn.execute(statement)).mappings().all()
+        except Exception as e:
+            raise Exception(f"History query failed: {str(e)}")
+
+        entries = [TranslationHistory.model_validate(dict(row)) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(entries[-1].created_at, entries[-1].id)
+        return entries, next_cursor
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer fill and write outcomes for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "overflow": self.overflow,
+            "buffered": len(self._buffer),
+            "capacity": self.capacity,
+            "flushing": self._task is not None and not self._task.done(),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes,
+            "last_error": self.last_error,
+        }
+
+
+# Create history recorder instance
+translation_history = HistoryRecorder.from_settings()
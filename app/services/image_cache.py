@@ -0,0 +1,249 @@
+import hashlib
+import io
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Set, Tuple
+
+from PIL import Image, UnidentifiedImageError
+
+from app.core.config import settings
+
+HASH_BITS = 64
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Difference hash: compare adjacent pixels of a tiny grayscale thumbnail.
+
+    Args:
+        image: Decoded image
+        hash_size: Hash side length; the hash has ``hash_size ** 2`` bits
+
+    Returns:
+        Hash as an integer
+    """
+    thumbnail = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = list(thumbnail.getdata())
+
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def _dct_matrix(size: int) -> List[List[float]]:
+    """DCT-II basis for a ``size`` point transform."""
+    return [
+        [math.cos(math.pi * (2 * x + 1) * u / (2 * size)) for x in range(size)]
+        for u in range(size)
+    ]
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def phash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    Perceptual hash: threshold the low-frequency DCT coefficients of a 32x32 thumbnail.
+
+    Slower than ``dhash`` but more robust to brightness and contrast changes.
+    """
+    size = 32
+    thumbnail = image.convert("L").resize((size, size), Image.Resampling.LANCZOS)
+    pixels = list(thumbnail.getdata())
+    rows = [pixels[i * size:(i + 1) * size] for i in range(size)]
+
+    # Only the top-left hash_size x hash_size block of the 2D DCT is needed
+    basis = _DCT_32[:hash_size]
+    row_dct = [[sum(b * p for b, p in zip(u, row)) for u in basis] for row in rows]
+    coefficients = [
+        sum(basis[v][y] * row_dct[y][u] for y in range(size))
+        for v in range(hash_size)
+        for u in range(hash_size)
+    ]
+
+    # Exclude the DC term so overall brightness does not dominate the median
+    median = sorted(coefficients[1:])[len(coefficients[1:]) // 2]
+    value = 0
+    for coefficient in coefficients:
+        value = (value << 1) | (coefficient > median)
+    return value
+
+
+HASH_METHODS = {"dhash": dhash, "phash": phash}
+
+
+def perceptual_hash(image_bytes: bytes, method: str = "dhash") -> Optional[int]:
+    """
+    Compute a 64-bit perceptual hash of encoded image bytes.
+
+    Returns:
+        The hash, or None if the bytes are not a decodable image (e.g. a PDF)
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return HASH_METHODS[method](image)
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+class MultiIndexHash:
+    """
+    Multi-index hashing for Hamming-radius search over 64-bit hashes.
+
+    Each hash is split into ``max_distance + 1`` chunks and filed under every
+    chunk value. By the pigeonhole principle any hash within ``max_distance``
+    of a query shares at least one chunk exactly, so a lookup only examines
+    the handful of entries in the query's buckets rather than the whole index.
+    Unlike a BK-tree, entries can be removed cheaply, which makes eviction easy.
+    """
+
+    def __init__(self, max_distance: int, max_entries: int, ttl: float):
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._chunks = self._chunk_spans(max_distance + 1)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], Set[int]] = {}
+
+    @staticmethod
+    def _chunk_spans(count: int) -> List[Tuple[int, int]]:
+        """Split the hash bits into ``count`` (shift, mask) spans of near-equal width."""
+        count = max(1, min(count, HASH_BITS))
+        spans = []
+        start = 0
+        for i in range(count):
+            width = HASH_BITS // count + (1 if i < HASH_BITS % count else 0)
+            spans.append((start, (1 << width) - 1))
+            start += width
+        return spans
+
+    def _bucket_keys(self, namespace: str, value: int) -> List[Tuple[str, int, int]]:
+        return [
+            (namespace, i, (value >> shift) & mask)
+            for i, (shift, mask) in enumerate(self._chunks)
+        ]
+
+    def add(self, namespace: str, value: int, item: Any) -> None:
+        """Store ``item`` under ``value``, evicting the least recently used entries when full."""
+        key = (namespace, value)
+        if key not in self._entries:
+            for bucket_key in self._bucket_keys(namespace, value):
+                self._buckets.setdefault(bucket_key, set()).add(value)
+        self._entries[key] = (time.monotonic() + self.ttl, item)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            oldest, _ = next(iter(self._entries.items()))
+            self.remove(*oldest)
+
+    def remove(self, namespace: str, value: int) -> None:
+        if self._entries.pop((namespace, value), None) is None:
+            return
+        for bucket_key in self._bucket_keys(namespace, value):
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(value)
+                if not bucket:
+                    del self._buckets[bucket_key]
+
+    def search(self, namespace: str, value: int) -> Optional[Tuple[int, Any]]:
+        """
+        Find the closest live entry within ``max_distance`` bits.
+
+        Returns:
+            ``(distance, item)`` of the nearest match, or None
+        """
+        candidates: Set[int] = set()
+        for bucket_key in self._bucket_keys(namespace, value):
+            candidates |= self._buckets.get(bucket_key, set())
+
+        best = None
+        now = time.monotonic()
+        for candidate in candidates:
+            distance = (candidate ^ value).bit_count()
+            if distance > self.max_distance or (best and distance >= best[0]):
+                continue
+            expires_at, item = self._entries[(namespace, candidate)]
+            if expires_at < now:
+                continue
+            best = (distance, candidate, item)
+
+        if best is None:
+            return None
+
+        distance, candidate, item = best
+        self._entries.move_to_end((namespace, candidate))
+        return distance, item
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ImageResultCache:
+    """
+    Near-duplicate cache for vision model results.
+
+    Results are keyed on a perceptual hash of the image plus a namespace
+    derived from the request parameters, so the same photo asked in a
+    different target language is a separate entry.
+    """
+
+    def __init__(self, index: MultiIndexHash, method: str = "dhash"):
+        self.index = index
+        self.method = method
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_settings(cls) -> "ImageResultCache":
+        index = MultiIndexHash(
+            max_distance=settings.IMAGE_CACHE_MAX_DISTANCE,
+            max_entries=settings.IMAGE_CACHE_MAX_ENTRIES,
+            ttl=settings.IMAGE_CACHE_TTL
+        )
+        return cls(index, method=settings.IMAGE_CACHE_HASH_METHOD)
+
+    @staticmethod
+    def namespace(task: str, **params: Optional[str]) -> str:
+        """Build a namespace from the task name and request parameters."""
+        normalized = {k: " ".join((v or "").split()).casefold() for k, v in params.items()}
+        payload = json.dumps([task, normalized], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def hash(self, image_bytes: bytes) -> Optional[int]:
+        return perceptual_hash(image_bytes, self.method)
+
+    def get(self, namespace: str, image_hash: int) -> Optional[Any]:
+        """Return the result for the nearest cached image, or None on a miss."""
+        match = self.index.search(namespace, image_hash)
+        if match is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return match[1]
+
+    def set(self, namespace: str, image_hash: int, result: Any) -> None:
+        self.index.add(namespace, image_hash, result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring."""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.IMAGE_CACHE_ENABLED,
+            "hash_method": self.method,
+            "max_distance": self.index.max_distance,
+            "size": len(self.index),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Create cache instance
+image_cache = ImageResultCache.from_settings()
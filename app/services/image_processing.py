@@ -0,0 +1,127 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+
+MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class ImageProcessingError(ValueError):
+    """Raised when an upload cannot be decoded as an image."""
+
+
+@dataclass
+class ProcessedImage:
+    """Re-encoded image ready to send to a vision model."""
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+    original_size: int
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_size - len(self.data)
+
+
+def preprocess_image(
+    content: bytes,
+    max_edge: int,
+    output_format: str = "JPEG",
+    quality: int = 85
+) -> ProcessedImage:
+    """
+    Normalize an uploaded image for vision model input.
+
+    Applies the EXIF orientation, downscales so the longest edge is at most
+    ``max_edge`` pixels, and re-encodes without metadata. Re-encoding always
+    happens so EXIF data such as GPS location never leaves the server.
+
+    Args:
+        content: Raw uploaded bytes
+        max_edge: Maximum width or height in pixels
+        output_format: Pillow format name, ``JPEG`` or ``WEBP``
+        quality: Encoder quality (1-100)
+
+    Returns:
+        ProcessedImage with the encoded bytes and their MIME type
+    """
+    output_format = output_format.upper()
+    try:
+        with Image.open(io.BytesIO(content)) as source:
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    except (UnidentifiedImageError, OSError) as e:
+        raise ImageProcessingError(f"Could not decode image: {str(e)}")
+
+    if max(image.size) > max_edge:
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+    if output_format == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel; flatten transparency onto white
+        rgba = image.convert("RGBA")
+        image = Image.new("RGB", rgba.size, "white")
+        image.paste(rgba, mask=rgba.getchannel("A"))
+    elif image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    buffer = io.BytesIO()
+    save_options = {"quality": quality}
+    if output_format == "JPEG":
+        save_options.update(optimize=True, progressive=True)
+    else:
+        save_options.update(method=4)
+    image.save(buffer, format=output_format, **save_options)
+
+    return ProcessedImage(
+        data=buffer.getvalue(),
+        mime_type=MIME_TYPES[output_format],
+        width=image.width,
+        height=image.height,
+        original_size=len(content)
+    )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PROCESSING_WORKERS,
+            thread_name_prefix="image-processing"
+        )
+    return _executor
+
+
+async def prepare_image(content: bytes, max_edge: Optional[int] = None) -> ProcessedImage:
+    """
+    Preprocess an upload in the image thread pool so Pillow work never blocks the event loop.
+
+    Args:
+        content: Raw uploaded bytes
+        max_edge: Longest edge override, defaults to ``IMAGE_MAX_EDGE``
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(),
+        preprocess_image,
+        content,
+        max_edge or settings.IMAGE_MAX_EDGE,
+        settings.IMAGE_OUTPUT_FORMAT,
+        settings.IMAGE_OUTPUT_QUALITY
+    )
+
+
+def shutdown_executor() -> None:
+    """Stop the image thread pool on application shutdown."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
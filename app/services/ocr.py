@@ -0,0 +1,193 @@
+import asyncio
+import io
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core import metrics
+from app.core.config import settings
+
+
+@dataclass
+class OcrWord:
+    """One recognized word with its confidence (0-100) and bounding box."""
+    text: str
+    confidence: float
+    box: Tuple[int, int, int, int]
+    line: Tuple[int, int, int] = (0, 0, 0)
+
+
+@dataclass
+class OcrResult:
+    """Text read from an image, line by line."""
+    words: List[OcrWord] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        lines: Dict[Tuple[int, int, int], List[str]] = {}
+        for word in self.words:
+            lines.setdefault(word.line, []).append(word.text)
+        return "\n".join(" ".join(words) for words in lines.values())
+
+    @property
+    def confidence(self) -> float:
+        """Mean word confidence weighted by word length."""
+        chars = sum(len(word.text) for word in self.words)
+        if not chars:
+            return 0.0
+        return sum(word.confidence * len(word.text) for word in self.words) / chars
+
+    def detected_objects(self) -> List[Dict[str, Any]]:
+        """Word boxes in the shape returned in ``TranslationResponse.detected_objects``."""
+        return [
+            {
+                "type": "text",
+                "text": word.text,
+                "confidence": round(word.confidence / 100, 3),
+                "box": dict(zip(("x", "y", "width", "height"), word.box)),
+            }
+            for word in self.words
+        ]
+
+
+class TesseractEngine:
+    """Word-level OCR with Tesseract through the optional pytesseract bindings."""
+
+    def __init__(self, languages: str = "eng"):
+        import pytesseract
+
+        self.pytesseract = pytesseract
+        self.languages = languages
+
+    def recognize(self, image: Image.Image) -> OcrResult:
+        data = self.pytesseract.image_to_data(
+            image, lang=self.languages, output_type=self.pytesseract.Output.DICT
+        )
+        words = []
+        for i, text in enumerate(data["text"]):
+            confidence = float(data["conf"][i])
+            # Rows for blocks, paragraphs and lines carry a confidence of -1
+            if confidence < 0 or not text.strip():
+                continue
+            words.append(OcrWord(
+                text=text.strip(),
+                confidence=confidence,
+                box=(data["left"][i], data["top"][i], data["width"][i], data["height"][i]),
+                line=(data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            ))
+        return OcrResult(words)
+
+
+class OcrStage:
+    """
+    Local OCR in front of the vision model.
+
+    Images whose text Tesseract reads with at least ``min_confidence`` are
+    translated through the text model; everything else goes to the vision
+    model. Tesseract is optional: if pytesseract or the tesseract binary is
+    missing the stage switches itself off and every image goes to vision.
+
+    Latency saved is estimated per OCR-routed request as the running average
+    vision-path latency minus the OCR-plus-text latency actually spent.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        min_confidence: float = 80.0,
+        min_chars: int = 2,
+        languages: str = "eng",
+        engine: Any = None,
+        alpha: float = 0.2
+    ):
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        self.min_chars = min_chars
+        self.languages = languages
+        self.alpha = alpha
+        self._engine = engine
+        self.unavailable: Optional[str] = None
+        self.text_routes = 0
+        self.vision_routes = 0
+        self.vision_latency: Optional[float] = None
+        self.latency_saved = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "OcrStage":
+        return cls(
+            enabled=settings.OCR_ENABLED,
+            min_confidence=settings.OCR_MIN_CONFIDENCE,
+            min_chars=settings.OCR_MIN_CHARS,
+            languages=settings.OCR_LANGUAGES,
+        )
+
+    @property
+    def active(self) -> bool:
+        return self.enabled and self.unavailable is None
+
+    def _recognize(self, image_bytes: bytes) -> Optional[OcrResult]:
+        if self._engine is None:
+            self._engine = TesseractEngine(self.languages)
+        try:
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                gray = ImageOps.exif_transpose(image).convert("L")
+        except (UnidentifiedImageError, OSError):
+            return None
+        return self._engine.recognize(gray)
+
+    async def read(self, image_bytes: bytes) -> Optional[OcrResult]:
+        """
+        OCR an image and decide whether the text path can handle it.
+
+        Returns:
+            The OCR result if it is confident enough to skip the vision model,
+            otherwise None
+        """
+        if not self.active:
+            return None
+        try:
+            with metrics.stage("ocr"):
+                result = await asyncio.to_thread(self._recognize, image_bytes)
+        except (ImportError, OSError) as e:
+            # Missing bindings or tesseract binary: stop trying and serve through vision
+            self.unavailable = f"{type(e).__name__}: {e}"
+            return None
+        except Exception:
+            return None
+
+        if result is None or len(result.text.strip()) < self.min_chars or result.confidence < self.min_confidence:
+            return None
+        return result
+
+    def record_text_route(self, elapsed: float) -> None:
+        """Count a request answered through OCR and the text model."""
+        self.text_routes += 1
+        metrics.OCR_ROUTES.inc(path="text")
+        if self.vision_latency is not None:
+            saved = max(self.vision_latency - elapsed, 0.0)
+            self.latency_saved += saved
+            metrics.OCR_LATENCY_SAVED.inc(saved)
+
+    def record_vision_route(self, elapsed: float) -> None:
+        """Count a request answered by the vision model, updating its latency average."""
+        self.vision_routes += 1
+        metrics.OCR_ROUTES.inc(path="vision")
+        if self.vision_latency is None:
+            self.vision_latency = elapsed
+        else:
+            self.vision_latency = (1 - self.alpha) * self.vision_latency + self.alpha * elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        """Routing ratio and latency saved for monitoring."""
+        total = self.text_routes + self.vision_routes
+        return {
+            "enabled": self.enabled,
+            "unavailable": self.unavailable,
+            "text_routes": self.text_routes,
+            "vision_routes": self.vision_routes,
+            "text_route_ratio": round(self.text_routes / total, 4) if total else 0.0,
+            "vision_latency_ms": round(self.vision_latency * 1000, 1) if self.vision_latency is not None else None,
+            "latency_saved_s": round(self.latency_saved, 3),
+        }
+
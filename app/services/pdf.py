@@ -0,0 +1,99 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pypdfium2 as pdfium
+
+from app.core.config import settings
+from app.services.image_processing import MIME_TYPES, ProcessedImage
+
+# Points per inch in PDF user space
+PDF_DPI = 72
+
+# pdfium is not thread-safe, so every call goes through one dedicated thread
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+class PdfError(ValueError):
+    """Raised when a PDF cannot be opened or rendered."""
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdfium")
+    return _executor
+
+
+class PdfRasterizer:
+    """
+    Render PDF pages to images one at a time.
+
+    Pages are rendered on demand, so only the pages currently being analyzed
+    are held in memory regardless of the document length.
+    """
+
+    def __init__(self, content: bytes, max_edge: int, max_dpi: int = 200):
+        self.content = content
+        self.max_edge = max_edge
+        self.max_dpi = max_dpi
+        self._document: Optional[pdfium.PdfDocument] = None
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+
+    def _open(self) -> int:
+        try:
+            self._document = pdfium.PdfDocument(self.content)
+        except pdfium.PdfiumError as e:
+            raise PdfError(f"Could not open PDF: {str(e)}")
+        return len(self._document)
+
+    def _render(self, index: int) -> ProcessedImage:
+        page = self._document[index]
+        try:
+            width, height = page.get_size()
+            # Fit the longest edge to max_edge without exceeding max_dpi
+            scale = min(self.max_edge / max(width, height), self.max_dpi / PDF_DPI)
+            bitmap = page.render(scale=scale)
+            image = bitmap.to_pil().convert("RGB")
+            bitmap.close()
+        finally:
+            page.close()
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=settings.IMAGE_OUTPUT_QUALITY, optimize=True)
+        data = buffer.getvalue()
+        return ProcessedImage(
+            data=data,
+            mime_type=MIME_TYPES["JPEG"],
+            width=image.width,
+            height=image.height,
+            original_size=len(data)
+        )
+
+    def _close(self) -> None:
+        if self._document is not None:
+            self._document.close()
+            self._document = None
+
+    async def open(self) -> int:
+        """Open the document and return its page count."""
+        return await self._run(self._open)
+
+    async def render(self, index: int) -> ProcessedImage:
+        """Render a single zero-based page as a JPEG."""
+        return await self._run(self._render, index)
+
+    async def close(self) -> None:
+        await self._run(self._close)
+
+
+def shutdown_executor() -> None:
+    """Stop the pdfium thread on application shutdown."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from typing import Optional, Dict, Any, Iterable
+
+from app.core.config import settings
+from app.models.translation import TranslationResponse
+
+MAGIC = b"PHRPACK1"
+# Entry table row: 64-bit phrase key, record offset and record length
+ENTRY = struct.Struct("<QII")
+LENGTH = struct.Struct("<I")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def phrase_key(text: str, target_language: str) -> int:
+    """64-bit lookup key of a phrase, insensitive to case and whitespace."""
+    payload = json.dumps([_normalize(text), _normalize(target_language)], ensure_ascii=False)
+    return int.from_bytes(hashlib.sha256(payload.encode("utf-8")).digest()[:8], "little")
+
+
+def write_pack(path: str, records: Iterable[Dict[str, Any]], **metadata: Any) -> int:
+    """
+    Write a phrase pack file.
+
+    The layout is the magic bytes, a length-prefixed JSON header, an entry
+    count, the fixed-width entry table sorted by phrase key, and finally the
+    JSON records the entries point into. The file is replaced atomically, so
+    a running server never sees a half-written pack.
+
+    Args:
+        path: Output file
+        records: Serialized TranslationResponse objects
+        **metadata: Header fields such as the model and source language
+
+    Returns:
+        Number of phrases written
+    """
+    entries = {}
+    for record in records:
+        key = phrase_key(record["original_text"], record["target_language"])
+        entries[key] = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    header = json.dumps(metadata, ensure_ascii=False).encode("utf-8")
+    table_start = len(MAGIC) + LENGTH.size + len(header) + LENGTH.size
+    offset = table_start + ENTRY.size * len(entries)
+
+    table = bytearray()
+    blob = bytearray()
+    for key in sorted(entries):
+        data = entries[key]
+        table += ENTRY.pack(key, offset + len(blob), len(data))
+        blob += data
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + LENGTH.pack(len(header)) + header + LENGTH.pack(len(entries)))
+        f.write(table)
+        f.write(blob)
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+class PhrasePack:
+    """
+    Memory-mapped precomputed translations of common phrases.
+
+    Lookups binary-search the sorted entry table in place and decode only the
+    matching record, so opening a pack costs nothing beyond the mapping and
+    every worker process shares the same pages. Phrases are looked up only
+    for requests without context whose source language, if given, matches
+    the language the pack was built from.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.metadata: Dict[str, Any] = {}
+        self.hits = 0
+        self.misses = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._count = 0
+        self._table_start = 0
+        if path and os.path.exists(path):
+            self._open(path)
+
+    @classmethod
+    def from_settings(cls) -> "PhrasePack":
+        return cls(settings.PHRASE_PACK_PATH if settings.PHRASE_PACK_ENABLED else None)
+
+    def _open(self, path: str) -> None:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if data[:len(MAGIC)] != MAGIC:
+            data.close()
+            raise ValueError(f"Not a phrase pack: {path}")
+
+        position = len(MAGIC)
+        (header_length,) = LENGTH.unpack_from(data, position)
+        position += LENGTH.size
+        self.metadata = json.loads(data[position:position + header_length])
+        position += header_length
+        (self._count,) = LENGTH.unpack_from(data, position)
+        self._table_start = position + LENGTH.size
+        self._mmap = data
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _find(self, key: int) -> Optional[bytes]:
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry_key, offset, length = ENTRY.unpack_from(self._mmap, self._table_start + middle * ENTRY.size)
+            if entry_key == key:
+                return self._mmap[offset:offset + length]
+            if entry_key < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get(
+        self,
+        text: str,
+        target_language: str,
+        source_language: Optional[str] = None,
+        context: Optional[str] = None
+    ) -> Optional[TranslationResponse]:
+        """
+        Look up a precomputed translation.
+
+        Returns:
+            The translation marked as cached, or None if the phrase is not in
+            the pack or the request has context the pack was not built for
+        """
+        if not self._count:
+            return None
+        pack_source = self.metadata.get("source_language")
+        if (context and context.strip()) or (
+            source_language and pack_source and _normalize(source_language) != _normalize(pack_source)
+        ):
+            return None
+
+        data = self._find(phrase_key(text, target_language))
+        if data is not None:
+            record = json.loads(data)
+            # A 64-bit key can collide; the stored phrase settles it
+            if _normalize(record["original_text"]) == _normalize(text):
+                self.hits += 1
+                return TranslationResponse(**{**record, "original_text": text, "cached": True})
+        self.misses += 1
+        return None
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._count = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Pack size and lookup counters for monitoring."""
+        return {
+            "phrases": self._count,
+            "languages": len(self.metadata.get("languages", [])),
+            "model": self.metadata.get("model"),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Create pack instance
+phrase_pack = PhrasePack.from_settings()
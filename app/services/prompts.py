@@ -0,0 +1,243 @@
+import math
+import re
+import string
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Type
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+from app.services.structured_output import schema_instruction
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+TRUNCATION_MARK = "…"
+
+
+def _piece_tokens(piece: str) -> int:
+    return math.ceil(len(piece.encode("utf-8")) / 4)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without the model's tokenizer.
+
+    Subword tokenizers spend roughly one token per four bytes of UTF-8 and at
+    least one per word or punctuation mark, so counting per piece keeps rare
+    words and non-Latin scripts from being undercounted.
+    """
+    return sum(_piece_tokens(piece) for piece in TOKEN_PATTERN.findall(text))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Cut a text to at most ``budget`` estimated tokens, marking the cut."""
+    if estimate_tokens(text) <= budget:
+        return text
+    used = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += _piece_tokens(match.group())
+        # Leave room for the truncation mark
+        if used > budget - 1:
+            return text[:match.start()].rstrip() + TRUNCATION_MARK
+    return text
+
+
+@dataclass
+class Prompt:
+    """Rendered chat messages with their estimated size."""
+    task: str
+    messages: List[Dict[str, Any]]
+    tokens: int
+    prefix_tokens: int
+    truncated: List[str]
+
+
+class PromptTemplate:
+    """
+    A chat prompt compiled once at startup.
+
+    Every static instruction lives in the system message, which is built once
+    and is byte-identical across requests, so providers with prompt caching
+    can reuse it as a prefix. Per-request values only appear in the user
+    message after it, each cut to its token budget so that user-supplied
+    text such as ``context`` cannot inflate the prompt.
+    """
+
+    def __init__(
+        self,
+        task: str,
+        system: str,
+        user: str,
+        budgets: Dict[str, Optional[int]],
+        defaults: Optional[Dict[str, str]] = None
+    ):
+        self.task = task
+        self.system = system
+        self.user = user
+        self.budgets = budgets
+        self.defaults = defaults or {}
+        self.fields = [name for _, name, _, _ in string.Formatter().parse(user) if name]
+        missing = set(self.fields) - set(budgets)
+        if missing:
+            raise ValueError(f"No token budget for prompt fields: {', '.join(sorted(missing))}")
+        self.system_message = {"role": "system", "content": system}
+        self.prefix_tokens = estimate_tokens(system)
+
+    def structured(self, output: Type[BaseModel]) -> "PromptTemplate":
+        """Variant whose prefix also summarizes the JSON schema of ``output``."""
+        return PromptTemplate(
+            self.task,
+            f"{self.system}\n\n{schema_instruction(output)}",
+            self.user,
+            self.budgets,
+            self.defaults
+        )
+
+    def render(self, image_url: Optional[str] = None, **values: Optional[str]) -> Prompt:
+        """
+        Fill in the per-request fields.
+
+        Args:
+            image_url: Optional image data URL attached after the text
+            **values: Field values; missing or empty fields use their default
+
+        Returns:
+            Prompt with the chat messages and their estimated token count
+        """
+        fields = {}
+        truncated = []
+        for name in self.fields:
+            value = str(values.get(name) or self.defaults.get(name, ""))
+            budget = self.budgets[name]
+            if budget is not None:
+                cut = truncate_tokens(value, budget)
+                if cut != value:
+                    truncated.append(name)
+                    value = cut
+            fields[name] = value
+
+        text = self.user.format(**fields)
+        content: Any = text
+        if image_url is not None:
+            content = [
+                {"type": "text", "text": text},
+                {"type": "image_url", "image_url": {"url": image_url}}
+            ]
+        return Prompt(
+            task=self.task,
+            messages=[self.system_message, {"role": "user", "content": content}],
+            tokens=self.prefix_tokens + estimate_tokens(text),
+            prefix_tokens=self.prefix_tokens,
+            truncated=truncated
+        )
+
+
+FIELD_BUDGET = settings.PROMPT_FIELD_MAX_TOKENS
+
+IMAGE_TRANSLATION = PromptTemplate(
+    task="translate_image",
+    system=(
+        "You are a multilingual translation assistant specialized in helping refugees and immigrants. "
+        "Analyze the image, detect any text, and provide accurate translations with cultural context. "
+        "Always include explanations about what the text means in the target culture. "
+        "Focus on practical, helpful information that assists with daily life navigation.\n"
+        "Provide: 1) Original detected text 2) Translation 3) Cultural context "
+        "4) What this means for daily life 5) Any important tips or warnings"
+    ),
+    user=(
+        "Translate any text in this image to {target_language}.\n"
+        "Source language: {source_language}\n"
+        "Context: {context}"
+    ),
+    budgets={
+        "target_language": FIELD_BUDGET,
+        "source_language": FIELD_BUDGET,
+        "context": settings.PROMPT_CONTEXT_MAX_TOKENS,
+    },
+    defaults={"source_language": "auto-detect", "context": "general"}
+)
+
+TEXT_TRANSLATION = PromptTemplate(
+    task="translate_text",
+    system=(
+        "You are a cultural translation assistant for refugees and immigrants. "
+        "Provide accurate translations with cultural context and practical explanations. "
+        "Help users understand not just what words mean, but how to use them appropriately.\n"
+        "Provide: 1) Translation 2) Cultural context 3) Usage tips"
+    ),
+    user=(
+        "Translate to {target_language}.\n"
+        "Source language: {source_language}\n"
+        "Context: {context}\n"
+        "Text: '{text}'"
+    ),
+    budgets={
+        "target_language": FIELD_BUDGET,
+        "source_language": FIELD_BUDGET,
+        "context": settings.PROMPT_CONTEXT_MAX_TOKENS,
+        "text": settings.PROMPT_TEXT_MAX_TOKENS,
+    },
+    defaults={"source_language": "auto-detect", "context": "general"}
+)
+
+PACKED_TRANSLATION = PromptTemplate(
+    task="translate_batch",
+    system=(
+        "You are a cultural translation assistant for refugees and immigrants. "
+        "Provide accurate translations with short cultural context notes.\n"
+        "Translate each text in the given JSON array. Respond with only a JSON array containing "
+        'one object per text, in the same order, with keys "translation" and "cultural_context".'
+    ),
+    user=(
+        "Target language: {target_language}\n"
+        "Source language: {source_language}\n"
+        "Context: {context}\n"
+        "Texts: {texts}"
+    ),
+    budgets={
+        "target_language": FIELD_BUDGET,
+        "source_language": FIELD_BUDGET,
+        "context": settings.PROMPT_CONTEXT_MAX_TOKENS,
+        # Packed texts are bounded by BATCH_PACK_MAX_CHARS and must stay valid JSON
+        "texts": None,
+    },
+    defaults={"source_language": "auto-detect", "context": "general"}
+)
+
+FORM_ANALYSIS = PromptTemplate(
+    task="analyze_form",
+    system=(
+        "You are a form analysis assistant for refugees and immigrants. "
+        "Analyze forms and provide clear, step-by-step explanations in the user's language. "
+        "Focus on practical guidance that helps people fill out forms correctly. "
+        "Be sensitive to cultural differences and varying levels of bureaucratic familiarity.\n"
+        "Provide detailed field-by-field explanations, required documents, and completion tips."
+    ),
+    user=(
+        "Explain this form in {target_language}.\n"
+        "Document type: {document_type}\n"
+        "Country context: {country}"
+    ),
+    budgets={
+        "target_language": FIELD_BUDGET,
+        "document_type": FIELD_BUDGET,
+        "country": FIELD_BUDGET,
+    },
+    defaults={"document_type": "unknown", "country": "general"}
+)
+
+FOOD_IDENTIFICATION = PromptTemplate(
+    task="identify_food",
+    system=(
+        "You are a nutrition assistant that identifies food in images for people with "
+        "allergies and health conditions. Name the dish and list its ingredients, including "
+        "typical hidden ones such as flour in batter, butter in pastry or sugar in sauces.\n"
+        "Use short, common English ingredient names (e.g. 'wheat flour', 'milk', 'peanut'). "
+        "Give each ingredient a confidence from 0 to 1 that the dish contains it."
+    ),
+    user=(
+        "Identify the dish in this image and list its ingredients.\n"
+        "Context: {context}"
+    ),
+    budgets={"context": settings.PROMPT_CONTEXT_MAX_TOKENS},
+    defaults={"context": "general"}
+)
@@ -0,0 +1,193 @@
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable, List
+
+import openai
+
+from app.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# 4xx statuses that signal throttling or a transient conflict, not a bad request
+TRANSIENT_CLIENT_STATUSES = (408, 409, 429)
+
+
+class ModelUnavailableError(Exception):
+    """Raised when every target in a pool has an open circuit breaker."""
+
+
+def is_client_error(error: BaseException) -> bool:
+    """
+    Whether a model call was rejected because of the request itself.
+
+    A 4xx response, e.g. for a corrupt image or an oversized prompt, fails
+    the same way on every target, so it must neither count against the
+    target nor trigger a fallback. Timeouts, connection errors, throttling
+    and 5xx responses are upstream failures.
+    """
+    return (
+        isinstance(error, openai.APIStatusError)
+        and 400 <= error.status_code < 500
+        and error.status_code not in TRANSIENT_CLIENT_STATUSES
+    )
+
+
+@dataclass
+class ModelTarget:
+    """A model served from one OpenAI-compatible endpoint, with its health estimates."""
+    model: str
+    base_url: str
+    latency: Optional[float] = None
+    error_rate: float = 0.0
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None
+    probing: bool = False
+    calls: int = 0
+    failures: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.model}@{self.base_url}"
+
+
+def parse_targets(entries: List[str], default_base_url: str) -> List[ModelTarget]:
+    """
+    Parse pool entries of the form ``model`` or ``model@base_url``.
+
+    Args:
+        entries: Pool entries in priority order
+        default_base_url: Endpoint for entries without an explicit base URL
+
+    Returns:
+        One ModelTarget per distinct entry
+    """
+    targets = []
+    seen = set()
+    for entry in entries:
+        model, _, base_url = entry.partition("@")
+        target = ModelTarget(model=model.strip(), base_url=(base_url.strip() or default_base_url).rstrip("/"))
+        if target.name not in seen:
+            seen.add(target.name)
+            targets.append(target)
+    return targets
+
+
+class ModelRouter:
+    """
+    Latency-aware routing over an ordered pool of model targets.
+
+    Each target keeps an EWMA of call latency and error rate. Calls go to the
+    healthy target with the lowest expected latency (latency inflated by the
+    error rate); targets that have not been called yet are tried first so
+    every target gets a measurement, and ties keep pool order.
+
+    A target's circuit opens after ``failure_threshold`` consecutive failures
+    and it receives no traffic for ``cooldown`` seconds. It is then half-open:
+    a single probe call is let through, closing the circuit on success and
+    re-opening it on failure.
+    """
+
+    def __init__(
+        self,
+        targets: List[ModelTarget],
+        alpha: float = 0.3,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if not targets:
+            raise ValueError("A model router needs at least one target")
+        self.targets = targets
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+
+    @classmethod
+    def from_settings(cls, primary: str, fallbacks: List[str]) -> "ModelRouter":
+        """Build a router for a primary model and its configured fallbacks."""
+        return cls(
+            parse_targets([primary, *fallbacks], settings.OPENROUTER_BASE_URL),
+            alpha=settings.ROUTER_EWMA_ALPHA,
+            failure_threshold=settings.ROUTER_FAILURE_THRESHOLD,
+            cooldown=settings.ROUTER_COOLDOWN,
+        )
+
+    def state(self, target: ModelTarget) -> str:
+        if target.opened_at is None:
+            return CLOSED
+        if self.clock() - target.opened_at < self.cooldown:
+            return OPEN
+        return HALF_OPEN
+
+    def _score(self, target: ModelTarget) -> float:
+        if target.latency is None:
+            return 0.0
+        return target.latency / max(1.0 - target.error_rate, 0.1)
+
+    def candidates(self) -> List[ModelTarget]:
+        """Targets that may receive traffic, best first."""
+        available = [
+            (index, target) for index, target in enumerate(self.targets)
+            if self.state(target) != OPEN
+        ]
+        # A target whose last call failed goes behind every target whose last call succeeded
+        available.sort(key=lambda item: (item[1].consecutive_failures > 0, self._score(item[1]), item[0]))
+        return [target for _, target in available]
+
+    def acquire(self, target: ModelTarget) -> bool:
+        """
+        Claim a target for one call.
+
+        Returns:
+            False if the target is half-open and its probe is already in flight
+        """
+        state = self.state(target)
+        if state == OPEN or (state == HALF_OPEN and target.probing):
+            return False
+        if state == HALF_OPEN:
+            target.probing = True
+        return True
+
+    def release(self, target: ModelTarget) -> None:
+        """Give up a claimed call without recording an outcome, e.g. on cancellation."""
+        target.probing = False
+
+    def _ewma(self, current: Optional[float], value: float) -> float:
+        if current is None:
+            return value
+        return (1 - self.alpha) * current + self.alpha * value
+
+    def record_success(self, target: ModelTarget, latency: float) -> None:
+        target.calls += 1
+        target.latency = self._ewma(target.latency, latency)
+        target.error_rate = self._ewma(target.error_rate, 0.0)
+        target.consecutive_failures = 0
+        target.opened_at = None
+        target.probing = False
+
+    def record_failure(self, target: ModelTarget) -> None:
+        target.calls += 1
+        target.failures += 1
+        target.error_rate = self._ewma(target.error_rate, 1.0)
+        target.consecutive_failures += 1
+        if target.probing or target.consecutive_failures >= self.failure_threshold:
+            target.opened_at = self.clock()
+        target.probing = False
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-target health estimates for monitoring."""
+        return [
+            {
+                "model": target.model,
+                "base_url": target.base_url,
+                "state": self.state(target),
+                "latency_ms": round(target.latency * 1000, 1) if target.latency is not None else None,
+                "error_rate": round(target.error_rate, 4),
+                "calls": target.calls,
+                "failures": target.failures,
+            }
+            for target in self.targets
+        ]
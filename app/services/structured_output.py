@@ -0,0 +1,155 @@
+import json
+import time
+from typing import Optional, Dict, Any, Iterable, Type
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from app.core import metrics
+
+
+class StructuredOutputError(ValueError):
+    """Raised when the model reply cannot be validated even after a repair retry."""
+
+
+def output_model(model: Type[BaseModel], exclude: Iterable[str]) -> Type[BaseModel]:
+    """
+    Derive the model-facing output schema from an API response model.
+
+    Fields the server fills in itself (e.g. the requested target language or
+    the cache flag) are dropped so the model is never asked to produce them.
+
+    Args:
+        model: API response model
+        exclude: Field names the model should not generate
+
+    Returns:
+        A new Pydantic model with the remaining fields
+    """
+    excluded = set(exclude)
+    fields = {
+        name: (field.annotation, field)
+        for name, field in model.model_fields.items()
+        if name not in excluded
+    }
+    return create_model(f"{model.__name__}Output", **fields)
+
+
+def response_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Build an OpenAI-compatible ``json_schema`` response format for a model."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "schema": model.model_json_schema(),
+            "strict": False,
+        },
+    }
+
+
+def schema_instruction(model: Type[BaseModel]) -> str:
+    """
+    Compact prompt instruction for providers that ignore ``response_format``.
+
+    Lists each field with its description instead of embedding the full JSON
+    schema, which keeps the prompt short.
+    """
+    lines = ["Respond only with a JSON object with these fields:"]
+    for name, field in model.model_fields.items():
+        required = "required" if field.is_required() else "optional"
+        lines.append(f"- {name} ({required}): {field.description}")
+    return "\n".join(lines)
+
+
+def extract_json(content: str) -> str:
+    """Strip Markdown code fences and surrounding prose from a JSON reply."""
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end < start:
+        return content
+    return content[start:end + 1]
+
+
+class StructuredOutputStats:
+    """Per-task counters for structured output parsing cost."""
+
+    def __init__(self):
+        self._tasks: Dict[str, Dict[str, float]] = {}
+
+    def _task(self, task: str) -> Dict[str, float]:
+        return self._tasks.setdefault(task, {
+            "calls": 0,
+            "repairs": 0,
+            "failures": 0,
+            "parse_seconds": 0.0,
+        })
+
+    def parse(self, task: str, model: Type[BaseModel], content: str) -> Optional[BaseModel]:
+        """
+        Validate a reply in one pass, recording how long it took.
+
+        Returns:
+            The validated object, or None if the reply does not match the schema
+        """
+        stats = self._task(task)
+        started = time.perf_counter()
+        try:
+            with metrics.stage("parse"):
+                return model.model_validate_json(extract_json(content))
+        except ValidationError:
+            return None
+        finally:
+            stats["parse_seconds"] += time.perf_counter() - started
+
+    def record_call(self, task: str) -> None:
+        self._task(task)["calls"] += 1
+
+    def record_repair(self, task: str) -> None:
+        self._task(task)["repairs"] += 1
+
+    def record_failure(self, task: str) -> None:
+        self._task(task)["failures"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-task call counts, retry rate and mean parse time."""
+        report = {}
+        for task, stats in self._tasks.items():
+            calls = stats["calls"]
+            report[task] = {
+                "calls": int(calls),
+                "repairs": int(stats["repairs"]),
+                "failures": int(stats["failures"]),
+                "retry_rate": round(stats["repairs"] / calls, 4) if calls else 0.0,
+                "mean_parse_ms": round(stats["parse_seconds"] * 1000 / calls, 3) if calls else 0.0,
+            }
+        return report
+
+
+def validation_feedback(model: Type[BaseModel], content: str) -> str:
+    """Describe why a reply failed validation, for the repair prompt."""
+    try:
+        model.model_validate_json(extract_json(content))
+    except ValidationError as e:
+        errors = [
+            f"{'.'.join(str(part) for part in error['loc']) or 'reply'}: {error['msg']}"
+            for error in e.errors()[:5]
+        ]
+        return "; ".join(errors)
+    return "unknown error"
+
+
+def repair_messages(
+    messages: list,
+    content: str,
+    model: Type[BaseModel]
+) -> list:
+    """Extend a conversation with a request to fix an invalid JSON reply."""
+    return messages + [
+        {"role": "assistant", "content": content},
+        {
+            "role": "user",
+            "content": (
+                f"Your reply was not valid: {validation_feedback(model, content)}. "
+                f"Reply again with only the corrected JSON object. "
+                f"Schema: {json.dumps(model.model_json_schema(), separators=(',', ':'))}"
+            )
+        },
+    ]
@@ -0,0 +1,102 @@
+import binascii
+import hashlib
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import UploadFile
+
+from app.core.config import settings
+
+# Input bytes encoded per step; a multiple of 3, so chunks need no padding
+BASE64_CHUNK = 3 * 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised when an upload exceeds the configured size limit."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File too large. Maximum size: {max_size // (1024*1024)}MB")
+        self.max_size = max_size
+
+
+@dataclass
+class UploadedFile:
+    """Upload contents with the digest computed while it was read."""
+    data: bytes
+    sha256: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+async def read_upload(
+    upload: UploadFile,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> UploadedFile:
+    """
+    Read an upload with early size rejection and incremental hashing.
+
+    The multipart parser has already spooled the body to a temporary file,
+    so the upload is first streamed in chunks to hash it and enforce the
+    size limit, then read once into a single buffer. Oversized uploads are
+    rejected before they are ever held in memory, and peak memory for an
+    accepted upload is its size plus one chunk.
+
+    Args:
+        upload: Uploaded file from a multipart form
+        max_size: Size limit in bytes, defaults to ``MAX_FILE_SIZE``
+        chunk_size: Read size in bytes, defaults to ``UPLOAD_CHUNK_SIZE``
+
+    Returns:
+        UploadedFile with the contents and their SHA-256 hex digest
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+
+    # The parser records the spooled size, so most oversized uploads are
+    # rejected without reading a byte
+    if upload.size is not None and upload.size > max_size:
+        raise UploadTooLargeError(max_size)
+
+    digest = hashlib.sha256()
+    total = 0
+    await upload.seek(0)
+    while chunk := await upload.read(chunk_size):
+        total += len(chunk)
+        if total > max_size:
+            raise UploadTooLargeError(max_size)
+        digest.update(chunk)
+
+    await upload.seek(0)
+    data = await upload.read()
+    return UploadedFile(data=data, sha256=digest.hexdigest())
+
+
+def encode_data_url(data: bytes, mime_type: str) -> str:
+    """
+    Encode bytes as a base64 ``data:`` URL for a vision model.
+
+    The prefix and the payload are written into one buffer allocated at its
+    final size, encoding a chunk at a time, and the buffer is decoded into
+    the URL string once. Unlike ``b64encode().decode()`` followed by an
+    f-string, no intermediate full-size copy outlives the call.
+
+    Args:
+        data: Raw image bytes
+        mime_type: MIME type of the image
+
+    Returns:
+        ``data:<mime_type>;base64,<payload>`` string
+    """
+    prefix = f"data:{mime_type};base64,".encode("ascii")
+    buffer = bytearray(len(prefix) + 4 * ((len(data) + 2) // 3))
+    buffer[:len(prefix)] = prefix
+    position = len(prefix)
+    view = memoryview(data)
+    for start in range(0, len(data), BASE64_CHUNK):
+        encoded = binascii.b2a_base64(view[start:start + BASE64_CHUNK], newline=False)
+        buffer[position:position + len(encoded)] = encoded
+        position += len(encoded)
+    return buffer.decode("ascii")
@@ -0,0 +1,61 @@
+"""
+Concurrency benchmark for the async model client.
+
+Fires many ``AIService.translate_text`` calls at once against a local stub
+server with a fixed latency. With a blocking client the wall time is roughly
+``requests * latency``; with the async client it approaches
+``ceil(requests / MODEL_MAX_CONCURRENCY) * latency``.
+
+Usage:
+    python -m benchmarks.bench_async_client --requests 32 --latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+
+from benchmarks.stub_server import StubServer, create_stub_app
+
+
+async def run(requests: int) -> float:
+    from app.services.ai_service import ai_service
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        ai_service.translate_text(text=f"Where is the bus station? #{i}", target_language="Spanish")
+        for i in range(requests)
+    ])
+    elapsed = time.perf_counter() - start
+    await ai_service.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    with StubServer(create_stub_app(latency=args.latency)) as stub:
+        # Settings are read at import time, so configure them before importing the app
+        os.environ["OPENROUTER_BASE_URL"] = stub.base_url
+        os.environ["OPENROUTER_API_KEY"] = "stub-key"
+        os.environ["MODEL_MAX_CONCURRENCY"] = str(args.concurrency)
+
+        elapsed = asyncio.run(run(args.requests))
+        stats = httpx.get(f"{stub.base_url}/stats").json()
+
+    serial = args.requests * args.latency
+    print(f"requests:          {args.requests}")
+    print(f"model latency:     {args.latency:.3f}s")
+    print(f"wall time:         {elapsed:.3f}s")
+    print(f"serial estimate:   {serial:.3f}s")
+    print(f"speedup:           {serial / elapsed:.1f}x")
+    print(f"peak in flight:    {stats['peak_in_flight']}")
+
+
+if __name__ == "__main__":
+    main()
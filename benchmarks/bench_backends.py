@@ -0,0 +1,105 @@
+"""
+Throughput benchmark for the remote and local text backends.
+
+Sends the same concurrent text completions through the OpenAI-compatible
+backend (against a local stub server simulating provider latency) and
+through the on-device backend, and reports requests per second, latency
+and, for the local backend, the mean batch size. The local run needs the
+optional ``local`` dependencies and downloads ``--local-model`` on first use.
+
+Usage:
+    python -m benchmarks.bench_backends --requests 64 --concurrency 16 \\
+        --local-model google/gemma-3-1b-it
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.stub_server import StubServer, create_stub_app
+
+PROMPTS = [
+    "Where is the nearest pharmacy?",
+    "I need a doctor.",
+    "Where is the registration office?",
+    "How much does this cost?",
+]
+
+
+async def run(target: str, requests: int, concurrency: int, max_tokens: int) -> dict:
+    from app.core.config import settings
+    from app.services.ai_service import AIService
+    from app.services.hedging import percentile
+    from app.services.router import ModelRouter, parse_targets
+
+    service = AIService()
+    service.routers["text"] = ModelRouter(parse_targets([target], settings.OPENROUTER_BASE_URL))
+    settings.MAX_TOKENS = max_tokens
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        messages = [
+            {"role": "system", "content": "Translate the text to Spanish. Reply with the translation only."},
+            {"role": "user", "content": PROMPTS[i % len(PROMPTS)]},
+        ]
+        async with slots:
+            started = time.perf_counter()
+            await service._complete("text", messages)
+            latencies.append(time.perf_counter() - started)
+
+    # One warm-up call loads the local model outside the timed run
+    await one(0)
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    elapsed = time.perf_counter() - started
+
+    local = list(service.local_backends.values())
+    batch_size = local[0].stats()["mean_batch_size"] if local else None
+    await service.close()
+    return {
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "batch_size": batch_size,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-tokens", type=int, default=32)
+    parser.add_argument("--remote-latency", type=float, default=0.8, help="Simulated provider latency in seconds")
+    parser.add_argument("--local-model", default="google/gemma-3-1b-it")
+    args = parser.parse_args()
+
+    from app.services.backends import BackendUnavailableError
+
+    results = {}
+    with StubServer(create_stub_app(latency=args.remote_latency)) as stub:
+        os.environ["OPENROUTER_API_KEY"] = "stub-key"
+        from app.core.config import settings
+        settings.OPENROUTER_BASE_URL = stub.base_url
+        results["remote"] = asyncio.run(run("stub-model", args.requests, args.concurrency, args.max_tokens))
+
+    try:
+        results["local"] = asyncio.run(
+            run(f"{args.local_model}@local", args.requests, args.concurrency, args.max_tokens)
+        )
+    except BackendUnavailableError as e:
+        print(f"Skipping local backend: {e}")
+
+    print(f"{'backend':<8} {'req/s':>8} {'p50':>8} {'p99':>8} {'batch':>6}")
+    for name, result in results.items():
+        batch = f"{result['batch_size']:.1f}" if result["batch_size"] else "-"
+        print(
+            f"{name:<8} {result['throughput']:>8.2f} {result['p50'] * 1000:>6.0f}ms "
+            f"{result['p99'] * 1000:>6.0f}ms {batch:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
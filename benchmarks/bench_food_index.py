@@ -0,0 +1,125 @@
+"""
+Startup and lookup benchmark for the memory-mapped food index.
+
+Builds a synthetic index with thousands of conditions and tens of thousands
+of ingredients (each with synonyms in several languages), then reports how
+long the index takes to build and to open, ingredient name lookup
+throughput and latency, and how many dishes per second are scored against
+a few and against all conditions.
+
+Usage:
+    python -m benchmarks.bench_food_index --conditions 5000 --ingredients 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+
+def synthetic_source(conditions: int, ingredients: int, synonyms: int, risks: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    languages = ["English", "Spanish", "German", "Ukrainian", "Arabic"]
+    return {
+        "conditions": [
+            {"id": f"condition_{j}", "name": f"Condition {j}", "aliases": [f"illness {j}"]}
+            for j in range(conditions)
+        ],
+        "ingredients": {
+            f"ingredient {i}": {
+                f"condition_{j}": [round(rng.random(), 2), f"Reason {j % 50}"]
+                for j in rng.sample(range(conditions), min(risks, conditions))
+            }
+            for i in range(ingredients)
+        },
+        "synonyms": {
+            f"ingredient {i}": {
+                languages[k % len(languages)]: [f"{languages[k % len(languages)][:2]} ingredient {i} {k}"]
+                for k in range(synonyms)
+            }
+            for i in range(ingredients)
+        },
+    }
+
+
+def timed(func, repeat: int) -> list:
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conditions", type=int, default=5000)
+    parser.add_argument("--ingredients", type=int, default=20000)
+    parser.add_argument("--synonyms", type=int, default=4, help="Synonyms per ingredient")
+    parser.add_argument("--risks", type=int, default=8, help="Conditions each ingredient is a risk for")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--checks", type=int, default=2000)
+    args = parser.parse_args()
+
+    from app.models.food import DetectedIngredient, FoodIdentification
+    from app.services.food import ConditionMatrix
+    from app.services.food_index import FoodIndex, build_index
+    from app.services.hedging import percentile
+
+    source = synthetic_source(args.conditions, args.ingredients, args.synonyms, args.risks)
+    started = time.perf_counter()
+    data = build_index(source)
+    build = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "food_index.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        opens = timed(lambda: FoodIndex.open(path).close(), 50)
+        matrix = ConditionMatrix(FoodIndex.open(path))
+
+        rng = random.Random(1)
+        names = [
+            rng.choice([f"ingredient {i}", f"Sp ingredient {i} 1", f"unknown thing {i}"])
+            for i in (rng.randrange(args.ingredients) for _ in range(args.lookups))
+        ]
+        started = time.perf_counter()
+        for name in names:
+            matrix.rows(name)
+        lookup_rate = args.lookups / (time.perf_counter() - started)
+        lookup_latencies = [
+            latency for name in names[:5000] for latency in timed(lambda: matrix.rows(name), 1)
+        ]
+
+        dishes = [
+            FoodIdentification(dish="dish", ingredients=[
+                DetectedIngredient(name=f"ingredient {rng.randrange(args.ingredients)}", confidence=rng.random())
+                for _ in range(12)
+            ])
+            for _ in range(args.checks)
+        ]
+        few, _ = matrix.resolve([f"condition {j}" for j in range(10)])
+        every, _ = matrix.resolve([])
+        results = {}
+        for label, condition_ids, count in (("10 conditions", few, args.checks), ("all conditions", every, 50)):
+            started = time.perf_counter()
+            for dish in dishes[:count]:
+                matrix.check(dish, condition_ids)
+            results[label] = count / (time.perf_counter() - started)
+
+    print(
+        f"index: {args.conditions} conditions, {args.ingredients} ingredients, "
+        f"{matrix.index.metadata['ingredient_names']} names, {len(data) / 1024 / 1024:.1f} MiB"
+    )
+    print(f"build: {build * 1000:.0f}ms   open: p50 {percentile(opens, 0.5) * 1000:.2f}ms")
+    print(
+        f"lookup: {lookup_rate:,.0f}/s   p50 {percentile(lookup_latencies, 0.5) * 1e6:.1f}us   "
+        f"p99 {percentile(lookup_latencies, 0.99) * 1e6:.1f}us"
+    )
+    for label, rate in results.items():
+        print(f"check (12 ingredients, {label}): {rate:,.0f} dishes/s")
+
+
+if __name__ == "__main__":
+    main()
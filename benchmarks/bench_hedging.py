@@ -0,0 +1,86 @@
+"""
+Tail-latency benchmark for hedged vision calls.
+
+Sends vision completions to a local stub server where a small fraction of
+requests stall, once with hedging disabled and once enabled, and reports
+p50/p99 latency and the hedge rate. The stub's slow requests are drawn from
+a seeded generator, so both runs see the same latency distribution.
+
+Usage:
+    python -m benchmarks.bench_hedging --requests 400 --tail-probability 0.03
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.stub_server import StubServer, create_stub_app
+
+
+async def run(requests: int, concurrency: int, hedge: bool) -> dict:
+    from app.core.config import settings
+    from app.services.ai_service import AIService
+    from app.services.hedging import percentile
+
+    settings.HEDGE_ENABLED = hedge
+    service = AIService()
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int) -> None:
+        async with slots:
+            started = time.perf_counter()
+            await service._complete("vision", [{"role": "user", "content": f"Read sign #{i}"}])
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[one(i) for i in range(requests)])
+    await service.close()
+
+    stats = service.hedging.stats()
+    return {
+        "p50": percentile(latencies, 0.5),
+        "p99": percentile(latencies, 0.99),
+        "hedge_rate": stats["hedge_rate"] if hedge else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--tail-probability", type=float, default=0.03)
+    parser.add_argument("--budget", type=float, default=0.05)
+    args = parser.parse_args()
+
+    results = {}
+    for hedge in (False, True):
+        app = create_stub_app(
+            latency=args.latency,
+            tail_latency=args.tail_latency,
+            tail_probability=args.tail_probability,
+        )
+        with StubServer(app) as stub:
+            # Settings are read at import time, so configure them before importing the app
+            os.environ["OPENROUTER_BASE_URL"] = stub.base_url
+            os.environ["OPENROUTER_API_KEY"] = "stub-key"
+            os.environ["HEDGE_BUDGET"] = str(args.budget)
+            os.environ["HEDGE_MIN_DELAY"] = str(args.latency * 4)
+
+            from app.core.config import settings
+            settings.OPENROUTER_BASE_URL = stub.base_url
+            results[hedge] = asyncio.run(run(args.requests, args.concurrency, hedge))
+
+    print(f"{'hedging':<10} {'p50':>8} {'p99':>8} {'hedge rate':>11}")
+    for hedge, result in results.items():
+        print(
+            f"{'on' if hedge else 'off':<10} {result['p50'] * 1000:>6.0f}ms "
+            f"{result['p99'] * 1000:>6.0f}ms {result['hedge_rate']:>10.1%}"
+        )
+    improvement = 1 - results[True]["p99"] / results[False]["p99"]
+    print(f"p99 improvement: {improvement:.0%}")
+
+
+if __name__ == "__main__":
+    main()
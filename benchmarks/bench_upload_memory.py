@@ -0,0 +1,113 @@
+"""
+Peak memory benchmark for upload handling.
+
+Compares the previous approach (``await upload.read()`` followed by a size
+check) with ``read_upload``, which streams the spooled upload in chunks,
+hashes it incrementally and rejects oversized files before buffering them,
+then builds the model's data URL with ``encode_data_url`` in one buffer.
+Each scenario runs in a fresh interpreter so the reported peak RSS growth
+is not masked by earlier runs.
+
+Usage:
+    python -m benchmarks.bench_upload_memory --size-mb 200 --limit-mb 10
+"""
+import argparse
+import asyncio
+import base64
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+from fastapi import UploadFile
+
+WRITE_CHUNK = 1024 * 1024
+
+
+def _spooled_upload(size: int) -> UploadFile:
+    """Build an upload backed by a temporary file, as the multipart parser does."""
+    file = tempfile.SpooledTemporaryFile(max_size=WRITE_CHUNK)
+    block = b"\xff" * WRITE_CHUNK
+    remaining = size
+    while remaining > 0:
+        file.write(block[:min(remaining, WRITE_CHUNK)])
+        remaining -= WRITE_CHUNK
+    file.seek(0)
+    return UploadFile(file, size=size)
+
+
+async def _buffered(upload: UploadFile, limit: int) -> None:
+    content = await upload.read()
+    if len(content) > limit:
+        return
+    image_base64 = base64.b64encode(content).decode("utf-8")
+    f"data:image/jpeg;base64,{image_base64}"
+
+
+async def _streaming(upload: UploadFile, limit: int) -> None:
+    from app.services.uploads import UploadTooLargeError, encode_data_url, read_upload
+
+    try:
+        result = await read_upload(upload, max_size=limit)
+    except UploadTooLargeError:
+        return
+    encode_data_url(result.data, "image/jpeg")
+
+
+def _max_rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_scenario(mode: str, size: int, limit: int) -> dict:
+    upload = _spooled_upload(size)
+    handler = _buffered if mode == "buffered" else _streaming
+
+    rss_before = _max_rss_kb()
+    tracemalloc.start()
+    asyncio.run(handler(upload, limit))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "peak_rss_growth_mb": round((_max_rss_kb() - rss_before) / 1024, 1),
+        "peak_python_alloc_mb": round(peak / (1024 * 1024), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=float, default=200)
+    parser.add_argument("--valid-mb", type=float, default=8)
+    parser.add_argument("--limit-mb", type=float, default=10)
+    parser.add_argument("--scenario", nargs=3, metavar=("MODE", "SIZE", "LIMIT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        mode, size, limit = args.scenario
+        print(json.dumps(run_scenario(mode, int(size), int(limit))))
+        return
+
+    limit = int(args.limit_mb * 1024 * 1024)
+    cases = [
+        ("oversized", int(args.size_mb * 1024 * 1024)),
+        ("valid", int(args.valid_mb * 1024 * 1024)),
+    ]
+    print(f"{'case':<10} {'mode':<10} {'rss growth':>12} {'python peak':>12}")
+    for case, size in cases:
+        for mode in ("buffered", "streaming"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_upload_memory",
+                 "--scenario", mode, str(size), str(limit)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output)
+            print(
+                f"{case:<10} {mode:<10} "
+                f"{result['peak_rss_growth_mb']:>10.1f}MB {result['peak_python_alloc_mb']:>10.1f}MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Load test for the API endpoints against a fake OpenRouter server.
+
+Starts the stub provider in a background thread and the real application in
+a separate uvicorn process pointed at it, then drives ``/translate/text``,
+``/translate/text/stream``, ``/translate/image`` and ``/forms/analyze`` at
+each concurrency level. Every request carries unique text or image content
+and the result caches are switched off, so each request reaches the model.
+Reports throughput, latency percentiles (time to first byte for the stream),
+errors and the server's resident memory per scenario, and writes them as
+JSON so runs of two versions can be compared with ``--compare``.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 1 8 32 --requests 200 \\
+        --latency 0.3 --latency-sigma 0.5 --error-rate 0.01 --output after.json
+    python -m benchmarks.loadtest --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from PIL import Image, ImageDraw
+
+from benchmarks.stub_server import StubServer, create_stub_app, free_port
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ["text", "text_stream", "image", "forms"]
+
+TRANSLATION_REPLY = json.dumps({
+    "original_text": "Exit",
+    "translated_text": "Salida",
+    "source_language": "English",
+    "context_explanation": "Sign above an emergency exit",
+    "confidence": 0.95,
+    "detected_objects": [],
+})
+
+FORM_REPLY = json.dumps({
+    "form_type": "Registration",
+    "title": "Residence Registration",
+    "description": "Registers a new address with the local authority",
+    "fields": [{
+        "field_name": "full_name",
+        "field_type": "text",
+        "label": "Full Name",
+        "explanation": "Your legal name as shown on your passport",
+        "required": True,
+    }],
+    "instructions": ["Use block capitals"],
+})
+
+STREAM_REPLY = "Salida. This sign marks the emergency exit of the building."
+
+
+def _image(seed: int, size=(800, 600), lines: int = 6) -> bytes:
+    """A sign- or form-like JPEG, different for every seed."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, color="white")
+    draw = ImageDraw.Draw(img)
+    for row in range(lines):
+        top = 40 + row * (size[1] - 80) // lines
+        width = rng.randint(size[0] // 3, size[0] - 80)
+        draw.rectangle((40, top, 40 + width, top + 18), fill=(rng.randint(0, 80),) * 3)
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def build_requests(scenario: str, count: int) -> List[Dict]:
+    """Unique request payloads for a scenario, built before the timed run."""
+    if scenario in ("text", "text_stream"):
+        path = "/api/v1/translate/text" + ("/stream" if scenario == "text_stream" else "")
+        return [
+            {"path": path, "json": {"text": f"Where is the registration office? #{i}", "target_language": "Spanish"}}
+            for i in range(count)
+        ]
+    if scenario == "image":
+        return [
+            {
+                "path": "/api/v1/translate/image",
+                "data": {"target_language": "Spanish"},
+                "files": {"image": (f"sign-{i}.jpg", _image(i), "image/jpeg")},
+            }
+            for i in range(count)
+        ]
+    return [
+        {
+            "path": "/api/v1/forms/analyze",
+            "data": {"target_language": "Spanish"},
+            "files": {"document": (f"form-{i}.jpg", _image(10_000 + i, size=(1240, 1754), lines=24), "image/jpeg")},
+        }
+        for i in range(count)
+    ]
+
+
+def memory(pid: int) -> Dict[str, Optional[float]]:
+    """Current and peak resident memory of a process in MB (Linux only)."""
+    values = {"rss_mb": None, "peak_rss_mb": None}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values["rss_mb" if key == "VmRSS" else "peak_rss_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return values
+
+
+class ApiServer:
+    """Run the application with uvicorn in a child process."""
+
+    def __init__(self, env: Dict[str, str], port: Optional[int] = None):
+        self.port = port or free_port()
+        self.env = {**os.environ, **env}
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ApiServer":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+             "--port", str(self.port), "--log-level", "warning"],
+            cwd=ROOT,
+            env=self.env,
+        )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {self.process.returncode}")
+            try:
+                httpx.get(f"{self.base_url}/health", timeout=1).raise_for_status()
+                return self
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("API server did not start within 60 seconds")
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+
+
+async def _send(client: httpx.AsyncClient, request: Dict) -> tuple:
+    """Send one request, returning (status, latency, time to first byte)."""
+    kwargs = {key: request[key] for key in ("json", "data", "files") if key in request}
+    started = time.perf_counter()
+    async with client.stream("POST", request["path"], **kwargs) as response:
+        first_byte = None
+        async for _ in response.aiter_raw():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+    return response.status_code, time.perf_counter() - started, first_byte
+
+
+async def run_scenario(base_url: str, requests: List[Dict], concurrency: int) -> Dict:
+    from app.services.hedging import percentile
+
+    slots = asyncio.Semaphore(concurrency)
+    latencies, first_bytes, errors = [], [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        # One warm-up request opens a connection and loads lazy state outside the timed run
+        await _send(client, requests[0])
+
+        async def one(request: Dict) -> None:
+            nonlocal errors
+            async with slots:
+                try:
+                    status, latency, first_byte = await _send(client, request)
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+            if status >= 400:
+                errors += 1
+                return
+            latencies.append(latency)
+            if first_byte is not None:
+                first_bytes.append(first_byte)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(request) for request in requests])
+        elapsed = time.perf_counter() - started
+
+    def ms(values: List[float], q: float) -> Optional[float]:
+        value = percentile(values, q)
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "requests": len(requests),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 2),
+        "latency_ms": {"p50": ms(latencies, 0.5), "p95": ms(latencies, 0.95), "p99": ms(latencies, 0.99)},
+        "ttfb_ms": {"p50": ms(first_bytes, 0.5), "p95": ms(first_bytes, 0.95), "p99": ms(first_bytes, 0.99)},
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace, log: Callable[[str], None] = print) -> Dict:
+    """Run every scenario at every concurrency level and build the report."""
+    stub_app = create_stub_app(
+        latency=args.latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        token_interval=args.token_interval,
+        reply=STREAM_REPLY,
+        replies={"TranslationResponseOutput": TRANSLATION_REPLY, "FormAnalysisResponseOutput": FORM_REPLY},
+        seed=args.seed,
+    )
+    results = []
+    with StubServer(stub_app) as stub:
+        env = {
+            "OPENROUTER_BASE_URL": stub.base_url,
+            "OPENROUTER_API_KEY": "stub-key",
+            "DEBUG": "false",
+            "TRANSLATION_CACHE_ENABLED": "false",
+            "IMAGE_CACHE_ENABLED": "false",
+            "PHRASE_PACK_ENABLED": "false",
+            # One load generator would otherwise be throttled as a single client
+            "RATE_LIMIT_ENABLED": "false",
+            "MODEL_MAX_CONCURRENCY": str(args.model_concurrency),
+        }
+        with ApiServer(env) as api:
+            for scenario in args.scenarios:
+                requests = build_requests(scenario, args.requests)
+                for concurrency in args.concurrency:
+                    result = asyncio.run(run_scenario(api.base_url, requests, concurrency))
+                    result = {"scenario": scenario, "concurrency": concurrency, **result, **memory(api.process.pid)}
+                    results.append(result)
+                    log(format_row(result))
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "requests": args.requests,
+            "latency": args.latency,
+            "latency_sigma": args.latency_sigma,
+            "error_rate": args.error_rate,
+            "token_interval": args.token_interval,
+            "model_concurrency": args.model_concurrency,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+HEADER = f"{'scenario':<12} {'conc':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'ttfb50':>8} {'errors':>6} {'rss':>7}"
+
+
+def format_row(result: Dict) -> str:
+    def cell(value: Optional[float], unit: str = "ms") -> str:
+        return f"{value:.0f}{unit}" if value is not None else "-"
+
+    latency, ttfb = result["latency_ms"], result["ttfb_ms"]
+    return (
+        f"{result['scenario']:<12} {result['concurrency']:>4} {result['rps']:>8.2f} "
+        f"{cell(latency['p50']):>8} {cell(latency['p95']):>8} {cell(latency['p99']):>8} "
+        f"{cell(ttfb['p50']):>8} {result['errors']:>6} {cell(result['rss_mb'], 'M'):>7}"
+    )
+
+
+def compare(before: Dict, after: Dict) -> List[str]:
+    """Per-scenario relative change in throughput, tail latency and memory."""
+    def change(old: Optional[float], new: Optional[float]) -> str:
+        if old is None or new is None or old == 0:
+            return "-"
+        return f"{(new - old) / old * 100:+.1f}%"
+
+    previous = {(r["scenario"], r["concurrency"]): r for r in before["results"]}
+    lines = [f"{before.get('commit')} -> {after.get('commit')}",
+             f"{'scenario':<12} {'conc':>4} {'req/s':>8} {'p50':>8} {'p99':>8} {'rss':>8}"]
+    for result in after["results"]:
+        old = previous.get((result["scenario"], result["concurrency"]))
+        if old is None:
+            continue
+        lines.append(
+            f"{result['scenario']:<12} {result['concurrency']:>4} "
+            f"{change(old['rps'], result['rps']):>8} "
+            f"{change(old['latency_ms']['p50'], result['latency_ms']['p50']):>8} "
+            f"{change(old['latency_ms']['p99'], result['latency_ms']['p99']):>8} "
+            f"{change(old['rss_mb'], result['rss_mb']):>8}"
+        )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.3, help="Median simulated provider latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Log-normal spread of the provider latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of provider calls that fail with 503")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="Seconds between streamed words")
+    parser.add_argument("--model-concurrency", type=int, default=16, help="MODEL_MAX_CONCURRENCY for the API")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two JSON reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            print("\n".join(compare(json.load(before), json.load(after))))
+        return
+
+    print(HEADER)
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
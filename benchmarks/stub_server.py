@@ -0,0 +1,173 @@
+"""
+Minimal OpenAI-compatible stub server for local load testing.
+
+Serves ``POST /chat/completions`` with an artificial latency, optionally
+streamed token by token, and records how many requests were in flight at
+once, so benchmarks can show whether the API overlaps model calls or
+serializes them.
+"""
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def create_stub_app(
+    latency: float = 0.5,
+    reply: str = "Translation: stub",
+    status_code: int = 200,
+    tail_latency: float = 0.0,
+    tail_probability: float = 0.0,
+    seed: int = 0,
+    latency_sigma: float = 0.0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    token_interval: float = 0.0,
+    replies: Optional[Dict[str, str]] = None
+) -> FastAPI:
+    """
+    Create a stub app answering every completion after ``latency`` seconds.
+
+    A non-200 ``status_code`` makes every completion fail with that status,
+    for exercising fallback and circuit breaking. With ``tail_probability``
+    set, that fraction of requests takes ``tail_latency`` instead, drawn
+    from a seeded generator so runs are repeatable.
+
+    With ``latency_sigma`` the latency is drawn from a log-normal
+    distribution with median ``latency``; ``error_rate`` makes that fraction
+    of requests fail with ``error_status``. Streaming requests receive the
+    reply word by word, ``token_interval`` seconds apart, after the initial
+    latency. ``replies`` maps a ``response_format`` JSON schema name to the
+    reply for structured calls; other calls get ``reply``.
+    """
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.in_flight = 0
+    app.state.peak_in_flight = 0
+    app.state.requests = 0
+    app.state.errors = 0
+    usage = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+    def delay() -> float:
+        if rng.random() < tail_probability:
+            return tail_latency
+        if latency_sigma > 0:
+            return rng.lognormvariate(0.0, latency_sigma) * latency
+        return latency
+
+    def reply_for(body: dict) -> str:
+        schema = (body.get("response_format") or {}).get("json_schema") or {}
+        return (replies or {}).get(schema.get("name"), reply)
+
+    async def stream(content: str, model: str, request_id: str):
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            if i and token_interval:
+                await asyncio.sleep(token_interval)
+            delta = word if i == len(words) - 1 else word + " "
+            chunk = {
+                "id": request_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+        final = {
+            "id": request_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [],
+            "usage": usage,
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        app.state.in_flight += 1
+        app.state.peak_in_flight = max(app.state.peak_in_flight, app.state.in_flight)
+        try:
+            await asyncio.sleep(delay())
+        finally:
+            app.state.in_flight -= 1
+
+        failed = status_code if status_code != 200 else (error_status if rng.random() < error_rate else 200)
+        if failed != 200:
+            app.state.errors += 1
+            return JSONResponse(status_code=failed, content={"error": {"message": "stub failure"}})
+
+        request_id = f"stub-{app.state.requests}"
+        model = body.get("model", "stub")
+        content = reply_for(body)
+        if body.get("stream"):
+            return StreamingResponse(stream(content, model, request_id), media_type="text/event-stream")
+
+        return {
+            "id": request_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": usage,
+        }
+
+    @app.get("/stats")
+    async def stats():
+        return {
+            "requests": app.state.requests,
+            "errors": app.state.errors,
+            "in_flight": app.state.in_flight,
+            "peak_in_flight": app.state.peak_in_flight,
+        }
+
+    return app
+
+
+def free_port() -> int:
+    """Return an unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Run a stub app with uvicorn in a background thread."""
+
+    def __init__(self, app: FastAPI, port: Optional[int] = None):
+        self.app = app
+        self.port = port or free_port()
+        self._server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "StubServer":
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
@@ -0,0 +1,38 @@
+"""
+Compile the food condition data into the memory-mapped food index.
+
+    python build_food_index.py [--source app/data/food_conditions.json] [--output app/data/food_index.bin]
+
+The API rebuilds a missing or stale index on startup by itself; run this to
+build it ahead of deployment, e.g. in an image build where the data
+directory is read-only at runtime, or to validate edits to the source data.
+"""
+import argparse
+import time
+
+from app.core.config import settings
+from app.services.food_index import FoodIndex, write_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile the food condition index")
+    parser.add_argument("--source", default=settings.FOOD_CONDITIONS_PATH, help="Condition data JSON")
+    parser.add_argument("--output", default=settings.FOOD_INDEX_PATH, help="Index file to write")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    size = write_index(args.output, args.source)
+    elapsed = time.perf_counter() - started
+
+    index = FoodIndex.open(args.output)
+    stats = index.stats()
+    index.close()
+    print(
+        f"Wrote {args.output} ({size / 1024:.1f} KiB) in {elapsed * 1000:.1f} ms: "
+        f"{stats['conditions']} conditions, {stats['ingredients']} ingredients, "
+        f"{stats['ingredient_names']} ingredient names in {len(stats['languages'])} languages"
+    )
+
+
+if __name__ == "__main__":
+    main()
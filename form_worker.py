@@ -0,0 +1,43 @@
+"""
+Process queued form analysis jobs outside the API process.
+
+    python form_worker.py [--workers 4]
+
+Run the API with ``JOB_WORKERS=0`` so uploads are only queued there, and
+start one or more of these workers against the same ``DATABASE_URL``. Jobs
+are claimed with a lease, so a crashed worker's jobs are picked up again
+after ``JOB_LEASE`` seconds.
+"""
+import argparse
+import asyncio
+
+from app.api.v1.endpoints import forms  # noqa: F401 - registers the job handler
+from app.core.config import settings
+from app.services.ai_service import ai_service
+from app.services.history import translation_history
+from app.services.jobs import form_jobs
+
+
+async def work(workers: int) -> None:
+    form_jobs.workers = workers
+    try:
+        await form_jobs.serve()
+    finally:
+        await ai_service.close()
+        await translation_history.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process queued form analysis jobs")
+    parser.add_argument("--workers", type=int, default=max(settings.JOB_WORKERS, 1), help="Jobs processed concurrently")
+    args = parser.parse_args()
+
+    print(f"Processing form jobs from {settings.DATABASE_URL} with {args.workers} workers")
+    try:
+        asyncio.run(work(args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
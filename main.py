@@ -1,10 +1,16 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 
 from app.core.config import settings
+from app.core.admission import AdmissionMiddleware, admission_queue, rate_limiter
+from app.core.metrics import MetricsMiddleware, registry
 from app.api.v1.router import api_router
+from app.services.ai_service import ai_service
+from app.services.history import translation_history
+from app.services.jobs import form_jobs
+from app.services import image_processing, pdf
 
 
 @asynccontextmanager
@@ -15,6 +21,11 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown
     print("🛑 Shutting down Refugee Assistance API...")
+    await ai_service.close()
+    await form_jobs.stop()
+    await translation_history.stop()
+    image_processing.shutdown_executor()
+    pdf.shutdown_executor()
 
 
 def create_app() -> FastAPI:
@@ -28,6 +39,17 @@ def create_app() -> FastAPI:
         redoc_url="/redoc" if settings.DEBUG else None,
     )
 
+    # Per-client rate limits and a fair concurrency cap on model-backed
+    # endpoints; added first so CORS headers reach shed requests too
+    app.add_middleware(
+        AdmissionMiddleware,
+        limiter=rate_limiter if settings.RATE_LIMIT_ENABLED else None,
+        queue=admission_queue,
+        model_paths=settings.ADMISSION_MODEL_PATHS,
+        exempt=("/health", "/metrics", "/api/v1/health", "/docs", "/redoc", "/openapi.json"),
+        trust_forwarded=settings.RATE_LIMIT_TRUST_FORWARDED,
+    )
+
     # CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -37,6 +59,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Request counts, latency and per-stage timings for /metrics
+    app.add_middleware(MetricsMiddleware)
+
     # Include API router
     app.include_router(api_router, prefix="/api/v1")
 
@@ -45,6 +70,11 @@ def create_app() -> FastAPI:
         """Health check endpoint."""
         return {"status": "healthy", "message": "Refugee Assistance API is running"}
 
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint."""
+        return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
     return app
 
 
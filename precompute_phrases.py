@@ -0,0 +1,131 @@
+"""
+Precompute translations of common phrases into every supported language.
+
+    python precompute_phrases.py [--workers 4] [--languages Spanish Arabic]
+
+Finished translations are appended to a progress file next to the pack, so an
+interrupted run resumes where it stopped; the pack is rebuilt from the
+progress file at the end of every run. Restart the API to pick up a new pack.
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import Dict, Any, List
+
+from app.core.config import settings
+from app.models.translation import SUPPORTED_LANGUAGES, TextTranslationRequest
+from app.services.ai_service import AIService
+from app.services.phrase_pack import PhrasePack, phrase_key, write_pack
+
+
+def load_corpus(path: str) -> List[str]:
+    """Read phrases one per line, skipping blank lines, comments and duplicates."""
+    phrases = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            phrase = line.strip()
+            if phrase and not phrase.startswith("#"):
+                phrases.setdefault(phrase, None)
+    return list(phrases)
+
+
+def load_progress(path: str) -> Dict[int, Dict[str, Any]]:
+    """Translations finished by earlier runs, keyed by phrase key."""
+    done = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves a partial last line
+                    continue
+                done[phrase_key(record["original_text"], record["target_language"])] = record
+    return done
+
+
+async def precompute(
+    phrases: List[str],
+    languages: List[str],
+    source_language: str,
+    output: str,
+    workers: int
+) -> int:
+    """
+    Translate every phrase into every language and write the pack.
+
+    Phrases are sent in packed batches of up to BATCH_PACK_MAX_ITEMS, with at
+    most ``workers`` batches in flight.
+
+    Returns:
+        Number of phrases in the written pack
+    """
+    progress_path = f"{output}.progress.jsonl"
+    done = load_progress(progress_path)
+
+    chunks = []
+    for language in languages:
+        pending = [phrase for phrase in phrases if phrase_key(phrase, language) not in done]
+        for start in range(0, len(pending), settings.BATCH_PACK_MAX_ITEMS):
+            chunks.append((language, pending[start:start + settings.BATCH_PACK_MAX_ITEMS]))
+    print(f"{len(done)} translations done, {sum(len(chunk) for _, chunk in chunks)} to go")
+
+    # An empty pack, so phrases are translated instead of served from the pack being rebuilt
+    service = AIService(phrases=PhrasePack())
+    limit = asyncio.Semaphore(workers)
+
+    with open(progress_path, "a", encoding="utf-8") as progress:
+        async def run(language: str, chunk: List[str]) -> None:
+            async with limit:
+                results = await service.translate_text_batch([
+                    TextTranslationRequest(text=phrase, target_language=language, source_language=source_language)
+                    for phrase in chunk
+                ])
+            failed = 0
+            for result in results:
+                if isinstance(result, Exception):
+                    failed += 1
+                    continue
+                record = result.model_dump(mode="json", exclude={"cached"})
+                progress.write(json.dumps(record, ensure_ascii=False) + "\n")
+                done[phrase_key(result.original_text, language)] = record
+            progress.flush()
+            print(f"{language}: {len(chunk) - failed}/{len(chunk)} translated")
+
+        try:
+            await asyncio.gather(*[run(language, chunk) for language, chunk in chunks])
+        finally:
+            await service.close()
+
+    wanted = {phrase_key(phrase, language) for phrase in phrases for language in languages}
+    return write_pack(
+        output,
+        [record for key, record in done.items() if key in wanted],
+        model=settings.TEXT_MODEL,
+        source_language=source_language,
+        languages=languages
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompute the phrase pack served by translate_text")
+    parser.add_argument("--phrases", default=settings.PHRASE_CORPUS_PATH, help="Phrase corpus, one per line")
+    parser.add_argument("--output", default=settings.PHRASE_PACK_PATH, help="Phrase pack to write")
+    parser.add_argument("--source-language", default="English", help="Language of the corpus")
+    parser.add_argument("--languages", nargs="+", help="Target languages (default: all supported)")
+    parser.add_argument("--workers", type=int, default=4, help="Batches translated concurrently")
+    args = parser.parse_args()
+
+    languages = args.languages or [
+        language["code"] for language in SUPPORTED_LANGUAGES
+        if language["code"].casefold() != args.source_language.casefold()
+    ]
+    count = asyncio.run(precompute(
+        load_corpus(args.phrases), languages, args.source_language, args.output, args.workers
+    ))
+    print(f"Wrote {count} phrases to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,72 @@
+import asyncio
+import json
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch
-import base64
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
 from io import BytesIO
 from PIL import Image
 
 from main import app
+from app.core.admission import rate_limiter
 from app.core.config import settings
+from app.services.ai_service import AIService
+from app.services.cache import LRUCache, TranslationCache
+from app.services.history import translation_history
+from app.services.image_cache import ImageResultCache, MultiIndexHash
+
+
+TRANSLATION_JSON = json.dumps({
+    "original_text": "Hello",
+    "translated_text": "Hola",
+    "source_language": "English",
+    "context_explanation": "A common greeting",
+    "confidence": 0.95
+})
+
+USAGE = SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+
+
+class FakeCompletions:
+    """Fake async completions API that records call overlap."""
+    
+    def __init__(self, content=TRANSLATION_JSON, delay=0.05):
+        self.content = content
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+    
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if kwargs.get("stream"):
+            return self._stream()
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=USAGE)
+    
+    async def _stream(self):
+        for word in self.content.split(" "):
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=USAGE)
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Give every test a fresh rate limit budget."""
+    rate_limiter.reset()
+
+
+@pytest.fixture(autouse=True)
+def isolate_history(tmp_path, monkeypatch):
+    """Write translation history to a database of the test's own."""
+    monkeypatch.setattr(translation_history, "database_url", f"sqlite:///{tmp_path / 'history.db'}")
 
 
 @pytest.fixture
@@ -16,6 +76,35 @@ def client():
         yield test_client
 
 
+@pytest.fixture
+def fake_completions():
+    """Fake completions API; override it to change the model reply."""
+    return FakeCompletions()
+
+
+@pytest.fixture
+def make_service(fake_completions):
+    """
+    Build AIService instances wired to ``fake_completions`` instead of the network.
+    
+    Keyword options are passed to AIService; by default each service gets
+    small caches of its own.
+    """
+    def make(**options):
+        options.setdefault("cache", TranslationCache(LRUCache(max_entries=100, ttl=60)))
+        options.setdefault("vision_cache", ImageResultCache(MultiIndexHash(max_distance=4, max_entries=100, ttl=60)))
+        service = AIService(**options)
+        service._client = SimpleNamespace(chat=SimpleNamespace(completions=fake_completions), close=AsyncMock())
+        return service
+    return make
+
+
+@pytest.fixture
+def service(make_service):
+    """AIService wired to a fake client instead of the network."""
+    return make_service()
+
+
 @pytest.fixture
 def mock_ai_service():
     """Mock the AI service for testing."""
@@ -24,14 +113,13 @@ def mock_ai_service():
 
 
 @pytest.fixture
-def sample_image_base64():
-    """Create a sample base64 encoded image for testing."""
+def sample_image_bytes():
+    """Create a sample encoded image for testing."""
     # Create a simple test image
     img = Image.new('RGB', (100, 100), color='white')
     buffer = BytesIO()
     img.save(buffer, format='JPEG')
-    image_data = buffer.getvalue()
-    return base64.b64encode(image_data).decode('utf-8')
+    return buffer.getvalue()
 
 
 @pytest.fixture
@@ -78,4 +166,17 @@ def mock_form_analysis_response():
         "instructions": ["Fill all required fields", "Use black ink"],
         "required_documents": ["Passport", "Photo"],
         "estimated_time": "30 minutes"
-    } 
\ No newline at end of file
+    } 
+
+@pytest.fixture
+def sample_pdf_file():
+    """Create a three-page PDF for upload testing."""
+    pages = []
+    for i in range(3):
+        page = Image.new('RGB', (850, 1100), color='white')
+        page.paste((0, 0, 0), (100 + i * 200, 100, 250 + i * 200, 1000))
+        pages.append(page)
+    buffer = BytesIO()
+    pages[0].save(buffer, format='PDF', save_all=True, append_images=pages[1:])
+    buffer.seek(0)
+    return ("test_form.pdf", buffer, "application/pdf")
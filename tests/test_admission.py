@@ -0,0 +1,208 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+
+from app.core.admission import AdmissionMiddleware, AdmissionRejected, FairQueue, RateLimiter, client_key
+from tests.test_router import FakeClock
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def scope(headers=(), client=("10.0.0.1", 5000)):
+    return {"type": "http", "headers": [(k.encode(), v.encode()) for k, v in headers], "client": client}
+
+
+class TestRateLimiter:
+    """Test suite for per-client token buckets."""
+    
+    def test_burst_then_sustained_rate(self, clock):
+        """A client may burst, then gets one request per refill interval."""
+        limiter = RateLimiter(rate=2.0, burst=3, clock=clock)
+        
+        assert [limiter.check("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert limiter.check("a") == pytest.approx(0.5)
+        clock.now = 0.5
+        assert limiter.check("a") == 0.0
+        assert limiter.check("a") > 0
+    
+    def test_clients_are_independent(self, clock):
+        """One client exhausting its bucket does not affect another."""
+        limiter = RateLimiter(rate=1.0, burst=1, clock=clock)
+        
+        limiter.check("a")
+        
+        assert limiter.check("a") > 0
+        assert limiter.check("b") == 0.0
+    
+    def test_bucket_count_is_bounded(self, clock):
+        """Only the most recently seen clients are remembered."""
+        limiter = RateLimiter(rate=1.0, burst=1, max_clients=2, clock=clock)
+        
+        for client in "abc":
+            limiter.check(client)
+        
+        assert limiter.stats()["clients"] == 2
+        assert limiter.check("a") == 0.0
+
+
+class TestFairQueue:
+    """Test suite for the fair concurrency cap."""
+    
+    async def test_slots_alternate_between_clients(self):
+        """Freed slots go to waiting clients in turn, not in arrival order."""
+        queue = FairQueue(max_concurrency=1, max_queue=10, max_wait=5)
+        await queue.acquire("busy")
+        order = []
+        
+        async def request(client, name):
+            await queue.acquire(client)
+            order.append(name)
+            await asyncio.sleep(0)
+            queue.release()
+        
+        tasks = [asyncio.create_task(request("busy", f"busy-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(request("quiet", "quiet")))
+        await asyncio.sleep(0)
+        queue.release()
+        await asyncio.gather(*tasks)
+        
+        assert order == ["busy-0", "quiet", "busy-1", "busy-2"]
+        assert queue.in_flight == 0
+        assert queue.waiting == 0
+    
+    async def test_full_queue_sheds(self):
+        """Requests beyond the queue bound are rejected at once."""
+        queue = FairQueue(max_concurrency=1, max_queue=1, max_wait=5)
+        await queue.acquire("a")
+        waiter = asyncio.create_task(queue.acquire("b"))
+        await asyncio.sleep(0)
+        
+        with pytest.raises(AdmissionRejected) as rejected:
+            await queue.acquire("c")
+        
+        assert rejected.value.reason == "queue_full"
+        queue.release()
+        await waiter
+        assert queue.stats()["shed"] == 1
+    
+    async def test_wait_times_out(self):
+        """Requests waiting longer than max_wait are shed and leave the queue."""
+        queue = FairQueue(max_concurrency=1, max_queue=10, max_wait=0.05)
+        await queue.acquire("a")
+        
+        with pytest.raises(AdmissionRejected, match="busy") as rejected:
+            await queue.acquire("b")
+        
+        assert rejected.value.reason == "queue_timeout"
+        assert queue.waiting == 0
+        queue.release()
+        assert queue.in_flight == 0
+    
+    async def test_slot_handed_over_at_timeout_is_kept(self):
+        """A slot released just as the wait times out admits the waiter instead of leaking."""
+        queue = FairQueue(max_concurrency=1, max_queue=10, max_wait=5)
+        await queue.acquire("a")
+        
+        async def racing_wait_for(future, timeout):
+            queue.release()
+            raise asyncio.TimeoutError
+        
+        with patch("app.core.admission.asyncio.wait_for", racing_wait_for):
+            await queue.acquire("b")
+        
+        assert queue.in_flight == 1
+        assert queue.stats()["shed"] == 0
+        queue.release()
+        assert queue.in_flight == 0
+    
+    async def test_retry_after_follows_service_time(self):
+        """Retry-After estimates how long the queue takes to drain."""
+        queue = FairQueue(max_concurrency=2, max_queue=10, max_wait=5)
+        
+        assert queue.retry_after() == 5
+        await queue.acquire("a")
+        queue.release(elapsed=4.0)
+        
+        assert queue.retry_after() == pytest.approx(2.0)
+
+
+class TestClientKey:
+    """Test suite for client identification."""
+    
+    def test_api_key_preferred_over_ip(self):
+        """API keys identify a client and are never kept in the clear."""
+        key = client_key(scope([("x-api-key", "secret")]))
+        bearer = client_key(scope([("authorization", "Bearer secret")]))
+        
+        assert key == bearer
+        assert key.startswith("key:")
+        assert "secret" not in key
+    
+    def test_forwarded_for_only_when_trusted(self):
+        """X-Forwarded-For is ignored unless the proxy is trusted."""
+        request = scope([("x-forwarded-for", "203.0.113.7, 10.0.0.2")])
+        
+        assert client_key(request) == "ip:10.0.0.1"
+        assert client_key(request, trust_forwarded=True) == "ip:203.0.113.7"
+
+
+class TestAdmissionMiddleware:
+    """Test suite for load shedding in front of the app."""
+    
+    def make_app(self, limiter=None, queue=None):
+        app = FastAPI()
+        app.add_middleware(
+            AdmissionMiddleware,
+            limiter=limiter,
+            queue=queue,
+            model_paths=["/model"],
+            exempt=("/health",)
+        )
+        
+        @app.get("/model")
+        async def model():
+            return {"ok": True}
+        
+        @app.get("/health")
+        async def health():
+            return {"ok": True}
+        
+        return app
+    
+    def test_rate_limited_requests_get_429(self, clock):
+        """Clients over their rate are told when to retry."""
+        client = TestClient(self.make_app(limiter=RateLimiter(rate=0.5, burst=2, clock=clock)))
+        
+        statuses = [client.get("/model").status_code for _ in range(3)]
+        shed = client.get("/model")
+        
+        assert statuses == [200, 200, 429]
+        assert shed.headers["retry-after"] == "2"
+        assert "Rate limit" in shed.json()["detail"]
+        assert client.get("/health").status_code == 200
+    
+    def test_full_queue_gets_429(self):
+        """Model-backed requests are shed when no slot can be waited for."""
+        queue = FairQueue(max_concurrency=1, max_queue=0, max_wait=1)
+        queue.in_flight = 1
+        client = TestClient(self.make_app(queue=queue))
+        
+        response = client.get("/model")
+        
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "1"
+    
+    def test_slot_released_after_response(self):
+        """Served requests give their slot back."""
+        queue = FairQueue(max_concurrency=1, max_queue=0, max_wait=1)
+        client = TestClient(self.make_app(queue=queue))
+        
+        assert [client.get("/model").status_code for _ in range(3)] == [200, 200, 200]
+        assert queue.in_flight == 0
+        assert queue.stats()["admitted"] == 3
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import pytest
+from io import BytesIO
+from PIL import Image
+from unittest.mock import patch
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.translation import TextTranslationRequest
+from app.services.pdf import PdfError
+from tests.conftest import TRANSLATION_JSON
+
+
+FORM_JSON = json.dumps({
+    "form_type": "Visa Application",
+    "title": "Tourist Visa Form",
+    "description": "Application for temporary visitor visa",
+    "fields": [{
+        "field_name": "full_name",
+        "field_type": "text",
+        "label": "Full Name",
+        "explanation": "Your legal name as shown on your passport",
+        "required": True
+    }],
+    "instructions": ["Use black ink"]
+})
+
+
+class TestAIService:
+    """Test suite for the AI service."""
+    
+    async def test_model_calls_overlap(self, service, fake_completions):
+        """Concurrent translations should not serialize on the model call."""
+        await asyncio.gather(*[
+            service.translate_text(text=f"Hello {i}", target_language="Spanish")
+            for i in range(4)
+        ])
+        
+        assert len(fake_completions.calls) == 4
+        assert fake_completions.peak_in_flight == 4
+    
+    async def test_concurrency_limit(self, service, fake_completions):
+        """In-flight model calls are capped by MODEL_MAX_CONCURRENCY."""
+        with patch('app.core.config.settings.MODEL_MAX_CONCURRENCY', 2):
+            service._semaphore = None
+            await asyncio.gather(*[
+                service.translate_text(text=f"Hello {i}", target_language="Spanish")
+                for i in range(5)
+            ])
+        
+        assert fake_completions.peak_in_flight == 2
+    
+    async def test_model_error_is_wrapped(self, service, fake_completions):
+        """Model failures surface as service errors."""
+        async def fail(**kwargs):
+            raise RuntimeError("upstream down")
+        fake_completions.create = fail
+        
+        with pytest.raises(Exception, match="Text translation failed"):
+            await service.translate_text(text="Hello", target_language="Spanish")
+    
+    async def test_repeated_text_served_from_cache(self, service, fake_completions):
+        """Identical requests after the first skip the model call."""
+        first = await service.translate_text(text="Where is the bus station?", target_language="Spanish")
+        second = await service.translate_text(text="  Where is the   bus station? ", target_language="spanish")
+        
+        assert len(fake_completions.calls) == 1
+        assert first.cached is False
+        assert second.cached is True
+        assert second.translated_text == first.translated_text
+        assert service.translation_cache.stats()["hits"] == 1
+    
+    async def test_near_identical_images_served_from_cache(self, service, fake_completions):
+        """A re-encoded copy of the same photo skips the vision model."""
+        def encode(quality):
+            img = Image.new('RGB', (200, 100), color='white')
+            img.paste((200, 0, 0), (20, 20, 120, 80))
+            buffer = BytesIO()
+            img.save(buffer, format='JPEG', quality=quality)
+            return buffer.getvalue()
+        
+        first = await service.translate_image(image=encode(95), target_language="Spanish")
+        second = await service.translate_image(image=encode(60), target_language="Spanish")
+        await service.translate_image(image=encode(60), target_language="French")
+        
+        assert len(fake_completions.calls) == 2
+        assert first.cached is False
+        assert second.cached is True
+    
+    async def test_stream_translate_text(self, service, fake_completions):
+        """Streaming yields tokens, then a parsed result that is cached."""
+        fake_completions.content = "Translation: Hola"
+        events = [
+            event async for event in
+            service.stream_translate_text(text="Hello", target_language="Spanish")
+        ]
+        
+        kinds = [kind for kind, _ in events]
+        assert kinds == ["token", "token", "result"]
+        assert fake_completions.calls[0]["stream"] is True
+        
+        cached = [
+            event async for event in
+            service.stream_translate_text(text="Hello", target_language="Spanish")
+        ]
+        assert len(cached) == 1
+        assert cached[0][1].cached is True
+    
+    async def test_streamed_text_not_served_as_structured(self, service, fake_completions):
+        """Free-text stream results never answer a structured translation request."""
+        fake_completions.content = "Hola. Cultural note: a friendly greeting"
+        async for _ in service.stream_translate_text(text="Hello", target_language="Spanish"):
+            pass
+        
+        fake_completions.content = TRANSLATION_JSON
+        result = await service.translate_text(text="Hello", target_language="Spanish")
+        
+        assert result.cached is False
+        assert result.translated_text == "Hola"
+        assert len(fake_completions.calls) == 2
+    
+    async def test_streamed_image_not_served_as_structured(self, service, fake_completions, sample_image_bytes):
+        """Free-text stream results of an image stay out of the translate_image cache."""
+        fake_completions.content = "Salida. Cultural note: exit sign"
+        async for _ in service.stream_translate_image(image=sample_image_bytes, target_language="Spanish"):
+            pass
+        
+        fake_completions.content = TRANSLATION_JSON
+        result = await service.translate_image(image=sample_image_bytes, target_language="Spanish")
+        
+        assert result.cached is False
+        assert result.translated_text == "Hola"
+    
+    async def test_image_encoded_only_on_cache_miss(self, service, fake_completions, sample_image_bytes):
+        """The data URL is built for the model call, never for a cached answer."""
+        before = metrics.STAGE_LATENCY.count(route="background", stage="base64_encode")
+        
+        await service.translate_image(image=sample_image_bytes, target_language="Spanish")
+        await service.translate_image(image=sample_image_bytes, target_language="Spanish")
+        
+        assert metrics.STAGE_LATENCY.count(route="background", stage="base64_encode") == before + 1
+        image_url = fake_completions.calls[0]["messages"][-1]["content"][-1]["image_url"]["url"]
+        assert image_url.startswith("data:image/jpeg;base64,")
+    
+    async def test_model_tokens_recorded(self, service, fake_completions):
+        """Prompt and completion tokens are counted for plain and streamed calls."""
+        model = settings.TEXT_MODEL
+        tokens_in = metrics.MODEL_TOKENS.value(model=model, direction="in")
+        tokens_out = metrics.MODEL_TOKENS.value(model=model, direction="out")
+        
+        await service.translate_text(text="Tokens", target_language="Spanish")
+        fake_completions.content = "Translation: Hola"
+        async for _ in service.stream_translate_text(text="Stream", target_language="Spanish"):
+            pass
+        
+        assert fake_completions.calls[1]["stream_options"] == {"include_usage": True}
+        assert metrics.MODEL_TOKENS.value(model=model, direction="in") == tokens_in + 240
+        assert metrics.MODEL_TOKENS.value(model=model, direction="out") == tokens_out + 60
+        assert metrics.MODEL_IN_FLIGHT.value() == 0
+    
+    async def test_batch_packs_dedupes_and_preserves_order(self, service, fake_completions):
+        """Short texts sharing languages go out in one packed call."""
+        fake_completions.content = (
+            '[{"translation": "Hola", "cultural_context": "greeting"},'
+            ' {"translation": "Adiós", "cultural_context": "farewell"}]'
+        )
+        items = [
+            TextTranslationRequest(text="Hello", target_language="Spanish"),
+            TextTranslationRequest(text="Goodbye", target_language="Spanish"),
+            TextTranslationRequest(text="Hello ", target_language="Spanish"),
+        ]
+        
+        results = await service.translate_text_batch(items)
+        
+        assert len(fake_completions.calls) == 1
+        assert [r.translated_text for r in results] == ["Hola", "Adiós", "Hola"]
+        assert results[2].original_text == "Hello "
+    
+    async def test_packed_results_not_served_as_structured(self, service, fake_completions):
+        """Packed batch results are reused by batches but never answer translate_text."""
+        fake_completions.content = (
+            '[{"translation": "Hola", "cultural_context": "greeting"},'
+            ' {"translation": "Adiós", "cultural_context": "farewell"}]'
+        )
+        items = [
+            TextTranslationRequest(text="Hello", target_language="Spanish"),
+            TextTranslationRequest(text="Goodbye", target_language="Spanish"),
+        ]
+        await service.translate_text_batch(items)
+        again = await service.translate_text_batch(items)
+        
+        fake_completions.content = TRANSLATION_JSON
+        result = await service.translate_text(text="Hello", target_language="Spanish")
+        
+        assert all(r.cached for r in again)
+        assert result.cached is False
+        assert len(fake_completions.calls) == 2
+    
+    async def test_batch_falls_back_when_packed_reply_is_unusable(self, service, fake_completions):
+        """A packed reply that does not match the items is retried per item."""
+        fake_completions.content = TRANSLATION_JSON.replace("Hola", "Bonjour")
+        items = [
+            TextTranslationRequest(text="Hello", target_language="French"),
+            TextTranslationRequest(text="Goodbye", target_language="French"),
+            TextTranslationRequest(text="Thanks", target_language="German"),
+        ]
+        
+        results = await service.translate_text_batch(items)
+        
+        # One failed packed call, then two French singles and one German single
+        assert len(fake_completions.calls) == 4
+        assert all(r.translated_text == "Bonjour" for r in results)
+    
+    async def test_batch_reports_per_item_errors(self, service, fake_completions):
+        """A failing item does not fail the rest of the batch."""
+        create = fake_completions.create
+        
+        async def flaky(**kwargs):
+            if "Goodbye" in kwargs["messages"][1]["content"]:
+                raise RuntimeError("upstream down")
+            return await create(**kwargs)
+        fake_completions.create = flaky
+        
+        items = [
+            TextTranslationRequest(text="Hello", target_language="Spanish"),
+            TextTranslationRequest(text="Goodbye", target_language="German"),
+        ]
+        
+        results = await service.translate_text_batch(items)
+        
+        assert results[0].translated_text == "Hola"
+        assert isinstance(results[1], Exception)
+    
+    async def test_pdf_pages_analyzed_concurrently_and_merged(self, service, fake_completions, sample_pdf_file):
+        """Each PDF page gets one vision call, bounded by FORM_PAGE_CONCURRENCY."""
+        _, pdf_buffer, _ = sample_pdf_file
+        fake_completions.content = FORM_JSON
+        fake_completions.delay = 0.5
+        
+        with patch('app.core.config.settings.FORM_PAGE_CONCURRENCY', 2):
+            result = await service.analyze_pdf_form(
+                content=pdf_buffer.getvalue(),
+                target_language="English"
+            )
+        
+        assert len(fake_completions.calls) == 3
+        assert fake_completions.peak_in_flight == 2
+        image_url = fake_completions.calls[0]["messages"][1]["content"][1]["image_url"]["url"]
+        assert image_url.startswith("data:image/jpeg;base64,")
+        assert result.form_type == "Visa Application"
+        assert [field.field_name for field in result.fields] == ["full_name"]
+    
+    async def test_pdf_page_limit(self, service, sample_pdf_file):
+        """PDFs above FORM_MAX_PAGES are rejected before any model call."""
+        _, pdf_buffer, _ = sample_pdf_file
+        
+        with patch('app.core.config.settings.FORM_MAX_PAGES', 2):
+            with pytest.raises(PdfError, match="Maximum: 2"):
+                await service.analyze_pdf_form(content=pdf_buffer.getvalue(), target_language="English")
+    
+    async def test_structured_output_requests_schema(self, service, fake_completions):
+        """Translations request JSON-schema output and validate it in one pass."""
+        result = await service.translate_text(text="Hello", target_language="Spanish")
+        
+        response_format = fake_completions.calls[0]["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert "translated_text" in response_format["json_schema"]["schema"]["properties"]
+        assert "cached" not in response_format["json_schema"]["schema"]["properties"]
+        assert result.translated_text == "Hola"
+        assert result.context_explanation == "A common greeting"
+        assert service.structured_stats.stats()["translate_text"]["repairs"] == 0
+    
+    async def test_structured_output_single_repair_retry(self, service, fake_completions):
+        """An invalid reply gets exactly one repair retry."""
+        replies = iter(["Sure! The translation is Hola.", "```json\n" + TRANSLATION_JSON + "\n```"])
+        create = fake_completions.create
+        
+        async def reply(**kwargs):
+            fake_completions.content = next(replies)
+            return await create(**kwargs)
+        fake_completions.create = reply
+        
+        result = await service.translate_text(text="Hello", target_language="Spanish")
+        
+        assert result.translated_text == "Hola"
+        assert len(fake_completions.calls) == 2
+        assert fake_completions.calls[1]["messages"][-1]["role"] == "user"
+        stats = service.structured_stats.stats()["translate_text"]
+        assert stats["repairs"] == 1
+        assert stats["retry_rate"] == 1.0
+    
+    async def test_structured_output_fails_after_repair(self, service, fake_completions):
+        """A reply that is still invalid after the repair retry is an error."""
+        fake_completions.content = '{"translated_text": 42}'
+        
+        with pytest.raises(Exception, match="did not match"):
+            await service.analyze_form(document=b"", target_language="English", mime_type="application/pdf")
+        
+        assert len(fake_completions.calls) == 2
+        assert service.structured_stats.stats()["analyze_form"]["failures"] == 1
+    
+    async def test_identical_in_flight_requests_coalesce(self, service, fake_completions):
+        """Identical concurrent requests share one model call."""
+        results = await asyncio.gather(*[
+            service.translate_text(text="Where is the bus station?", target_language="Spanish")
+            for _ in range(5)
+        ])
+        
+        assert len(fake_completions.calls) == 1
+        assert all(r.translated_text == "Hola" for r in results)
+        assert service.single_flight.stats()["coalesced"] == 4
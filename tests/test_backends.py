@@ -0,0 +1,168 @@
+import asyncio
+import sys
+import threading
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.services.ai_service import AIService
+from app.services.backends import BackendUnavailableError, LocalBackend, text_conversation
+from app.services.cache import LRUCache, TranslationCache
+from app.services.router import ModelRouter, ModelTarget
+from tests.conftest import TRANSLATION_JSON
+
+
+class FakeEngine:
+    """Engine recording the batches it was asked to decode."""
+    
+    def __init__(self, reply=TRANSLATION_JSON, error=None):
+        self.reply = reply
+        self.error = error
+        self.batches = []
+    
+    def generate(self, conversations, max_new_tokens, temperature):
+        self.batches.append((len(conversations), max_new_tokens, temperature))
+        if self.error:
+            raise self.error
+        return [(self.reply, 10, 5) for _ in conversations]
+
+
+def messages(text):
+    return [{"role": "system", "content": "Translate."}, {"role": "user", "content": text}]
+
+
+class TestLocalBackend:
+    """Test suite for on-device inference with micro-batching."""
+    
+    async def test_concurrent_requests_share_a_batch(self):
+        """Requests arriving together are decoded in one generate call."""
+        engine = FakeEngine()
+        backend = LocalBackend("tiny", max_batch_size=8, batch_window=0.05, engine=engine)
+        
+        replies = await asyncio.gather(*[
+            backend.complete("tiny", messages(f"Text {i}"), max_tokens=64, temperature=0.3)
+            for i in range(5)
+        ])
+        
+        assert engine.batches == [(5, 64, 0.3)]
+        assert replies[0].content == TRANSLATION_JSON
+        assert replies[0].usage.prompt_tokens == 10
+        assert backend.stats()["mean_batch_size"] == 5.0
+        await backend.close()
+    
+    async def test_batch_size_is_capped(self):
+        """No batch exceeds max_batch_size."""
+        engine = FakeEngine()
+        backend = LocalBackend("tiny", max_batch_size=2, batch_window=0.05, engine=engine)
+        
+        await asyncio.gather(*[
+            backend.complete("tiny", messages("Hi"), max_tokens=64, temperature=0.3) for _ in range(5)
+        ])
+        
+        assert sorted(size for size, _, _ in engine.batches) == [1, 2, 2]
+        await backend.close()
+    
+    async def test_different_parameters_not_mixed(self):
+        """Requests with different generation parameters go into separate batches."""
+        engine = FakeEngine()
+        backend = LocalBackend("tiny", batch_window=0.05, engine=engine)
+        
+        await asyncio.gather(
+            backend.complete("tiny", messages("a"), max_tokens=64, temperature=0.3),
+            backend.complete("tiny", messages("b"), max_tokens=128, temperature=0.3),
+            backend.complete("tiny", messages("c"), max_tokens=64, temperature=0.3),
+        )
+        
+        assert sorted(engine.batches) == [(1, 128, 0.3), (2, 64, 0.3)]
+        await backend.close()
+    
+    async def test_engine_error_fails_the_batch(self):
+        """An engine failure is raised to every request in the batch."""
+        backend = LocalBackend("tiny", engine=FakeEngine(error=RuntimeError("out of memory")))
+        
+        with pytest.raises(RuntimeError, match="out of memory"):
+            await backend.complete("tiny", messages("Hi"), max_tokens=64, temperature=0.3)
+        await backend.close()
+    
+    async def test_missing_dependencies(self):
+        """Without the optional packages the backend reports what is missing."""
+        backend = LocalBackend("tiny")
+        
+        with patch.dict(sys.modules, {"torch": None, "transformers": None}):
+            with pytest.raises(BackendUnavailableError, match="optional 'local' dependencies"):
+                await backend.complete("tiny", messages("Hi"), max_tokens=64, temperature=0.3)
+        await backend.close()
+    
+    async def test_stream_yields_whole_reply(self):
+        """Streaming from the local backend yields the reply and its usage."""
+        backend = LocalBackend("tiny", engine=FakeEngine(reply="Hola"))
+        
+        stream = await backend.stream("tiny", messages("Hi"), max_tokens=64, temperature=0.3)
+        chunks = [chunk async for chunk in stream]
+        
+        assert chunks[0][0] == "Hola"
+        assert chunks[0][1].completion_tokens == 5
+        await backend.close()
+    
+    async def test_close_fails_waiting_requests(self):
+        """Requests queued or being decoded when the backend closes fail instead of hanging."""
+        release = threading.Event()
+        
+        class BlockingEngine(FakeEngine):
+            def generate(self, conversations, max_new_tokens, temperature):
+                release.wait(5)
+                return super().generate(conversations, max_new_tokens, temperature)
+        
+        backend = LocalBackend("tiny", max_batch_size=1, batch_window=0, engine=BlockingEngine())
+        requests = [
+            asyncio.create_task(backend.complete("tiny", messages(f"Text {i}"), max_tokens=64, temperature=0.3))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.05)
+        
+        await backend.close()
+        release.set()
+        results = await asyncio.wait_for(asyncio.gather(*requests, return_exceptions=True), 1)
+        
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert str(results[0]) == "backend closed"
+    
+    def test_text_conversation(self):
+        """The system prompt is folded into the first user turn; images are rejected."""
+        conversation = text_conversation([
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": [{"type": "text", "text": "Hello"}]},
+        ])
+        
+        assert conversation == [{"role": "user", "content": "Be brief.\n\nHello"}]
+        with pytest.raises(ValueError, match="only supports text"):
+            text_conversation([{"role": "user", "content": [{"type": "image_url", "image_url": {"url": "x"}}]}])
+
+
+class TestLocalRouting:
+    """Test suite for routing AIService calls to the local backend."""
+    
+    async def test_local_target_serves_text_translation(self):
+        """Targets written as model@local run on the local backend."""
+        engine = FakeEngine()
+        service = AIService(cache=TranslationCache(LRUCache(max_entries=100, ttl=60)))
+        service.routers["text"] = ModelRouter([ModelTarget(model="tiny", base_url="local")])
+        service.local_backends["tiny"] = LocalBackend("tiny", engine=engine)
+        service._client = SimpleNamespace()
+        
+        result = await service.translate_text(text="Hello", target_language="Spanish")
+        
+        assert result.translated_text == "Hola"
+        assert len(engine.batches) == 1
+        await service.local_backends["tiny"].close()
+    
+    async def test_close_forgets_local_backends(self):
+        """Closed local backends are dropped so the next call builds a fresh one."""
+        service = AIService(cache=TranslationCache(LRUCache(max_entries=100, ttl=60)))
+        backend = LocalBackend("tiny", engine=FakeEngine())
+        service.local_backends["tiny"] = backend
+        
+        await service.close()
+        
+        assert service.local_backends == {}
+        assert backend._executor._shutdown is True
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch
+
+from app.models.translation import TranslationResponse
+from app.services.cache import LRUCache, SQLiteCache, TranslationCache
+
+
+@pytest.fixture
+def translation():
+    return TranslationResponse(
+        original_text="Hello",
+        translated_text="Hola",
+        source_language="English",
+        target_language="Spanish"
+    )
+
+
+class TestTranslationCache:
+    """Test suite for the translation cache tiers."""
+    
+    def test_lru_evicts_least_recently_used(self):
+        cache = LRUCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_lru_expires_entries(self):
+        cache = LRUCache(max_entries=2, ttl=60)
+        with patch('app.services.cache.time.monotonic', return_value=0):
+            cache.set("a", 1)
+        with patch('app.services.cache.time.monotonic', return_value=61):
+            assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_key_depends_on_model_and_context(self):
+        key = TranslationCache.make_key("Hello", "Spanish", None, None, "model-a")
+        
+        assert key == TranslationCache.make_key(" Hello ", "spanish", "", "", "model-a")
+        assert key != TranslationCache.make_key("Hello", "Spanish", None, None, "model-b")
+        assert key != TranslationCache.make_key("Hello", "Spanish", None, "greeting", "model-a")
+    
+    async def test_disk_tier_shared_between_instances(self, tmp_path, translation):
+        path = str(tmp_path / "cache.db")
+        writer = TranslationCache(LRUCache(10, 60), SQLiteCache(path, ttl=60))
+        reader = TranslationCache(LRUCache(10, 60), SQLiteCache(path, ttl=60))
+        
+        await writer.set("key", translation)
+        result = await reader.get("key")
+        
+        assert result is not None
+        assert result.translated_text == "Hola"
+        assert result.cached is True
+        assert reader.stats()["disk_hits"] == 1
+        assert len(reader.memory) == 1
+    
+    async def test_stats_count_misses(self):
+        cache = TranslationCache(LRUCache(10, 60))
+        
+        assert await cache.get("missing") is None
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hit_rate"] == 0.0
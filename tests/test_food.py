@@ -0,0 +1,322 @@
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core.config import settings
+from app.models.food import DetectedIngredient, FoodIdentification
+from app.services.food import ConditionMatrix
+from tests.conftest import FakeCompletions
+
+
+FOOD_JSON = json.dumps({
+    "dish": "Chocolate cake",
+    "ingredients": [
+        {"name": "wheat flour", "confidence": 0.95},
+        {"name": "Eggs", "confidence": 0.9},
+        {"name": "sugar", "confidence": 0.95},
+        {"name": "cocoa", "confidence": 0.8},
+        {"name": "edible glitter", "confidence": 0.6}
+    ]
+})
+
+
+SOURCE = {
+    "conditions": [
+        {"id": "celiac_disease", "name": "Celiac disease", "aliases": ["gluten intolerance"]},
+        {"id": "diabetes", "name": "Diabetes", "names": {"Polish": ["cukrzyca"]}},
+        {"id": "egg_allergy", "name": "Egg allergy"},
+        {"id": "tree_nut_allergy", "name": "Tree nut allergy"},
+    ],
+    "ingredients": {
+        "wheat flour": {"celiac_disease": [1.0, "Contains gluten"]},
+        "sugar": {"diabetes": [0.9, "High in sugar"]},
+        "honey": {"diabetes": [0.8, "High in sugar"]},
+        "egg": {"egg_allergy": [1.0, "Contains egg"]},
+        "potato": {},
+        "almond": {"tree_nut_allergy": [1.0, "Contains tree nuts"]},
+        "milk": {},
+        "almond cake": {"tree_nut_allergy": [1.0, "Made with ground almonds"], "egg_allergy": [0.9, "Contains egg"]},
+    },
+    "synonyms": {"wheat flour": {"German": ["Weizenmehl"]}, "egg": {"Ukrainian": ["яйце"]}},
+}
+
+
+def small_matrix(**options):
+    return ConditionMatrix.from_source(SOURCE, **options)
+
+
+def dish(*ingredients):
+    return FoodIdentification(
+        dish="Test dish",
+        ingredients=[DetectedIngredient(name=name, confidence=confidence) for name, confidence in ingredients]
+    )
+
+
+class TestConditionMatrix:
+    """Test suite for the ingredient-to-condition matrix."""
+    
+    def test_resolve_names_and_aliases(self):
+        """Condition ids, names and aliases resolve case-insensitively."""
+        matrix = small_matrix()
+        
+        ids, unknown = matrix.resolve(["Gluten Intolerance", "diabetes", "celiac_disease", "gout"])
+        
+        assert ids == ["celiac_disease", "diabetes"]
+        assert unknown == ["gout"]
+        assert matrix.resolve([])[0] == ["celiac_disease", "diabetes", "egg_allergy", "tree_nut_allergy"]
+    
+    def test_rows_lookup_falls_back(self):
+        """Plurals and longer names find their base ingredient."""
+        matrix = small_matrix()
+        
+        assert matrix.rows("Eggs") == matrix.rows("egg")
+        assert matrix.rows("whole-wheat flour") == matrix.rows("wheat flour")
+        assert matrix.rows("potatoes") == matrix.rows("potato")
+        assert matrix.rows("glitter") == []
+    
+    def test_rows_keep_leading_words(self):
+        """Every ingredient in a compound name is found, longest names first."""
+        matrix = small_matrix()
+        names = lambda ingredient: [matrix.index.ingredient_name(row) for row in matrix.rows(ingredient)]
+        
+        assert names("almond milk") == ["almond", "milk"]
+        assert names("almond cakes") == ["almond cake"]
+        assert names("sugar and honey glaze") == ["sugar", "honey"]
+    
+    def test_compound_name_is_not_safe(self):
+        """An allergen leading a compound ingredient name is scored."""
+        result = small_matrix().check(dish(("almond milk", 1.0)), ["tree_nut_allergy"])
+        
+        assert result.assessments[0].verdict == "avoid"
+        assert result.assessments[0].triggers[0].ingredient == "almond"
+    
+    def test_multilingual_names(self):
+        """Ingredients and conditions are found by their names in other languages."""
+        matrix = small_matrix()
+        
+        result = matrix.check(dish(("Weizenmehl", 0.9), ("Яйце", 0.9)), ["celiac_disease", "egg_allergy"])
+        
+        assert [a.triggers[0].ingredient for a in result.assessments] == ["wheat flour", "egg"]
+        assert matrix.resolve(["Cukrzyca"])[0] == ["diabetes"]
+    
+    def test_verdicts(self):
+        """The riskiest ingredient decides each condition's verdict."""
+        matrix = small_matrix()
+        
+        result = matrix.check(
+            dish(("wheat flour", 1.0), ("sugar", 0.5), ("potato", 1.0)),
+            ["celiac_disease", "diabetes", "egg_allergy"]
+        )
+        
+        verdicts = {a.condition: (a.verdict, a.risk) for a in result.assessments}
+        assert verdicts == {
+            "celiac_disease": ("avoid", 1.0),
+            "diabetes": ("caution", 0.45),
+            "egg_allergy": ("safe", 0.0),
+        }
+        assert result.assessments[0].triggers[0].reason == "Contains gluten"
+        assert result.assessments[2].triggers == []
+    
+    def test_triggers_sorted_by_risk(self):
+        """Triggers list every contributing ingredient, riskiest first."""
+        matrix = small_matrix()
+        
+        result = matrix.check(dish(("honey", 1.0), ("sugar", 1.0)), ["diabetes"])
+        
+        assert [t.ingredient for t in result.assessments[0].triggers] == ["sugar", "honey"]
+    
+    def test_unsure_and_unknown_ingredients(self):
+        """Unlikely ingredients are not scored and unknown ones are reported."""
+        matrix = small_matrix(min_confidence=0.3)
+        
+        result = matrix.check(dish(("potato", 1.0), ("egg", 0.1), ("glitter", 0.2)), ["egg_allergy", "diabetes"])
+        
+        verdicts = {a.condition: (a.verdict, a.risk) for a in result.assessments}
+        assert verdicts == {"egg_allergy": ("unknown", 0.0), "diabetes": ("safe", 0.0)}
+        assert result.unrecognized_ingredients == ["glitter"]
+        assert "egg" in result.note
+    
+    def test_unsure_allergen_is_never_safe(self):
+        """A known allergen below min_confidence leaves the verdict unknown, not safe."""
+        matrix = small_matrix(min_confidence=0.3)
+        
+        unsure = matrix.check(dish(("egg", 0.2)), ["egg_allergy"]).assessments[0]
+        likely = matrix.check(dish(("egg", 0.9)), ["egg_allergy"]).assessments[0]
+        
+        assert (unsure.verdict, unsure.risk) == ("unknown", 0.0)
+        assert likely.verdict == "avoid"
+    
+    def test_unscored_ingredient_is_never_safe(self):
+        """A likely ingredient missing from the index turns safe verdicts into unknown."""
+        result = small_matrix().check(
+            dish(("potato", 1.0), ("satay sauce", 0.9), ("sugar", 1.0)),
+            ["egg_allergy", "diabetes"]
+        )
+        
+        verdicts = {a.condition: a.verdict for a in result.assessments}
+        assert verdicts == {"egg_allergy": "unknown", "diabetes": "avoid"}
+        assert result.unrecognized_ingredients == ["satay sauce"]
+        assert "satay sauce" in result.note
+    
+    def test_nothing_recognized_is_unknown(self):
+        """Without any known ingredient no verdict is given."""
+        result = small_matrix().check(dish(("glitter", 0.9)), ["diabetes"])
+        
+        assert result.assessments[0].verdict == "unknown"
+    
+    def test_unknown_condition_in_data(self):
+        """Risks for undeclared conditions are rejected at load time."""
+        source = {"conditions": [{"id": "gout", "name": "Gout"}], "ingredients": {"beer": {"gaut": [1.0, "typo"]}}}
+        
+        with pytest.raises(ValueError, match="unknown condition"):
+            ConditionMatrix.from_source(source)
+    
+    def test_bundled_data_loads(self):
+        """The shipped matrix covers the conditions of the original prototype."""
+        with open(settings.FOOD_CONDITIONS_PATH, encoding="utf-8") as f:
+            matrix = ConditionMatrix.from_source(json.load(f))
+        
+        ids, unknown = matrix.resolve([
+            "hashimoto's disease", "celiac disease", "lupus", "multiple sclerosis",
+            "arthritis", "diabetes", "heart disease"
+        ])
+        
+        assert unknown == []
+        assert len(ids) == 7
+        assert len(matrix.conditions) == matrix.index.condition_count
+
+
+class TestIdentifyFood:
+    """Test suite for food identification."""
+    
+    @pytest.fixture
+    def fake_completions(self):
+        return FakeCompletions(content=FOOD_JSON, delay=0)
+    
+    async def test_identification_is_cached_per_image(self, service, fake_completions, sample_image_bytes):
+        """A repeated photo is identified once."""
+        first = await service.identify_food(sample_image_bytes)
+        second = await service.identify_food(sample_image_bytes)
+        
+        assert first.dish == "Chocolate cake"
+        assert not first.cached
+        assert second.cached
+        assert len(fake_completions.calls) == 1
+    
+    async def test_structured_request(self, service, fake_completions, sample_image_bytes):
+        """Identification asks for the FoodIdentification schema with the image attached."""
+        await service.identify_food(sample_image_bytes, context="menu: Sachertorte")
+        
+        call = fake_completions.calls[0]
+        assert call["response_format"]["json_schema"]["name"] == "FoodIdentificationOutput"
+        assert "menu: Sachertorte" in call["messages"][-1]["content"][0]["text"]
+
+
+class TestFoodApi:
+    """Test suite for food endpoints."""
+    
+    def test_check_scores_requested_conditions(self, client, sample_image_file):
+        """One identification is scored against every requested condition."""
+        filename, file_content, content_type = sample_image_file
+        identification = FoodIdentification.model_validate_json(FOOD_JSON)
+        
+        with patch('app.api.v1.endpoints.food.ai_service') as mock_service:
+            mock_service.identify_food = AsyncMock(return_value=identification)
+            response = client.post(
+                "/api/v1/food/check",
+                data={"conditions": ["celiac disease, diabetes", "lupus"]},
+                files={"image": (filename, file_content, content_type)}
+            )
+        
+        assert response.status_code == 200
+        data = response.json()
+        verdicts = {a["condition"]: a["verdict"] for a in data["assessments"]}
+        # Edible glitter is not in the matrix, so nothing is called safe
+        assert verdicts == {"celiac_disease": "avoid", "diabetes": "avoid", "lupus": "unknown"}
+        assert data["unrecognized_ingredients"] == ["edible glitter"]
+        mock_service.identify_food.assert_called_once()
+    
+    def test_check_unknown_condition(self, client, sample_image_file):
+        """Unknown conditions are rejected before the model is called."""
+        filename, file_content, content_type = sample_image_file
+        
+        with patch('app.api.v1.endpoints.food.ai_service') as mock_service:
+            mock_service.identify_food = AsyncMock()
+            response = client.post(
+                "/api/v1/food/check",
+                data={"conditions": "diabetes,edge addiction"},
+                files={"image": (filename, file_content, content_type)}
+            )
+        
+        assert response.status_code == 400
+        assert "edge addiction" in response.json()["detail"]
+        mock_service.identify_food.assert_not_called()
+    
+    def test_check_invalid_file_type(self, client):
+        """Non-image uploads are rejected."""
+        response = client.post(
+            "/api/v1/food/check",
+            files={"image": ("menu.txt", b"cake", "text/plain")}
+        )
+        
+        assert response.status_code == 400
+    
+    def test_check_service_error(self, client, sample_image_file):
+        """Identification failures are reported as server errors."""
+        filename, file_content, content_type = sample_image_file
+        
+        with patch('app.api.v1.endpoints.food.ai_service') as mock_service:
+            mock_service.identify_food = AsyncMock(side_effect=Exception("model down"))
+            response = client.post(
+                "/api/v1/food/check",
+                files={"image": (filename, file_content, content_type)}
+            )
+        
+        assert response.status_code == 500
+        assert "Food check failed" in response.json()["detail"]
+    
+    def test_check_ingredient_list(self, client):
+        """Ingredient lists are checked without calling the model."""
+        with patch('app.api.v1.endpoints.food.ai_service') as mock_service:
+            response = client.post(
+                "/api/v1/food/check/ingredients",
+                json={"ingredients": ["harina de trigo", "Zucker"], "conditions": ["Zöliakie"]}
+            )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["dish"] == "Ingredient list"
+        assert data["assessments"][0]["condition"] == "celiac_disease"
+        assert data["assessments"][0]["verdict"] == "avoid"
+        assert not mock_service.method_calls
+    
+    def test_check_ingredient_list_with_unknown_ingredient(self, client):
+        """An unknown ingredient keeps a condition from being called safe."""
+        response = client.post(
+            "/api/v1/food/check/ingredients",
+            json={"ingredients": ["rice", "satay sauce"], "conditions": ["peanut allergy"]}
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["assessments"][0]["verdict"] == "unknown"
+        assert data["unrecognized_ingredients"] == ["satay sauce"]
+    
+    @pytest.mark.parametrize("ingredient", ["almond milk", "cashew nut butter"])
+    def test_check_ingredient_list_compound_names(self, client, ingredient):
+        """Nut milks and butters are flagged for tree nut allergies."""
+        response = client.post(
+            "/api/v1/food/check/ingredients",
+            json={"ingredients": [ingredient], "conditions": ["tree nut allergy"]}
+        )
+        
+        assert response.json()["assessments"][0]["verdict"] == "avoid"
+    
+    def test_list_conditions(self, client):
+        """Available conditions are listed with their aliases."""
+        response = client.get("/api/v1/food/conditions")
+        
+        assert response.status_code == 200
+        conditions = {condition["id"]: condition for condition in response.json()}
+        assert "celiac_disease" in conditions
+        assert conditions["celiac_disease"]["names"]["German"] == ["Zöliakie"]
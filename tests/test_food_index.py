@@ -0,0 +1,141 @@
+import json
+import numpy as np
+import pytest
+
+from app.services.food_index import FoodIndex, build_index, normalize, write_index
+
+
+SOURCE = {
+    "conditions": [
+        {"id": "celiac_disease", "name": "Celiac disease", "aliases": ["coeliac disease"],
+         "names": {"German": ["Zöliakie"], "Ukrainian": ["целіакія"]}},
+        {"id": "gout", "name": "Gout"},
+        {"id": "diabetes", "name": "Diabetes"},
+    ],
+    "ingredients": {
+        "wheat flour": {"celiac_disease": [1.0, "Contains gluten"]},
+        "beer": {"gout": [1.0, "Raises uric acid"], "celiac_disease": [1.0, "Contains gluten"], "diabetes": [0.4, "Alcohol"]},
+        "rice": {},
+        "sugar": {"diabetes": [0.9, "High in sugar"]},
+    },
+    "synonyms": {
+        "wheat flour": {"English": ["plain flour"], "French": ["farine de blé"], "Arabic": ["دقيق القمح"]},
+        "rice": {"Arabic": ["أرز"]},
+    },
+}
+
+
+@pytest.fixture
+def source_path(tmp_path):
+    path = tmp_path / "food_conditions.json"
+    path.write_text(json.dumps(SOURCE, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+class TestNormalize:
+    """Test suite for name normalization."""
+    
+    def test_folds_case_accents_and_punctuation(self):
+        """Spelling variants share one lookup form."""
+        assert normalize("Crème-Fraîche ") == normalize("creme fraiche") == "creme fraiche"
+        assert normalize("Farine de BLÉ") == "farine de ble"
+    
+    def test_keeps_other_scripts(self):
+        """Non-Latin names survive, with diacritics such as hamza folded."""
+        assert normalize("Пшеничне Борошно") == "пшеничне борошно"
+        assert normalize("أرز") == normalize("ارز")
+
+
+class TestFoodIndex:
+    """Test suite for the memory-mapped food index."""
+    
+    def test_lookup_by_any_name(self):
+        """Canonical names, synonyms and translations find the same row."""
+        index = FoodIndex.compile(SOURCE)
+        
+        row = index.ingredient(normalize("wheat flour"))
+        assert index.ingredient(normalize("Plain Flour")) == row
+        assert index.ingredient(normalize("farine de ble")) == row
+        assert index.ingredient(normalize("دقيق القمح")) == row
+        assert index.ingredient(normalize("ارز")) == index.ingredient("rice")
+        assert index.ingredient("flour") is None
+        assert index.ingredient_name(row) == "wheat flour"
+    
+    def test_condition_names(self):
+        """Conditions are found by id, name, alias or translation."""
+        index = FoodIndex.compile(SOURCE)
+        
+        assert {index.condition(normalize(name)) for name in (
+            "celiac_disease", "Celiac disease", "coeliac disease", "Zöliakie", "ЦЕЛІАКІЯ"
+        )} == {0}
+        info = index.condition_info(0)
+        assert info.aliases == ["coeliac disease"]
+        assert info.names == {"German": ["Zöliakie"], "Ukrainian": ["целіакія"]}
+    
+    def test_sparse_risks_match_source(self):
+        """The CSR risks reproduce every ingredient-condition pair."""
+        index = FoodIndex.compile(SOURCE)
+        rows = np.array([index.ingredient("sugar"), index.ingredient("rice"), index.ingredient("beer")])
+        
+        owners, columns, scores, reasons = index.risks(rows)
+        
+        pairs = {(int(o), index.condition_id(c), round(float(s), 2), index.string(r))
+                 for o, c, s, r in zip(owners, columns, scores, reasons)}
+        assert pairs == {
+            (0, "diabetes", 0.9, "High in sugar"),
+            (2, "celiac_disease", 1.0, "Contains gluten"),
+            (2, "gout", 1.0, "Raises uric acid"),
+            (2, "diabetes", 0.4, "Alcohol"),
+        }
+    
+    def test_conflicting_names_rejected(self):
+        """One name may not point at two ingredients."""
+        source = {**SOURCE, "synonyms": {"rice": {"English": ["Wheat-Flour"]}}}
+        
+        with pytest.raises(ValueError, match="refers to both"):
+            build_index(source)
+    
+    def test_synonyms_for_unknown_ingredient(self):
+        """Synonyms must belong to a known ingredient."""
+        with pytest.raises(ValueError, match="unknown ingredient"):
+            build_index({**SOURCE, "synonyms": {"ryce": {"English": ["paddy"]}}})
+    
+    def test_file_round_trip_is_mapped(self, tmp_path, source_path):
+        """A written index opens as a memory map with the same contents."""
+        path = str(tmp_path / "food_index.bin")
+        write_index(path, source_path)
+        
+        index = FoodIndex.open(path)
+        
+        assert index.stats()["mapped"]
+        assert index.stats()["ingredient_names"] == 8
+        assert index.ingredient(normalize("farine de blé")) == 0
+        index.close()
+    
+    def test_not_an_index(self, tmp_path):
+        """Other files are rejected."""
+        path = tmp_path / "food_index.bin"
+        path.write_bytes(b"PHRPACK1" + bytes(16))
+        
+        with pytest.raises(ValueError, match="Not a food index"):
+            FoodIndex.open(str(path))
+    
+    def test_load_rebuilds_stale_index(self, tmp_path, source_path):
+        """Editing the source data rebuilds the index on the next load."""
+        path = str(tmp_path / "food_index.bin")
+        FoodIndex.load(path, source_path).close()
+        
+        changed = {**SOURCE, "ingredients": {**SOURCE["ingredients"], "honey": {"diabetes": [0.8, "Sugar"]}}}
+        with open(source_path, "w", encoding="utf-8") as f:
+            json.dump(changed, f)
+        index = FoodIndex.load(path, source_path)
+        
+        assert index.ingredient("honey") == 4
+        index.close()
+    
+    def test_load_falls_back_to_memory(self, tmp_path, source_path):
+        """An index that cannot be written is served from memory."""
+        index = FoodIndex.load(str(tmp_path / "missing" / "food_index.bin"), source_path)
+        
+        assert not index.stats()["mapped"]
+        assert index.ingredient("beer") == 1
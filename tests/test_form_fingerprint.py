@@ -0,0 +1,141 @@
+import pytest
+from io import BytesIO
+from unittest.mock import AsyncMock, patch
+from PIL import Image, ImageDraw
+
+from app.services.form_fingerprint import (
+    Fingerprint,
+    FormFingerprintIndex,
+    fingerprint,
+    form_fingerprints,
+    layout_hash
+)
+
+
+def form_page(rows, size=(850, 1100), filled=False, fmt="PNG"):
+    """Render a synthetic form: a header band, boxed fields at ``rows`` and a signature line."""
+    page = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(page)
+    width, height = size
+    scale = lambda y: int(y * height / 1100)
+    draw.rectangle([40, scale(40), width - 40, scale(120)], fill="black")
+    for y, split in rows:
+        draw.rectangle([60, scale(y), int(split * width), scale(y + 50)], outline="black", width=4)
+        draw.rectangle([int(split * width) + 20, scale(y), width - 60, scale(y + 50)], outline="black", width=4)
+        if filled:
+            draw.line([80, scale(y + 30), 200, scale(y + 20)], fill="blue", width=2)
+    draw.line([60, scale(1040), width // 2, scale(1040)], fill="black", width=3)
+    buffer = BytesIO()
+    page.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+FORM_A = [(180, 0.5), (260, 0.3), (340, 0.7), (520, 0.5), (600, 0.4)]
+FORM_B = [(300, 0.6), (700, 0.35), (780, 0.55), (860, 0.5), (940, 0.65)]
+
+
+@pytest.fixture
+def index():
+    index = FormFingerprintIndex()
+    index.add("form-a", fingerprint(form_page(FORM_A)))
+    return index
+
+
+class TestFormFingerprint:
+    """Test suite for known-form fingerprinting."""
+    
+    def test_layout_hash_stable_across_resolution(self):
+        """Rescaling a page leaves its layout hash nearly unchanged."""
+        with Image.open(BytesIO(form_page(FORM_A))) as full:
+            small = full.resize((425, 550))
+            assert (layout_hash(full) ^ layout_hash(small)).bit_count() <= 4
+    
+    def test_filled_copy_matches(self, index):
+        """A filled-in, re-encoded copy of a reference page is recognized."""
+        copy = fingerprint(form_page(FORM_A, size=(1275, 1650), filled=True, fmt="JPEG"))
+        
+        assert index.match(copy) == "form-a"
+        assert index.stats()["matches"] == 1
+    
+    def test_other_form_does_not_match(self, index):
+        """A page with a different layout is left to the model."""
+        assert index.match(fingerprint(form_page(FORM_B))) is None
+        assert index.stats()["misses"] == 1
+    
+    def test_save_and_load_round_trip(self, index, tmp_path):
+        """Fingerprints built offline are served after a reload."""
+        path = str(tmp_path / "fingerprints.json")
+        index.save(path)
+        
+        loaded = FormFingerprintIndex.load(path)
+        
+        assert len(loaded) == 1
+        assert loaded.match(fingerprint(form_page(FORM_A))) == "form-a"
+    
+    def test_pages_sharing_visual_hash_kept_apart(self, index):
+        """Pages with the same visual hash are told apart by layout and removed one at a time."""
+        print_ = fingerprint(form_page(FORM_A))
+        other = Fingerprint(layout=print_.layout ^ ((1 << 64) - 1), visual=print_.visual)
+        index.add("form-a-copy", other)
+        
+        assert len(index) == 2
+        assert index.match(other) == "form-a-copy"
+        assert index.match(print_) == "form-a"
+        
+        index.remove("form-a")
+        
+        assert len(index) == 1
+        assert index.match(print_) is None
+        assert index.match(other) == "form-a-copy"
+    
+    def test_re_adding_page_replaces_it(self, index):
+        """A page fingerprinted again replaces its earlier reference."""
+        index.add("form-a", fingerprint(form_page(FORM_B)))
+        
+        assert len(index) == 1
+        assert index.match(fingerprint(form_page(FORM_A))) is None
+        assert index.match(fingerprint(form_page(FORM_B))) == "form-a"
+    
+    def test_undecodable_upload(self):
+        """Bytes that are not an image have no fingerprint."""
+        assert fingerprint(b"not an image") is None
+
+
+class TestFormFingerprintAPI:
+    """Test suite for the fingerprint stage of /forms/analyze."""
+    
+    @pytest.fixture
+    def known_form(self):
+        print_ = fingerprint(form_page(FORM_A))
+        form_fingerprints.add("employment-auth-us", print_)
+        yield
+        form_fingerprints.remove("employment-auth-us")
+    
+    def test_recognized_page_skips_model(self, client, known_form):
+        """A photographed known form is answered without a document type hint."""
+        with patch('app.api.v1.endpoints.forms.ai_service') as mock_service:
+            mock_service.analyze_form = AsyncMock()
+            response = client.post(
+                "/api/v1/forms/analyze",
+                data={"target_language": "Spanish"},
+                files={"document": ("scan.jpg", form_page(FORM_A, filled=True, fmt="JPEG"), "image/jpeg")}
+            )
+        
+        assert response.status_code == 200
+        assert response.headers["X-Form-Template"] == "employment-auth-us"
+        assert response.json()["cached"] is True
+        mock_service.analyze_form.assert_not_called()
+    
+    def test_recognized_pdf_skips_model(self, client, known_form):
+        """The first page of a PDF is fingerprinted too."""
+        with patch('app.api.v1.endpoints.forms.ai_service') as mock_service:
+            mock_service.analyze_pdf_form = AsyncMock()
+            response = client.post(
+                "/api/v1/forms/analyze",
+                data={"target_language": "English"},
+                files={"document": ("form.pdf", form_page(FORM_A, fmt="PDF"), "application/pdf")}
+            )
+        
+        assert response.status_code == 200
+        assert response.headers["X-Form-Template"] == "employment-auth-us"
+        mock_service.analyze_pdf_form.assert_not_called()
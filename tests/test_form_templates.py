@@ -0,0 +1,134 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.models.forms import FormAnalysisResponse, FormTemplate, TemplateField
+from app.services.form_templates import FormTemplateStore, form_template_store
+
+
+@pytest.fixture
+def store():
+    return FormTemplateStore([
+        FormTemplate(
+            id="benefit-fr",
+            name="French Housing Aid (CAF)",
+            country="FR",
+            category="benefits",
+            description="Housing aid application",
+            aliases=["CAF APL"],
+            fields=[TemplateField(field_name="rent", field_type="number", label="Loyer mensuel", example_value="540")],
+            field_explanations={
+                "English": {"rent": "Your monthly rent without charges."},
+                "Spanish": {"rent": "Su alquiler mensual sin gastos."}
+            },
+            tips={"English": ["Attach your lease."]}
+        )
+    ])
+
+
+class TestFormTemplateStore:
+    """Test suite for the form template knowledge base."""
+    
+    def test_shipped_templates_load(self):
+        """The bundled knowledge base covers the catalogued forms."""
+        assert len(form_template_store) >= 4
+        assert form_template_store.match("I-765").id == "employment-auth-us"
+    
+    def test_indexes(self, store):
+        """Lookups by country, category and both are case-insensitive."""
+        assert [t.id for t in store.find(country="fr")] == ["benefit-fr"]
+        assert [t.id for t in store.find(category="Benefits")] == ["benefit-fr"]
+        assert [t.id for t in store.find("FR", "benefits")] == ["benefit-fr"]
+        assert store.find("US", "benefits") == []
+    
+    def test_match_by_alias_and_country(self, store):
+        """Form numbers match regardless of case and punctuation."""
+        assert store.match("caf-apl").id == "benefit-fr"
+        assert store.match("CAF APL", country="FR").id == "benefit-fr"
+        assert store.match("CAF APL", country="DE") is None
+        assert store.match(None) is None
+    
+    def test_analysis_memoized_per_language(self, store):
+        """A template's analysis is built once per language and reused."""
+        template = store.get("benefit-fr")
+        
+        first = store.analysis(template, "spanish")
+        second = store.analysis(template, "Spanish")
+        
+        assert first is second
+        assert first.cached is True
+        assert first.fields[0].explanation == "Su alquiler mensual sin gastos."
+        assert store.analysis(template, "Arabic") is None
+        assert store.stats()["memoized_analyses"] == 1
+    
+    def test_explain_field_by_label(self, store):
+        """Fields can be looked up by name or printed label."""
+        template = store.get("benefit-fr")
+        
+        explanation = store.explain_field(template, "Loyer mensuel", "English")
+        
+        assert explanation["field_name"] == "rent"
+        assert explanation["example_values"] == ["540"]
+        assert explanation["tips"] == ["Attach your lease."]
+        assert store.explain_field(template, "unknown", "English") is None
+
+
+class TestFormTemplateAPI:
+    """Test suite for endpoints served from the template store."""
+    
+    def test_analyze_known_form_skips_model(self, client, sample_image_file):
+        """A recognized document type is answered without a model call."""
+        with patch('app.api.v1.endpoints.forms.ai_service') as mock_service:
+            mock_service.analyze_form = AsyncMock()
+            response = client.post(
+                "/api/v1/forms/analyze",
+                data={"target_language": "Ukrainian", "document_type": "I-765"},
+                files={"document": sample_image_file}
+            )
+        
+        assert response.status_code == 200
+        assert response.headers["X-Form-Template"] == "employment-auth-us"
+        data = response.json()
+        assert data["cached"] is True
+        assert data["fields"][0]["field_name"] == "full_name"
+        mock_service.analyze_form.assert_not_called()
+    
+    def test_analyze_unsupported_language_uses_model(
+        self, client, sample_image_file, mock_form_analysis_response
+    ):
+        """Languages without precomputed explanations still go to the model."""
+        with patch('app.api.v1.endpoints.forms.ai_service') as mock_service:
+            mock_service.analyze_form = AsyncMock(
+                return_value=FormAnalysisResponse(**mock_form_analysis_response)
+            )
+            response = client.post(
+                "/api/v1/forms/analyze",
+                data={"target_language": "Pashto", "document_type": "I-765"},
+                files={"document": sample_image_file}
+            )
+        
+        assert response.status_code == 200
+        mock_service.analyze_form.assert_called_once()
+    
+    def test_explain_known_field(self, client):
+        """Fields of known forms get their precomputed explanation."""
+        response = client.post("/api/v1/forms/explain", json={
+            "field_name": "passport_number",
+            "field_context": "Personal details",
+            "form_type": "I-94",
+            "target_language": "Spanish"
+        })
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["template_id"] == "visa-application-us"
+        assert data["explanation"].startswith("El número de documento")
+        assert data["example_values"] == ["X1234567"]
+    
+    def test_templates_flag_precomputed_language(self, client):
+        """The catalogue shows which templates are precomputed for a language."""
+        response = client.get("/api/v1/forms/templates?country=DE&language=ukrainian")
+        
+        assert response.status_code == 200
+        templates = response.json()["templates"]
+        assert [t["id"] for t in templates] == ["residence-permit-de"]
+        assert templates[0]["precomputed"] is True
@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 from app.models.forms import FormAnalysisResponse
 
 
@@ -48,6 +48,35 @@ class TestFormsAPI:
         assert response.status_code == 400
         assert "Invalid file type" in response.json()["detail"]
     
+    def test_analyze_form_pdf(self, client, mock_form_analysis_response, sample_pdf_file):
+        """Test that PDFs are routed to page-by-page analysis."""
+        filename, file_content, content_type = sample_pdf_file
+        
+        with patch('app.api.v1.endpoints.forms.ai_service') as mock_service:
+            mock_service.analyze_pdf_form = AsyncMock(
+                return_value=FormAnalysisResponse(**mock_form_analysis_response)
+            )
+            response = client.post(
+                "/api/v1/forms/analyze",
+                data={"target_language": "English"},
+                files={"document": (filename, file_content, content_type)}
+            )
+        
+        assert response.status_code == 200
+        assert response.json()["form_type"] == "Visa Application"
+        mock_service.analyze_pdf_form.assert_called_once()
+    
+    def test_analyze_form_corrupt_pdf(self, client):
+        """Test form analysis with an unreadable PDF."""
+        response = client.post(
+            "/api/v1/forms/analyze",
+            data={"target_language": "English"},
+            files={"document": ("broken.pdf", b"%PDF-1.7 truncated", "application/pdf")}
+        )
+        
+        assert response.status_code == 400
+        assert "Invalid PDF" in response.json()["detail"]
+    
     def test_analyze_form_missing_language(self, client, sample_image_file):
         """Test form analysis without target language."""
         filename, file_content, content_type = sample_image_file
@@ -17,6 +17,7 @@ class TestHealthAPI:
         assert "version" in data
         assert "environment_checks" in data
         assert "api_configuration" in data
+        assert "hits" in data["translation_cache"]
     
     def test_readiness_check_ready(self, client):
         """Test readiness check when all services are ready."""
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.services.hedging import HedgePolicy, percentile
+
+
+class Attempts:
+    """Coroutine factory whose successive calls take the given delays."""
+    
+    def __init__(self, *delays, errors=()):
+        self.delays = list(delays)
+        self.errors = set(errors)
+        self.started = 0
+        self.cancelled = 0
+    
+    async def __call__(self):
+        index = self.started
+        self.started += 1
+        try:
+            await asyncio.sleep(self.delays[min(index, len(self.delays) - 1)])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if index in self.errors:
+            raise RuntimeError(f"attempt {index} failed")
+        return index
+
+
+class TestHedgePolicy:
+    """Test suite for hedged requests."""
+    
+    def test_percentile(self):
+        """Nearest-rank percentile over the observed values."""
+        values = list(range(1, 101))
+        
+        assert percentile(values, 0.95) == 95
+        assert percentile(values, 0.5) == 50
+        assert percentile([], 0.5) is None
+    
+    async def test_fast_call_not_hedged(self):
+        """Calls finishing before the delay are never duplicated."""
+        policy = HedgePolicy(min_delay=0.2)
+        attempts = Attempts(0.01)
+        
+        assert await policy.run(attempts) == 0
+        assert attempts.started == 1
+        assert policy.hedges == 0
+    
+    async def test_slow_call_hedged_and_loser_cancelled(self):
+        """A slow first call is duplicated and the slower attempt cancelled."""
+        policy = HedgePolicy(min_delay=0.02)
+        attempts = Attempts(1.0, 0.01)
+        
+        assert await policy.run(attempts) == 1
+        await asyncio.sleep(0)
+        
+        assert attempts.started == 2
+        assert attempts.cancelled == 1
+        assert policy.hedge_wins == 1
+    
+    async def test_hedge_covers_primary_error(self):
+        """If the first attempt fails after hedging, the hedge still answers."""
+        policy = HedgePolicy(min_delay=0.01)
+        attempts = Attempts(0.05, 0.1, errors={0})
+        
+        assert await policy.run(attempts) == 1
+    
+    async def test_all_attempts_fail(self):
+        """The first attempt's error is raised when every attempt fails."""
+        policy = HedgePolicy(min_delay=0.01)
+        attempts = Attempts(0.03, 0.03, errors={0, 1})
+        
+        with pytest.raises(RuntimeError, match="attempt 0"):
+            await policy.run(attempts)
+    
+    async def test_budget_caps_hedge_rate(self):
+        """Hedges never exceed the configured fraction of traffic."""
+        policy = HedgePolicy(budget=0.1, min_delay=0.001)
+        for _ in range(20):
+            await policy.run(Attempts(0.01))
+        
+        # One hedge of starting credit plus 10% of 20 requests
+        assert policy.hedges <= 3
+        assert policy.over_budget > 0
+    
+    async def test_delay_follows_observed_quantile(self):
+        """After enough samples the hedge delay is the latency quantile."""
+        policy = HedgePolicy(quantile=0.5, min_samples=3, min_delay=5.0)
+        assert policy.delay() == 5.0
+        
+        for delay in (0.01, 0.02, 0.2):
+            await policy.run(Attempts(delay))
+        
+        assert 0.02 <= policy.delay() < 0.2
+
+
+class TestHedgedVisionCalls:
+    """Test suite for hedging in the AI service."""
+    
+    async def test_translate_image_hedged(self, service, fake_completions):
+        """A stalled vision call is hedged when hedging is enabled."""
+        delays = iter([1.0, 0.01])
+        create = fake_completions.create
+        
+        async def staggered(**kwargs):
+            fake_completions.delay = next(delays)
+            return await create(**kwargs)
+        
+        fake_completions.create = staggered
+        service.hedging = HedgePolicy(min_delay=0.05)
+        
+        with patch('app.core.config.settings.HEDGE_ENABLED', True):
+            result = await asyncio.wait_for(
+                service._complete("vision", [{"role": "user", "content": "Hi"}]),
+                timeout=0.5
+            )
+        
+        assert "Hola" in result
+        assert len(fake_completions.calls) == 2
+        assert service.hedging.hedge_wins == 1
+    
+    async def test_text_calls_not_hedged(self, service, fake_completions):
+        """Only vision calls are eligible for hedging."""
+        fake_completions.delay = 0.1
+        service.hedging = HedgePolicy(min_delay=0.01)
+        
+        with patch('app.core.config.settings.HEDGE_ENABLED', True):
+            await service._complete("text", [{"role": "user", "content": "Hi"}])
+        
+        assert len(fake_completions.calls) == 1
@@ -0,0 +1,189 @@
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from app.models.forms import FormAnalysisResponse
+from app.models.translation import TranslationResponse
+from app.services.history import HistoryRecorder, decode_cursor, encode_cursor, history_user
+
+
+def entry(text="Hello", target_language="Spanish"):
+    return dict(
+        original_text=text,
+        translated_text=f"{text} ({target_language})",
+        source_language="English",
+        target_language=target_language
+    )
+
+
+@pytest.fixture
+async def recorder(tmp_path):
+    recorder = HistoryRecorder(f"sqlite:///{tmp_path / 'history.db'}", batch_size=100, flush_interval=60)
+    yield recorder
+    await recorder.stop()
+
+
+class TestHistoryRecorder:
+    """Test suite for buffered history writes."""
+    
+    async def test_flush_and_paginate(self, recorder):
+        """Entries are written in bulk and paged newest first."""
+        for i in range(5):
+            await recorder.record("key:a", "text", **entry(f"text {i}"))
+        
+        assert recorder.stats()["buffered"] == 5
+        assert await recorder.flush() == 5
+        
+        first, cursor = await recorder.query("key:a", limit=3)
+        second, last = await recorder.query("key:a", cursor=cursor, limit=3)
+        
+        assert [e.original_text for e in first + second] == [f"text {i}" for i in reversed(range(5))]
+        assert last is None
+        assert recorder.stats()["written"] == 5
+    
+    async def test_query_filters(self, recorder):
+        """Queries only see the user's own entries of the requested kind and language."""
+        await recorder.record("key:a", "text", **entry("mine"))
+        await recorder.record("key:a", "image", **entry("sign"))
+        await recorder.record("key:a", "text", **entry("other language", "German"))
+        await recorder.record("key:b", "text", **entry("theirs"))
+        
+        entries, _ = await recorder.query("key:a", kind="text", target_language="Spanish")
+        
+        assert [e.original_text for e in entries] == ["mine"]
+    
+    async def test_anonymous_and_disabled(self, tmp_path):
+        """Anonymous requests and disabled recorders keep nothing."""
+        recorder = HistoryRecorder(f"sqlite:///{tmp_path / 'history.db'}", enabled=False)
+        anonymous = HistoryRecorder(f"sqlite:///{tmp_path / 'history.db'}")
+        
+        assert not await recorder.record("key:a", "text", **entry())
+        assert not await anonymous.record(None, "text", **entry())
+        assert recorder.stats()["buffered"] == anonymous.stats()["buffered"] == 0
+    
+    @pytest.mark.parametrize("overflow, kept", [
+        ("drop_oldest", ["text 1", "text 2"]),
+        ("drop_newest", ["text 0", "text 1"]),
+    ])
+    async def test_drop_policies(self, recorder, overflow, kept):
+        """A full buffer evicts the oldest or discards the newest entry."""
+        recorder.capacity = 2
+        recorder.overflow = overflow
+        for i in range(3):
+            await recorder.record("key:a", "text", **entry(f"text {i}"))
+        
+        assert recorder.stats()["dropped"] == 1
+        assert [row["original_text"] for row in recorder._buffer] == kept
+    
+    async def test_block_policy_waits_for_flush(self, recorder):
+        """With the block policy a full buffer is flushed to make room."""
+        recorder.capacity = 2
+        recorder.overflow = "block"
+        recorder.block_timeout = 5.0
+        for i in range(3):
+            assert await recorder.record("key:a", "text", **entry(f"text {i}"))
+        
+        assert recorder.stats()["dropped"] == 0
+        entries, _ = await recorder.query("key:a")
+        assert len(entries) == 3
+    
+    async def test_full_batch_is_flushed_in_background(self, recorder):
+        """The flush task writes as soon as a batch fills."""
+        recorder.batch_size = 2
+        await recorder.record("key:a", "text", **entry("one"))
+        await recorder.record("key:a", "text", **entry("two"))
+        
+        for _ in range(100):
+            if recorder.written == 2:
+                break
+            await asyncio.sleep(0.01)
+        
+        assert recorder.written == 2
+        assert recorder.stats()["buffered"] == 0
+    
+    async def test_failed_flush_keeps_entries(self, tmp_path):
+        """Entries of a failed insert are kept for the next flush."""
+        recorder = HistoryRecorder(f"sqlite:///{tmp_path / 'missing' / 'history.db'}", flush_interval=60)
+        await recorder.record("key:a", "text", **entry())
+        
+        assert await recorder.flush() == 0
+        
+        stats = recorder.stats()
+        assert stats["buffered"] == 1
+        assert stats["failed_flushes"] == 1
+        assert stats["last_error"]
+        await recorder.stop()
+    
+    def test_invalid_overflow_policy(self):
+        """Unknown overflow policies are rejected."""
+        with pytest.raises(ValueError, match="overflow policy"):
+            HistoryRecorder("sqlite://", overflow="drop_everything")
+    
+    def test_cursor_round_trip(self):
+        """Cursors encode the position of the last entry of a page."""
+        position = (datetime(2026, 1, 2, 3, 4, 5, 6), "abc")
+        
+        assert decode_cursor(encode_cursor(*position)) == position
+        with pytest.raises(ValueError):
+            decode_cursor("not a cursor")
+    
+    def test_history_user(self):
+        """Only API keys own history."""
+        assert history_user({"headers": [(b"x-api-key", b"secret")]}).startswith("key:")
+        assert history_user({"headers": [], "client": ("10.0.0.1", 1234)}) is None
+
+
+class TestHistoryApi:
+    """Test suite for the history endpoint."""
+    
+    def test_translations_are_recorded_per_key(self, client, mock_translation_response):
+        """Translations show up in the history of the API key that requested them."""
+        with patch('app.api.v1.endpoints.translation.ai_service') as mock_service:
+            mock_service.translate_text = AsyncMock(return_value=TranslationResponse(**mock_translation_response))
+            for key in ("alice", "bob"):
+                response = client.post(
+                    "/api/v1/translate/text",
+                    json={"text": "Hello", "target_language": "Spanish"},
+                    headers={"X-API-Key": key}
+                )
+                assert response.status_code == 200
+            client.post("/api/v1/translate/text", json={"text": "Hello", "target_language": "Spanish"})
+        
+        response = client.get("/api/v1/history", headers={"X-API-Key": "alice"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [(e["kind"], e["translated_text"]) for e in data["items"]] == [("text", "Hola")]
+        assert data["next_cursor"] is None
+    
+    def test_form_analyses_are_recorded(self, client, mock_form_analysis_response, sample_image_file):
+        """Form analyses are recorded with their title and description."""
+        filename, file_content, content_type = sample_image_file
+        
+        with patch('app.api.v1.endpoints.forms.ai_service') as mock_service:
+            mock_service.analyze_form = AsyncMock(return_value=FormAnalysisResponse(**mock_form_analysis_response))
+            response = client.post(
+                "/api/v1/forms/analyze",
+                data={"target_language": "Spanish"},
+                files={"document": (filename, file_content, content_type)},
+                headers={"Authorization": "Bearer alice"}
+            )
+        assert response.status_code == 200
+        
+        items = client.get("/api/v1/history", params={"kind": "form"}, headers={"X-API-Key": "alice"}).json()["items"]
+        
+        assert items[0]["original_text"] == "Tourist Visa Form"
+        assert items[0]["target_language"] == "Spanish"
+    
+    def test_history_requires_api_key(self, client):
+        """Anonymous callers have no history."""
+        response = client.get("/api/v1/history")
+        
+        assert response.status_code == 401
+    
+    def test_invalid_cursor(self, client):
+        """Malformed cursors are rejected."""
+        response = client.get("/api/v1/history", params={"cursor": "nope"}, headers={"X-API-Key": "alice"})
+        
+        assert response.status_code == 400
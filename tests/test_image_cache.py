@@ -0,0 +1,98 @@
+import random
+import pytest
+from io import BytesIO
+from PIL import Image, ImageDraw
+
+from app.services.image_cache import (
+    MultiIndexHash,
+    ImageResultCache,
+    dhash,
+    phash,
+    perceptual_hash
+)
+
+
+def make_sign(text_offset=0, quality=90, size=(400, 300)):
+    """Render a simple sign-like image and return JPEG bytes."""
+    img = Image.new('RGB', (400, 300), color='white')
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([40, 60, 360, 240], fill='navy')
+    draw.ellipse([60 + text_offset, 90, 180 + text_offset, 210], fill='yellow')
+    img = img.resize(size)
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+class TestPerceptualHash:
+    """Test suite for perceptual hashing."""
+    
+    @pytest.mark.parametrize("method", ["dhash", "phash"])
+    def test_recompressed_image_is_close(self, method):
+        original = perceptual_hash(make_sign(quality=95), method)
+        recompressed = perceptual_hash(make_sign(quality=40, size=(800, 600)), method)
+        
+        assert (original ^ recompressed).bit_count() <= 4
+    
+    def test_different_image_is_far(self):
+        sign = perceptual_hash(make_sign())
+        other = perceptual_hash(make_sign(text_offset=160))
+        
+        assert (sign ^ other).bit_count() > 4
+    
+    def test_non_image_returns_none(self):
+        assert perceptual_hash(b"%PDF-1.7 not an image") is None
+
+
+class TestMultiIndexHash:
+    """Test suite for the Hamming-radius index."""
+    
+    def test_search_matches_brute_force(self):
+        rng = random.Random(0)
+        index = MultiIndexHash(max_distance=6, max_entries=10000, ttl=60)
+        values = [rng.getrandbits(64) for _ in range(2000)]
+        for value in values:
+            index.add("ns", value, value)
+        
+        for _ in range(50):
+            base = rng.choice(values)
+            query = base
+            for bit in rng.sample(range(64), rng.randint(0, 6)):
+                query ^= 1 << bit
+            
+            expected = min((v ^ query).bit_count() for v in values)
+            distance, _ = index.search("ns", query)
+            assert distance == expected
+    
+    def test_namespaces_are_isolated(self):
+        index = MultiIndexHash(max_distance=4, max_entries=10, ttl=60)
+        index.add("spanish", 0xFF, "hola")
+        
+        assert index.search("french", 0xFF) is None
+        assert index.search("spanish", 0xFE) == (1, "hola")
+    
+    def test_evicts_least_recently_used(self):
+        index = MultiIndexHash(max_distance=2, max_entries=2, ttl=60)
+        index.add("ns", 0x0, "a")
+        index.add("ns", 0xFFFF, "b")
+        index.search("ns", 0x0)
+        index.add("ns", 0xFFFF0000, "c")
+        
+        assert len(index) == 2
+        assert index.search("ns", 0xFFFF) is None
+        assert index.search("ns", 0x0) == (0, "a")
+
+
+class TestImageResultCache:
+    """Test suite for the near-duplicate result cache."""
+    
+    def test_near_duplicate_hits(self):
+        cache = ImageResultCache(MultiIndexHash(max_distance=4, max_entries=10, ttl=60))
+        namespace = ImageResultCache.namespace("translate_image", target_language="Spanish")
+        
+        cache.set(namespace, cache.hash(make_sign(quality=95)), "result")
+        
+        assert cache.get(namespace, cache.hash(make_sign(quality=50))) == "result"
+        assert cache.get(namespace, cache.hash(make_sign(text_offset=160))) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
@@ -0,0 +1,68 @@
+import pytest
+from io import BytesIO
+from PIL import Image
+
+from app.services.image_processing import (
+    ImageProcessingError,
+    prepare_image,
+    preprocess_image
+)
+
+
+def encode(img, fmt='JPEG', **kwargs):
+    buffer = BytesIO()
+    img.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+class TestImageProcessing:
+    """Test suite for the vision input preprocessing pipeline."""
+    
+    def test_downscales_to_max_edge(self):
+        content = encode(Image.new('RGB', (4000, 3000), color='white'), quality=100)
+        
+        result = preprocess_image(content, max_edge=1000)
+        
+        assert (result.width, result.height) == (1000, 750)
+        assert result.mime_type == "image/jpeg"
+        assert result.bytes_saved > 0
+    
+    def test_applies_exif_rotation_and_strips_metadata(self):
+        img = Image.new('RGB', (400, 200), color='white')
+        exif = img.getexif()
+        exif[0x0112] = 6  # Orientation: rotate 90 CW
+        exif[0x010F] = "PhoneMaker"
+        content = encode(img, exif=exif.tobytes())
+        
+        result = preprocess_image(content, max_edge=1000)
+        
+        output = Image.open(BytesIO(result.data))
+        assert output.size == (200, 400)
+        assert len(output.getexif()) == 0
+    
+    def test_png_with_alpha_becomes_jpeg(self):
+        content = encode(Image.new('RGBA', (50, 50), color=(255, 0, 0, 0)), fmt='PNG')
+        
+        result = preprocess_image(content, max_edge=1000)
+        
+        assert result.mime_type == "image/jpeg"
+        assert Image.open(BytesIO(result.data)).mode == "RGB"
+    
+    def test_webp_output(self):
+        content = encode(Image.new('RGB', (50, 50), color='white'))
+        
+        result = preprocess_image(content, max_edge=1000, output_format="WEBP")
+        
+        assert result.mime_type == "image/webp"
+        assert Image.open(BytesIO(result.data)).format == "WEBP"
+    
+    def test_rejects_non_image(self):
+        with pytest.raises(ImageProcessingError):
+            preprocess_image(b"not an image", max_edge=1000)
+    
+    async def test_prepare_image_runs_in_thread_pool(self):
+        content = encode(Image.new('RGB', (3000, 100), color='white'))
+        
+        result = await prepare_image(content, max_edge=300)
+        
+        assert result.width == 300
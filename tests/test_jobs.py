@@ -0,0 +1,362 @@
+import asyncio
+import sqlite3
+import pytest
+from fastapi import FastAPI, Request
+from unittest.mock import AsyncMock, patch
+
+from app.api.v1.endpoints import forms
+from app.models.forms import FormAnalysisResponse
+from app.services.jobs import (
+    FAILED,
+    QUEUED,
+    RUNNING,
+    SUCCEEDED,
+    CallbackURLError,
+    IdempotencyConflictError,
+    JobError,
+    JobQueue,
+    JobStore,
+    check_callback_url
+)
+from benchmarks.stub_server import StubServer
+
+
+PARAMS = {"content_type": "image/jpeg", "target_language": "English", "document_type": None, "country": None}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"), ttl=60)
+    yield store
+    store.close()
+
+
+class TestJobStore:
+    """Test suite for the SQLite job table."""
+    
+    def test_idempotent_submit(self, store):
+        """A repeated key returns the existing job instead of queuing new work."""
+        first, created = store.submit("key-1", "fp-1", PARAMS, b"scan")
+        second, repeated = store.submit("key-1", "fp-1", PARAMS, b"scan")
+        
+        assert created is True
+        assert repeated is False
+        assert second.id == first.id
+        assert store.counts()[QUEUED] == 1
+    
+    def test_key_reused_for_other_request(self, store):
+        """Reusing a key for a different document is a conflict."""
+        store.submit("key-1", "fp-1", PARAMS, b"scan")
+        
+        with pytest.raises(IdempotencyConflictError):
+            store.submit("key-1", "fp-2", PARAMS, b"other scan")
+    
+    def test_failed_job_is_requeued_on_resubmit(self, store):
+        """Submitting a failed job again gives it another run."""
+        job, _ = store.submit("key-1", "fp-1", PARAMS, b"scan")
+        store.claim(lease=60)
+        store.fail(job.id, "upstream down")
+        
+        again, created = store.submit("key-1", "fp-1", PARAMS, b"scan")
+        
+        assert created is True
+        assert again.id == job.id
+        assert again.status == QUEUED
+        assert again.error is None
+    
+    def test_claim_leases_oldest_job(self, store):
+        """Jobs are claimed in order, once, with their payload."""
+        first, _ = store.submit("a", "fp-a", PARAMS, b"first")
+        store.submit("b", "fp-b", PARAMS, b"second")
+        
+        claimed = store.claim(lease=60)
+        
+        assert claimed.id == first.id
+        assert claimed.payload == b"first"
+        assert claimed.status == RUNNING
+        assert claimed.attempts == 1
+        assert store.claim(lease=60).payload == b"second"
+        assert store.claim(lease=60) is None
+    
+    def test_expired_lease_is_reclaimed(self, store):
+        """A job whose worker died is picked up again after its lease."""
+        job, _ = store.submit("a", "fp-a", PARAMS, b"scan")
+        store.claim(lease=-1)
+        
+        reclaimed = store.claim(lease=60)
+        
+        assert reclaimed.id == job.id
+        assert reclaimed.attempts == 2
+    
+    def test_finished_job_drops_payload(self, store):
+        """Results are stored and the upload is discarded."""
+        job, _ = store.submit("a", "fp-a", PARAMS, b"scan")
+        store.claim(lease=60)
+        store.succeed(job.id, {"title": "Form"})
+        
+        with store._lock:
+            payload = store._conn.execute("SELECT payload FROM form_jobs").fetchone()[0]
+        assert store.get(job.id).result == {"title": "Form"}
+        assert payload is None
+
+
+class TestJobQueue:
+    """Test suite for background job processing."""
+    
+    async def test_worker_processes_job(self, store):
+        """Submitted jobs are run by the in-process workers."""
+        handler = AsyncMock(return_value={"title": "Form"})
+        queue = JobQueue(store, handler=handler, workers=1, poll_interval=0.05)
+        
+        job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan")
+        finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        
+        assert finished.status == SUCCEEDED
+        assert finished.result == {"title": "Form"}
+        assert handler.await_args.args[0].payload == b"scan"
+    
+    async def test_long_poll_times_out(self, store):
+        """Waiting on an unfinished job returns it once the wait runs out."""
+        queue = JobQueue(store, workers=0, poll_interval=0.05)
+        job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan")
+        
+        waited = await queue.wait(job.id, timeout=0.2)
+        
+        assert waited.status == QUEUED
+        assert await queue.wait("missing", timeout=0.2) is None
+        await queue.stop()
+    
+    async def test_transient_errors_are_retried(self, store):
+        """Handler errors are retried up to max_attempts."""
+        handler = AsyncMock(side_effect=[RuntimeError("upstream down"), {"title": "Form"}])
+        queue = JobQueue(store, handler=handler, workers=1, poll_interval=0.05)
+        
+        job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan")
+        finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        
+        assert finished.status == SUCCEEDED
+        assert finished.attempts == 2
+    
+    async def test_attempts_are_limited(self, store):
+        """A job failing every attempt is marked failed with the last error."""
+        handler = AsyncMock(side_effect=RuntimeError("upstream down"))
+        queue = JobQueue(store, handler=handler, workers=1, max_attempts=2, poll_interval=0.05)
+        
+        job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan")
+        finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        
+        assert finished.status == FAILED
+        assert finished.error == "RuntimeError: upstream down"
+        assert handler.await_count == 2
+    
+    async def test_job_error_is_not_retried(self, store):
+        """Permanent failures fail the job on the first attempt."""
+        handler = AsyncMock(side_effect=JobError("Invalid PDF"))
+        queue = JobQueue(store, handler=handler, workers=1, poll_interval=0.05)
+        
+        job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan")
+        finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        
+        assert finished.status == FAILED
+        assert finished.error == "Invalid PDF"
+        assert handler.await_count == 1
+    
+    async def test_webhook_receives_finished_job(self, store):
+        """Finished jobs are POSTed to their callback URL."""
+        received = []
+        app = FastAPI()
+        
+        @app.post("/hook")
+        async def hook(request: Request):
+            received.append(await request.json())
+            return {}
+        
+        with StubServer(app) as server:
+            queue = JobQueue(
+                store,
+                handler=AsyncMock(return_value={"title": "Form"}),
+                workers=1,
+                poll_interval=0.05,
+                webhook_allowed_hosts=["127.0.0.1"]
+            )
+            job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan", callback_url=f"{server.base_url}/hook")
+            await queue.wait(job.id, timeout=5)
+            for _ in range(50):
+                if received:
+                    break
+                await asyncio.sleep(0.05)
+            await queue.stop()
+        
+        assert received[0]["job_id"] == job.id
+        assert received[0]["status"] == SUCCEEDED
+        assert queue.stats()["webhooks_delivered"] == 1
+    
+    async def test_slow_webhook_does_not_hold_up_workers(self, store):
+        """A hanging callback receiver does not delay the next job."""
+        app = FastAPI()
+        
+        @app.post("/hook")
+        async def hook():
+            await asyncio.sleep(1)
+            return {}
+        
+        with StubServer(app) as server:
+            queue = JobQueue(
+                store,
+                handler=AsyncMock(return_value={"title": "Form"}),
+                workers=1,
+                poll_interval=0.05,
+                webhook_allowed_hosts=["127.0.0.1"]
+            )
+            first, _ = await queue.submit("a", "fp-a", PARAMS, b"scan", callback_url=f"{server.base_url}/hook")
+            await queue.wait(first.id, timeout=5)
+            second, _ = await queue.submit("b", "fp-b", PARAMS, b"scan")
+            finished = await queue.wait(second.id, timeout=0.5)
+            pending = queue.stats()["webhooks_pending"]
+            await queue.stop()
+        
+        assert finished.status == SUCCEEDED
+        assert pending == 1
+    
+    async def test_store_error_does_not_stop_worker(self, store):
+        """A failed outcome write leaves the job to be reclaimed instead of killing the worker."""
+        handler = AsyncMock(side_effect=JobError("Invalid PDF"))
+        queue = JobQueue(store, handler=handler, workers=1, lease=0.2, poll_interval=0.05)
+        fail = store.fail
+        
+        def flaky_fail(job_id, error):
+            if handler.await_count == 1:
+                raise sqlite3.OperationalError("database is locked")
+            fail(job_id, error)
+        
+        with patch.object(store, "fail", side_effect=flaky_fail):
+            job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan")
+            await asyncio.sleep(0.1)
+            running = queue.stats()["running_workers"]
+            finished = await queue.wait(job.id, timeout=5)
+        await queue.stop()
+        
+        assert running == 1
+        assert finished.status == FAILED
+        assert handler.await_count == 2
+    
+    async def test_webhook_to_private_address_is_blocked(self, store):
+        """Webhooks are not sent to loopback hosts that are not allowed explicitly."""
+        queue = JobQueue(store, handler=AsyncMock(return_value={"title": "Form"}), workers=1, poll_interval=0.05)
+        job, _ = await queue.submit("a", "fp-a", PARAMS, b"scan", callback_url="http://127.0.0.1:9/hook")
+        await queue.wait(job.id, timeout=5)
+        for _ in range(50):
+            if queue.webhooks_blocked:
+                break
+            await asyncio.sleep(0.05)
+        await queue.stop()
+        
+        assert queue.stats()["webhooks_blocked"] == 1
+        assert queue.stats()["webhooks_failed"] == 0
+    
+    @pytest.mark.parametrize("url", [
+        "http://127.0.0.1/hook",
+        "http://localhost:8000/hook",
+        "http://10.1.2.3/hook",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::1]/hook",
+        "http://[::ffff:192.168.0.1]/hook",
+        "ftp://example.com/hook",
+    ])
+    async def test_callback_url_must_be_public(self, url):
+        """Callback URLs reaching loopback, private or metadata addresses are refused."""
+        with pytest.raises(CallbackURLError):
+            await check_callback_url(url)
+    
+    async def test_callback_url_allowlist(self):
+        """Public addresses and explicitly allowed hosts are accepted."""
+        await check_callback_url("https://8.8.8.8/hook")
+        await check_callback_url("http://127.0.0.1:8080/hook", allowed_hosts=["127.0.0.1"])
+    
+    def test_from_settings_requires_sqlite_file(self):
+        """Without a SQLite file, the queue refuses to start instead of keeping jobs in memory."""
+        with patch("app.core.config.settings.DATABASE_URL", "postgresql://db/app"), \
+             patch("app.core.config.settings.JOB_DATABASE_PATH", ""):
+            with pytest.raises(ValueError, match="JOB_DATABASE_PATH"):
+                JobQueue.from_settings()
+
+
+class TestFormJobsAPI:
+    """Test suite for the asynchronous form analysis endpoints."""
+    
+    @pytest.fixture
+    def queue(self, store):
+        queue = JobQueue(store, handler=forms._run_form_job, workers=1, poll_interval=0.05)
+        with patch.object(forms, "form_jobs", queue):
+            yield queue
+    
+    def submit(self, client, image, headers=None, **data):
+        filename, content, content_type = image
+        content.seek(0)
+        return client.post(
+            "/api/v1/forms/analyze/jobs",
+            data={"target_language": "English", **data},
+            files={"document": (filename, content, content_type)},
+            headers=headers or {}
+        )
+    
+    def test_submit_and_long_poll(self, client, queue, sample_image_file, mock_form_analysis_response):
+        """A submitted form is analyzed in the background and fetched by polling."""
+        with patch.object(forms, "ai_service") as service:
+            service.analyze_form = AsyncMock(return_value=FormAnalysisResponse(**mock_form_analysis_response))
+            submitted = self.submit(client, sample_image_file)
+            job_id = submitted.json()["job_id"]
+            polled = client.get(f"/api/v1/forms/jobs/{job_id}", params={"wait": 5})
+        
+        assert submitted.status_code == 202
+        assert submitted.headers["location"].endswith(f"/api/v1/forms/jobs/{job_id}")
+        assert polled.status_code == 200
+        assert polled.json()["status"] == SUCCEEDED
+        assert polled.json()["result"]["form_type"] == "Visa Application"
+    
+    def test_retried_submission_returns_same_job(self, client, queue, sample_image_file):
+        """Retries with the same document or Idempotency-Key do not queue new work."""
+        queue.workers = 0
+        first = self.submit(client, sample_image_file)
+        retried = self.submit(client, sample_image_file)
+        keyed = self.submit(client, sample_image_file, headers={"Idempotency-Key": "upload-7"})
+        conflict = self.submit(client, sample_image_file, headers={"Idempotency-Key": "upload-7"}, country="DE")
+        
+        assert retried.status_code == 200
+        assert retried.json()["job_id"] == first.json()["job_id"]
+        assert keyed.status_code == 202
+        assert conflict.status_code == 409
+        assert queue.store.counts()[QUEUED] == 2
+    
+    def test_invalid_document_fails_job(self, client, queue):
+        """Unreadable uploads fail the job without retries."""
+        submitted = client.post(
+            "/api/v1/forms/analyze/jobs",
+            data={"target_language": "English"},
+            files={"document": ("broken.pdf", b"%PDF-1.7 truncated", "application/pdf")}
+        )
+        polled = client.get(f"/api/v1/forms/jobs/{submitted.json()['job_id']}", params={"wait": 5}).json()
+        
+        assert polled["status"] == FAILED
+        assert polled["attempts"] == 1
+        assert "Invalid PDF" in polled["error"]
+    
+    def test_rejects_bad_requests(self, client, queue, sample_image_file):
+        """Invalid file types, callback URLs and unknown jobs are rejected."""
+        wrong_type = client.post(
+            "/api/v1/forms/analyze/jobs",
+            data={"target_language": "English"},
+            files={"document": ("notes.txt", b"text", "text/plain")}
+        )
+        bad_callback = self.submit(client, sample_image_file, callback_url="file:///etc/passwd")
+        metadata_callback = self.submit(client, sample_image_file, callback_url="http://169.254.169.254/")
+        
+        assert wrong_type.status_code == 400
+        assert bad_callback.status_code == 400
+        assert metadata_callback.status_code == 400
+        assert "public address" in metadata_callback.json()["detail"]
+        assert client.get("/api/v1/forms/jobs/unknown").status_code == 404
@@ -0,0 +1,72 @@
+import httpx
+import pytest
+
+from benchmarks.loadtest import build_requests, compare
+from benchmarks.stub_server import StubServer, create_stub_app
+
+
+class TestStubServer:
+    """Test suite for the fake OpenAI-compatible provider."""
+    
+    def test_structured_calls_get_schema_reply(self):
+        """Replies are picked by the response_format schema name."""
+        app = create_stub_app(latency=0.0, reply="plain", replies={"FormOutput": "{}"})
+        with StubServer(app) as stub:
+            structured = httpx.post(f"{stub.base_url}/chat/completions", json={
+                "model": "m", "messages": [],
+                "response_format": {"type": "json_schema", "json_schema": {"name": "FormOutput"}},
+            }).json()
+            plain = httpx.post(f"{stub.base_url}/chat/completions", json={"model": "m", "messages": []}).json()
+        
+        assert structured["choices"][0]["message"]["content"] == "{}"
+        assert plain["choices"][0]["message"]["content"] == "plain"
+    
+    def test_streams_word_by_word(self):
+        """Streaming calls receive one chunk per word and a final usage chunk."""
+        with StubServer(create_stub_app(latency=0.0, reply="Hola amigo")) as stub:
+            body = httpx.post(
+                f"{stub.base_url}/chat/completions", json={"model": "m", "messages": [], "stream": True}
+            ).text
+        
+        events = [line for line in body.splitlines() if line.startswith("data: ")]
+        assert len(events) == 4
+        assert '"content": "Hola "' in events[0]
+        assert '"usage"' in events[2]
+        assert events[3] == "data: [DONE]"
+    
+    def test_error_rate(self):
+        """The configured fraction of calls fails."""
+        with StubServer(create_stub_app(latency=0.0, error_rate=0.5, seed=1)) as stub:
+            statuses = [
+                httpx.post(f"{stub.base_url}/chat/completions", json={"model": "m", "messages": []}).status_code
+                for _ in range(40)
+            ]
+            errors = httpx.get(f"{stub.base_url}/stats").json()["errors"]
+        
+        assert set(statuses) == {200, 503}
+        assert errors == statuses.count(503)
+        assert 10 < errors < 30
+
+
+class TestLoadTestReport:
+    """Test suite for load test payloads and report comparison."""
+    
+    @pytest.mark.parametrize("scenario", ["text", "text_stream", "image", "forms"])
+    def test_payloads_are_unique(self, scenario):
+        """Every request carries different content so caches and single-flight stay cold."""
+        requests = build_requests(scenario, 3)
+        contents = [str(request.get("json")) + str(request.get("files")) for request in requests]
+        
+        assert len(set(contents)) == 3
+    
+    def test_compare(self):
+        """Changes are reported per scenario and concurrency level."""
+        def report(rps, p99):
+            return {"commit": "abc", "results": [{
+                "scenario": "text", "concurrency": 8, "rps": rps, "rss_mb": 80.0,
+                "latency_ms": {"p50": 100.0, "p95": 150.0, "p99": p99},
+            }]}
+        
+        lines = compare(report(10.0, 200.0), report(12.0, 150.0))
+        
+        assert lines[2].split() == ["text", "8", "+20.0%", "+0.0%", "-25.0%", "+0.0%"]
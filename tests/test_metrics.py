@@ -0,0 +1,86 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.core import metrics
+from app.core.metrics import Counter, Histogram, Registry, stage
+from app.models.translation import TranslationResponse
+
+
+class TestMetricTypes:
+    """Test suite for the in-process metric types."""
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Rendered buckets count every observation at or below the bound."""
+        histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value, route="/a")
+        
+        lines = histogram.samples()
+        
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 2' in lines
+        assert 'latency_seconds_bucket{route="/a",le="1"} 3' in lines
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+        assert 'latency_seconds_count{route="/a"} 4' in lines
+        assert histogram.count(route="/a") == 4
+    
+    def test_registry_renders_help_and_type(self):
+        """Each metric is rendered with HELP and TYPE headers."""
+        registry = Registry()
+        counter = registry.counter("jobs_total", "Jobs run", ("status",))
+        counter.inc(status="ok")
+        counter.inc(2, status="ok")
+        
+        text = registry.render()
+        
+        assert "# HELP jobs_total Jobs run" in text
+        assert "# TYPE jobs_total counter" in text
+        assert 'jobs_total{status="ok"} 3' in text
+    
+    def test_label_values_are_escaped(self):
+        """Quotes in label values do not break the exposition format."""
+        counter = Counter("hits_total", "Hits", ("path",))
+        counter.inc(path='say "hi"')
+        
+        assert counter.samples() == ['hits_total{path="say \\"hi\\""} 1']
+    
+    def test_stage_outside_request(self):
+        """Stages timed outside a request are recorded as background work."""
+        before = metrics.STAGE_LATENCY.count(route="background", stage="unit-test")
+        with stage("unit-test"):
+            pass
+        
+        assert metrics.STAGE_LATENCY.count(route="background", stage="unit-test") == before + 1
+
+
+class TestMetricsAPI:
+    """Test suite for the /metrics endpoint."""
+    
+    def test_metrics_endpoint(self, client):
+        """The scrape endpoint serves the Prometheus text format."""
+        response = client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "cache_hit_ratio" in response.text
+    
+    def test_request_stages_labelled_by_route(self, client, sample_image_file, mock_translation_response):
+        """Stage timings recorded during a request carry its route template."""
+        route = "/api/v1/translate/image"
+        before = metrics.STAGE_LATENCY.count(route=route, stage="preprocess")
+        requests_before = metrics.HTTP_REQUESTS.value(route=route, method="POST", status=200)
+        
+        with patch('app.api.v1.endpoints.translation.ai_service') as mock_service:
+            mock_service.translate_image = AsyncMock(
+                return_value=TranslationResponse(**mock_translation_response)
+            )
+            response = client.post(
+                route,
+                files={"image": sample_image_file},
+                data={"target_language": "Spanish"}
+            )
+        
+        assert response.status_code == 200
+        assert metrics.STAGE_LATENCY.count(route=route, stage="preprocess") == before + 1
+        assert metrics.STAGE_LATENCY.count(route=route, stage="upload_read") >= 1
+        assert metrics.HTTP_REQUESTS.value(route=route, method="POST", status=200) == requests_before + 1
@@ -0,0 +1,168 @@
+import sys
+import pytest
+from io import BytesIO
+from PIL import Image
+from unittest.mock import patch
+
+from app.services.ocr import OcrResult, OcrStage, OcrWord
+
+
+class FakeEngine:
+    """OCR engine returning a fixed set of words."""
+    
+    def __init__(self, words):
+        self.words = words
+        self.calls = 0
+    
+    def recognize(self, image):
+        self.calls += 1
+        return OcrResult(list(self.words))
+
+
+def words(confidence):
+    return [
+        OcrWord("EXIT", confidence, (10, 10, 60, 20), (1, 1, 1)),
+        OcrWord("ONLY", confidence, (80, 10, 60, 20), (1, 1, 1)),
+        OcrWord("Push", confidence, (10, 40, 50, 20), (1, 1, 2)),
+    ]
+
+
+def sign():
+    img = Image.new('RGB', (200, 100), color='white')
+    img.paste((0, 0, 0), (10, 10, 190, 30))
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def is_vision_call(call):
+    content = call["messages"][-1]["content"]
+    return not isinstance(content, str) and any(part.get("type") == "image_url" for part in content)
+
+
+def ocr_stage(engine):
+    return OcrStage(enabled=True, min_confidence=80.0, engine=engine)
+
+
+class TestOcrResult:
+    """Test suite for OCR results."""
+    
+    def test_text_keeps_lines(self):
+        """Words are joined into their lines."""
+        assert OcrResult(words(90)).text == "EXIT ONLY\nPush"
+    
+    def test_confidence_weighted_by_length(self):
+        """Long words weigh more than short ones."""
+        result = OcrResult([OcrWord("Hospital", 90, (0, 0, 1, 1)), OcrWord("a", 0, (0, 0, 1, 1))])
+        
+        assert result.confidence == pytest.approx(80.0)
+        assert OcrResult().confidence == 0.0
+    
+    def test_detected_objects(self):
+        """Word boxes are reported with a 0-1 confidence."""
+        objects = OcrResult(words(95)).detected_objects()
+        
+        assert objects[0] == {
+            "type": "text",
+            "text": "EXIT",
+            "confidence": 0.95,
+            "box": {"x": 10, "y": 10, "width": 60, "height": 20},
+        }
+
+
+class TestOcrStage:
+    """Test suite for the OCR pre-stage."""
+    
+    async def test_confident_read_is_returned(self):
+        """Text read above the confidence threshold takes the text path."""
+        stage = OcrStage(enabled=True, min_confidence=80.0, engine=FakeEngine(words(92)))
+        
+        result = await stage.read(sign())
+        
+        assert result.text == "EXIT ONLY\nPush"
+    
+    async def test_low_confidence_or_too_little_text(self):
+        """Unsure reads and images without text go to vision."""
+        unsure = OcrStage(enabled=True, min_confidence=80.0, engine=FakeEngine(words(40)))
+        empty = OcrStage(enabled=True, min_chars=2, engine=FakeEngine([OcrWord("|", 99, (0, 0, 1, 1))]))
+        
+        assert await unsure.read(sign()) is None
+        assert await empty.read(sign()) is None
+    
+    async def test_disabled_stage_does_not_run(self):
+        """With OCR disabled the engine is never called."""
+        engine = FakeEngine(words(99))
+        stage = OcrStage(enabled=False, engine=engine)
+        
+        assert await stage.read(sign()) is None
+        assert engine.calls == 0
+    
+    async def test_missing_pytesseract_disables_stage(self):
+        """Without the optional bindings the stage switches itself off."""
+        stage = OcrStage(enabled=True)
+        
+        with patch.dict(sys.modules, {"pytesseract": None}):
+            assert await stage.read(sign()) is None
+        
+        assert stage.active is False
+        assert "pytesseract" in stage.stats()["unavailable"]
+    
+    def test_routing_ratio_and_latency_saved(self):
+        """Text routes are credited with the vision latency they avoided."""
+        stage = OcrStage(enabled=True, alpha=0.5)
+        
+        stage.record_text_route(0.3)
+        stage.record_vision_route(2.0)
+        stage.record_vision_route(1.0)
+        stage.record_text_route(0.5)
+        stats = stage.stats()
+        
+        assert stats["text_routes"] == 2
+        assert stats["vision_routes"] == 2
+        assert stats["text_route_ratio"] == 0.5
+        assert stats["vision_latency_ms"] == 1500.0
+        # The first text route came before any vision latency was known
+        assert stats["latency_saved_s"] == 1.0
+
+
+class TestOcrRouting:
+    """Test suite for OCR routing in image translation."""
+    
+    async def test_confident_image_uses_text_model(self, service, fake_completions):
+        """Confidently read images are translated without the vision model."""
+        service.ocr = ocr_stage(FakeEngine(words(95)))
+        
+        result = await service.translate_image(image=sign(), target_language="Spanish")
+        
+        assert result.translated_text == "Hola"
+        assert len(fake_completions.calls) == 1
+        assert not is_vision_call(fake_completions.calls[0])
+        assert "EXIT ONLY" in fake_completions.calls[0]["messages"][-1]["content"]
+        assert [obj["text"] for obj in result.detected_objects] == ["EXIT", "ONLY", "Push"]
+        assert service.ocr.stats()["text_routes"] == 1
+    
+    async def test_unsure_image_uses_vision_model(self, service, fake_completions):
+        """Images OCR cannot read confidently still go to the vision model."""
+        service.ocr = ocr_stage(FakeEngine(words(30)))
+        
+        await service.translate_image(image=sign(), target_language="Spanish")
+        
+        assert len(fake_completions.calls) == 1
+        assert is_vision_call(fake_completions.calls[0])
+        assert service.ocr.stats()["vision_routes"] == 1
+    
+    async def test_text_model_failure_falls_back_to_vision(self, service, fake_completions):
+        """If the text path fails the image is sent to the vision model."""
+        service.ocr = ocr_stage(FakeEngine(words(95)))
+        create = fake_completions.create
+        
+        async def text_down(**kwargs):
+            if not is_vision_call(kwargs):
+                raise RuntimeError("upstream down")
+            return await create(**kwargs)
+        fake_completions.create = text_down
+        
+        result = await service.translate_image(image=sign(), target_language="Spanish")
+        
+        assert result.translated_text == "Hola"
+        assert service.ocr.stats()["vision_routes"] == 1
@@ -0,0 +1,144 @@
+import pytest
+from unittest.mock import patch
+
+import precompute_phrases
+from app.models.translation import TextTranslationRequest
+from app.services.phrase_pack import PhrasePack, write_pack
+
+
+def record(text, translation, language="Spanish"):
+    return {
+        "original_text": text,
+        "translated_text": translation,
+        "source_language": "English",
+        "target_language": language,
+        "context_explanation": f"How to say '{text}'",
+        "confidence": 0.95,
+        "detected_objects": [],
+    }
+
+
+@pytest.fixture
+def pack_path(tmp_path):
+    path = str(tmp_path / "phrases.bin")
+    write_pack(
+        path,
+        [record("Where is the hospital?", "¿Dónde está el hospital?"), record("Help!", "¡Ayuda!"),
+         record("Help!", "Допоможіть!", "Ukrainian")],
+        model="test-model",
+        source_language="English",
+        languages=["Spanish", "Ukrainian"]
+    )
+    return path
+
+
+@pytest.fixture
+def pack(pack_path):
+    pack = PhrasePack(pack_path)
+    yield pack
+    pack.close()
+
+
+class TestPhrasePack:
+    """Test suite for the memory-mapped phrase pack."""
+    
+    def test_lookup_ignores_case_and_whitespace(self, pack):
+        """Phrases match however the user typed them."""
+        result = pack.get("  where IS the   hospital? ", "spanish")
+        
+        assert result.translated_text == "¿Dónde está el hospital?"
+        assert result.original_text == "  where IS the   hospital? "
+        assert result.cached is True
+        assert pack.get("Help!", "Ukrainian").translated_text == "Допоможіть!"
+        assert len(pack) == 3
+    
+    def test_unknown_phrase_or_language(self, pack):
+        """Phrases or languages outside the pack are misses."""
+        assert pack.get("Where is the school?", "Spanish") is None
+        assert pack.get("Help!", "French") is None
+        assert pack.stats()["misses"] == 2
+    
+    def test_context_and_source_language_bypass_pack(self, pack):
+        """Requests the pack was not built for go to the model."""
+        assert pack.get("Help!", "Spanish", context="On a sign at a swimming pool") is None
+        assert pack.get("Help!", "Spanish", source_language="German") is None
+        assert pack.get("Help!", "Spanish", source_language="english") is not None
+    
+    def test_missing_pack_is_empty(self, tmp_path):
+        """A server without a built pack simply has no precomputed phrases."""
+        pack = PhrasePack(str(tmp_path / "missing.bin"))
+        
+        assert len(pack) == 0
+        assert pack.get("Help!", "Spanish") is None
+    
+    def test_rejects_other_files(self, tmp_path):
+        """Files that are not phrase packs are rejected."""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a phrase pack")
+        
+        with pytest.raises(ValueError, match="Not a phrase pack"):
+            PhrasePack(str(path))
+
+
+class TestPhrasePackService:
+    """Test suite for phrase pack lookups in AIService."""
+    
+    async def test_translate_text_served_from_pack(self, pack, make_service, fake_completions):
+        """Precomputed phrases are answered without a model call."""
+        service = make_service(phrases=pack)
+        
+        result = await service.translate_text(text="Help!", target_language="Spanish")
+        
+        assert result.translated_text == "¡Ayuda!"
+        assert result.cached is True
+        assert fake_completions.calls == []
+    
+    async def test_batch_only_sends_unknown_phrases(self, pack, make_service, fake_completions):
+        """Batch items found in the pack skip the model."""
+        service = make_service(phrases=pack)
+        
+        results = await service.translate_text_batch([
+            TextTranslationRequest(text="Help!", target_language="Spanish"),
+            TextTranslationRequest(text="Good morning", target_language="Spanish"),
+        ])
+        
+        assert results[0].translated_text == "¡Ayuda!"
+        assert results[1].translated_text == "Hola"
+        assert len(fake_completions.calls) == 1
+
+
+class TestPrecomputeJob:
+    """Test suite for the phrase pack precompute job."""
+    
+    def test_load_corpus(self, tmp_path):
+        """Comments, blank lines and duplicates are skipped."""
+        corpus = tmp_path / "phrases.txt"
+        corpus.write_text("# Signs\nExit\n\nExit\nEntrance\n", encoding="utf-8")
+        
+        assert precompute_phrases.load_corpus(str(corpus)) == ["Exit", "Entrance"]
+    
+    async def test_resumes_and_writes_pack(self, tmp_path, make_service, fake_completions):
+        """A second run only translates what the first one did not finish."""
+        output = str(tmp_path / "pack.bin")
+        create = fake_completions.create
+        
+        async def down_for_german(**kwargs):
+            if "German" in kwargs["messages"][1]["content"]:
+                raise RuntimeError("upstream down")
+            return await create(**kwargs)
+        fake_completions.create = down_for_german
+        
+        with patch.object(precompute_phrases, "AIService", lambda phrases: make_service(phrases=phrases)):
+            first = await precompute_phrases.precompute(["Exit", "Entrance"], ["Spanish", "German"], "English", output, 2)
+            calls = len(fake_completions.calls)
+            fake_completions.create = create
+            second = await precompute_phrases.precompute(["Exit", "Entrance"], ["Spanish", "German"], "English", output, 2)
+        
+        assert first == 2
+        assert second == 4
+        # The second run only asked for the two German phrases (packed, then one by one)
+        assert all("German" in call["messages"][1]["content"] for call in fake_completions.calls[calls:])
+        pack = PhrasePack(output)
+        assert pack.get("exit", "German").translated_text == "Hola"
+        assert pack.stats()["model"]
+        pack.close()
@@ -0,0 +1,99 @@
+import pytest
+from unittest.mock import patch
+
+from app.core import metrics
+from app.services import prompts
+from app.services.ai_service import TEXT_TRANSLATION_OUTPUT
+from app.services.prompts import PromptTemplate, estimate_tokens, truncate_tokens
+
+
+class TestPromptTemplates:
+    """Test suite for compiled prompt templates."""
+    
+    def test_estimate_tokens(self):
+        """Words and punctuation cost at least one token; long and non-Latin words more."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("Where is the bus?") == 6
+        assert estimate_tokens("internationalization") == 5
+        assert estimate_tokens("Привіт") == 3
+    
+    def test_truncate_tokens(self):
+        """Text over budget is cut at a word boundary and marked."""
+        text = "one two three four five six"
+        
+        assert truncate_tokens(text, 10) == text
+        cut = truncate_tokens(text, 4)
+        assert cut == "one two…"
+        assert estimate_tokens(cut) <= 4
+    
+    def test_static_prefix_shared_across_requests(self):
+        """Per-request values never change the system message."""
+        first = prompts.TEXT_TRANSLATION.render(text="Hello", target_language="Spanish")
+        second = prompts.TEXT_TRANSLATION.render(text="Bye", target_language="Ukrainian", context="At a bank")
+        
+        assert first.messages[0] is second.messages[0]
+        assert "Hello" in first.messages[1]["content"]
+        assert "Context: general" in first.messages[1]["content"]
+        assert first.prefix_tokens == prompts.TEXT_TRANSLATION.prefix_tokens
+        assert first.tokens > first.prefix_tokens
+    
+    def test_context_cut_to_budget(self):
+        """A long user-supplied context cannot inflate the prompt."""
+        template = PromptTemplate(
+            task="test",
+            system="Translate.",
+            user="Context: {context}",
+            budgets={"context": 8}
+        )
+        
+        prompt = template.render(context="word " * 500)
+        
+        assert prompt.truncated == ["context"]
+        assert prompt.tokens <= template.prefix_tokens + estimate_tokens("Context:") + 8
+    
+    def test_every_field_needs_a_budget(self):
+        """Templates with unbudgeted fields are rejected at startup."""
+        with pytest.raises(ValueError, match="context"):
+            PromptTemplate(task="test", system="", user="{text} {context}", budgets={"text": 10})
+    
+    def test_structured_prefix_includes_schema(self):
+        """Structured variants summarize the output schema in the cached prefix."""
+        template = prompts.TEXT_TRANSLATION.structured(TEXT_TRANSLATION_OUTPUT)
+        
+        assert template.system.startswith(prompts.TEXT_TRANSLATION.system)
+        assert "translated_text" in template.system
+        assert template.prefix_tokens > prompts.TEXT_TRANSLATION.prefix_tokens
+    
+    def test_image_attached_after_text(self):
+        """Vision prompts keep the image after the text part of the user message."""
+        prompt = prompts.FORM_ANALYSIS.render(image_url="data:image/jpeg;base64,AAAA", target_language="English")
+        
+        text, image = prompt.messages[1]["content"]
+        assert "Document type: unknown" in text["text"]
+        assert image["image_url"]["url"] == "data:image/jpeg;base64,AAAA"
+
+
+class TestPromptReporting:
+    """Test suite for prompt size reporting."""
+    
+    async def test_prompt_tokens_recorded_per_task(self, service, fake_completions):
+        """Each model request records its estimated prompt size."""
+        before = metrics.PROMPT_TOKENS.count(task="translate_text")
+        
+        await service.translate_text(text="Hello", target_language="Spanish", context="x " * 1000)
+        
+        assert metrics.PROMPT_TOKENS.count(task="translate_text") == before + 1
+        assert metrics.PROMPT_TRUNCATIONS.value(task="translate_text", field="context") >= 1
+        user_prompt = fake_completions.calls[0]["messages"][1]["content"]
+        assert estimate_tokens(user_prompt) < 200
+    
+    def test_prompt_tokens_header(self, client, service):
+        """Responses report the prompt tokens sent on their behalf."""
+        with patch('app.api.v1.endpoints.translation.ai_service', service):
+            response = client.post("/api/v1/translate/text", json={
+                "text": "Where is the pharmacy?",
+                "target_language": "Spanish"
+            })
+        
+        assert response.status_code == 200
+        assert int(response.headers["X-Prompt-Tokens"]) > prompts.TEXT_TRANSLATION.prefix_tokens
@@ -0,0 +1,208 @@
+import openai
+import pytest
+from unittest.mock import patch
+
+from benchmarks.stub_server import StubServer, create_stub_app
+from app.services.ai_service import AIService
+from app.services.router import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    ModelRouter,
+    ModelUnavailableError,
+    parse_targets,
+)
+
+
+class FakeClock:
+    """Manually advanced clock for circuit breaker timing."""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_router(clock, entries=("primary", "secondary")):
+    return ModelRouter(
+        parse_targets(list(entries), "https://provider.test/v1"),
+        alpha=0.5,
+        failure_threshold=2,
+        cooldown=10.0,
+        clock=clock
+    )
+
+
+class TestModelRouter:
+    """Test suite for latency-aware routing and circuit breaking."""
+    
+    def test_parse_targets(self):
+        """Entries may name an explicit endpoint; duplicates are dropped."""
+        targets = parse_targets(
+            ["gemma", "llama@http://localhost:8001/v1/", "gemma"],
+            "https://provider.test/v1"
+        )
+        
+        assert [target.name for target in targets] == [
+            "gemma@https://provider.test/v1",
+            "llama@http://localhost:8001/v1",
+        ]
+    
+    def test_untried_targets_first_then_fastest(self, clock):
+        """Every target gets measured, then traffic goes to the fastest."""
+        router = make_router(clock)
+        primary, secondary = router.targets
+        
+        assert router.candidates()[0] is primary
+        router.record_success(primary, 1.0)
+        assert router.candidates()[0] is secondary
+        router.record_success(secondary, 0.2)
+        
+        assert router.candidates() == [secondary, primary]
+    
+    def test_ewma_tracks_latency_shift(self, clock):
+        """A target that slows down loses traffic to a faster one."""
+        router = make_router(clock)
+        primary, secondary = router.targets
+        router.record_success(primary, 0.2)
+        router.record_success(secondary, 0.4)
+        
+        for _ in range(3):
+            router.record_success(primary, 1.0)
+        
+        assert primary.latency == pytest.approx(0.9)
+        assert router.candidates()[0] is secondary
+    
+    def test_failed_target_demoted(self, clock):
+        """A target whose last call failed goes behind healthy ones."""
+        router = make_router(clock)
+        primary, secondary = router.targets
+        router.record_success(primary, 0.1)
+        router.record_success(secondary, 1.0)
+        router.record_failure(primary)
+        
+        assert router.candidates() == [secondary, primary]
+        assert primary.error_rate == pytest.approx(0.5)
+    
+    def test_circuit_opens_and_recovers(self, clock):
+        """Consecutive failures open the circuit; a successful probe closes it."""
+        router = make_router(clock, entries=("primary",))
+        target = router.targets[0]
+        
+        router.record_failure(target)
+        assert router.state(target) == CLOSED
+        router.record_failure(target)
+        assert router.state(target) == OPEN
+        assert router.candidates() == []
+        assert router.acquire(target) is False
+        
+        clock.now = 10.0
+        assert router.state(target) == HALF_OPEN
+        assert router.acquire(target) is True
+        assert router.acquire(target) is False
+        
+        router.record_success(target, 0.3)
+        assert router.state(target) == CLOSED
+    
+    def test_failed_probe_reopens(self, clock):
+        """A failing probe re-opens the circuit for another cooldown."""
+        router = make_router(clock, entries=("primary",))
+        target = router.targets[0]
+        router.record_failure(target)
+        router.record_failure(target)
+        
+        clock.now = 10.0
+        assert router.acquire(target) is True
+        router.record_failure(target)
+        
+        assert router.state(target) == OPEN
+        clock.now = 15.0
+        assert router.state(target) == OPEN
+
+
+class TestRoutingHarness:
+    """Routing through AIService against local fake OpenAI-compatible servers."""
+    
+    @pytest.fixture
+    def servers(self):
+        with StubServer(create_stub_app(latency=0.3)) as slow, \
+             StubServer(create_stub_app(latency=0.01)) as fast, \
+             StubServer(create_stub_app(latency=0.01, status_code=503)) as failing, \
+             StubServer(create_stub_app(latency=0.01, status_code=400)) as rejecting:
+            yield {"slow": slow, "fast": fast, "failing": failing, "rejecting": rejecting}
+    
+    def make_service(self, primary, fallbacks):
+        with patch('app.core.config.settings.TEXT_MODEL', primary), \
+             patch('app.core.config.settings.TEXT_FALLBACK_MODELS', fallbacks), \
+             patch('app.core.config.settings.ROUTER_FAILURE_THRESHOLD', 3):
+            return AIService()
+    
+    async def complete(self, service):
+        return await service._complete("text", [{"role": "user", "content": "Hello"}])
+    
+    async def test_routes_to_fastest_server(self, servers):
+        """After measuring both servers, traffic stays on the fast one."""
+        service = self.make_service(
+            f"gemma@{servers['slow'].base_url}", [f"gemma@{servers['fast'].base_url}"]
+        )
+        try:
+            for _ in range(5):
+                assert await self.complete(service) == "Translation: stub"
+        finally:
+            await service.close()
+        
+        assert servers["slow"].app.state.requests == 1
+        assert servers["fast"].app.state.requests == 4
+    
+    async def test_falls_back_and_opens_circuit(self, servers):
+        """A failing primary is bypassed and stops receiving traffic."""
+        service = self.make_service(
+            f"gemma@{servers['failing'].base_url}", [f"gemma@{servers['fast'].base_url}"]
+        )
+        with patch('app.core.config.settings.MODEL_MAX_RETRIES', 0):
+            try:
+                for _ in range(5):
+                    assert await self.complete(service) == "Translation: stub"
+            finally:
+                await service.close()
+        
+        assert servers["failing"].app.state.requests == 1
+        assert servers["fast"].app.state.requests == 5
+    
+    async def test_single_target_circuit_fails_fast(self, servers):
+        """With every circuit open, calls fail without reaching the server."""
+        service = self.make_service(f"gemma@{servers['failing'].base_url}", [])
+        with patch('app.core.config.settings.MODEL_MAX_RETRIES', 0):
+            try:
+                for _ in range(3):
+                    with pytest.raises(Exception):
+                        await self.complete(service)
+                with pytest.raises(ModelUnavailableError):
+                    await self.complete(service)
+            finally:
+                await service.close()
+        
+        assert servers["failing"].app.state.requests == 3
+    
+    async def test_rejected_requests_do_not_open_circuit(self, servers):
+        """Invalid requests fail at once without counting against the target or falling back."""
+        service = self.make_service(
+            f"gemma@{servers['rejecting'].base_url}", [f"gemma@{servers['fast'].base_url}"]
+        )
+        try:
+            for _ in range(5):
+                with pytest.raises(openai.BadRequestError):
+                    await self.complete(service)
+            stats = service.routers["text"].stats()
+        finally:
+            await service.close()
+        
+        assert servers["rejecting"].app.state.requests == 5
+        assert servers["fast"].app.state.requests == 0
+        assert all(target["state"] == CLOSED for target in stats)
@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test suite for request coalescing."""
+    
+    async def test_followers_share_leader_result(self):
+        flight = SingleFlight()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+        
+        results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+        
+        assert results == ["result"] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {"leaders": 1, "coalesced": 4, "in_flight": 0}
+    
+    async def test_leader_failure_propagates(self):
+        flight = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            raise RuntimeError("upstream down")
+        
+        results = await asyncio.gather(
+            *[flight.do("key", work) for _ in range(3)],
+            return_exceptions=True
+        )
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+        # A later call starts a fresh flight instead of reusing the failure
+        async def recovered():
+            return "ok"
+        assert await flight.do("key", recovered) == "ok"
+    
+    async def test_cancelled_leader_does_not_fail_followers(self):
+        flight = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "result"
+        
+        leader = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        
+        assert await follower == "result"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+    
+    async def test_distinct_keys_run_separately(self):
+        flight = SingleFlight()
+        
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+        
+        results = await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+        
+        assert results == ["a", "b"]
+        assert flight.coalesced == 0
@@ -1,9 +1,19 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 from app.models.translation import TranslationResponse
 
 
+def parse_sse(body):
+    """Split a Server-Sent Events body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
 class TestTranslationAPI:
     """Test suite for translation endpoints."""
     
@@ -99,6 +109,17 @@ class TestTranslationAPI:
         assert response.status_code == 400
         assert "Invalid file type" in response.json()["detail"]
     
+    def test_translate_image_corrupt_image(self, client):
+        """Test image translation with an undecodable image."""
+        response = client.post(
+            "/api/v1/translate/image",
+            data={"target_language": "Spanish"},
+            files={"image": ("broken.jpg", b"not really a jpeg", "image/jpeg")}
+        )
+        
+        assert response.status_code == 400
+        assert "Invalid image file" in response.json()["detail"]
+    
     def test_translate_image_missing_target_language(self, client, sample_image_file):
         """Test image translation without target language."""
         filename, file_content, content_type = sample_image_file
@@ -137,4 +158,72 @@ class TestTranslationAPI:
         
         response = client.post("/api/v1/translate/text", json=request_data)
         assert response.status_code == 500
-        assert "Translation processing failed" in response.json()["detail"] 
\ No newline at end of file
+        assert "Translation processing failed" in response.json()["detail"] 
+    
+    def test_translate_text_stream(self, client, mock_translation_response):
+        """Test streaming text translation over SSE."""
+        async def fake_stream(**kwargs):
+            yield "token", "Ho"
+            yield "token", "la"
+            yield "result", TranslationResponse(**mock_translation_response)
+        
+        with patch('app.api.v1.endpoints.translation.ai_service') as mock_service:
+            mock_service.stream_translate_text = fake_stream
+            response = client.post(
+                "/api/v1/translate/text/stream",
+                json={"text": "Hello", "target_language": "Spanish"}
+            )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = parse_sse(response.text)
+        assert [event for event, _ in events] == ["token", "token", "result", "timing"]
+        assert events[2][1]["translated_text"] == "Hola"
+        assert events[3][1]["time_to_first_byte_ms"] <= events[3][1]["total_ms"]
+    
+    def test_translate_text_stream_error(self, client):
+        """Test that model failures mid-stream become an error event."""
+        async def failing_stream(**kwargs):
+            yield "token", "Ho"
+            raise Exception("upstream down")
+        
+        with patch('app.api.v1.endpoints.translation.ai_service') as mock_service:
+            mock_service.stream_translate_text = failing_stream
+            response = client.post(
+                "/api/v1/translate/text/stream",
+                json={"text": "Hello", "target_language": "Spanish"}
+            )
+        
+        events = parse_sse(response.text)
+        assert [event for event, _ in events] == ["token", "error", "timing"]
+        assert "upstream down" in events[1][1]["detail"]
+
+    
+    def test_translate_text_batch(self, client, mock_translation_response):
+        """Test batch translation with per-item results and errors."""
+        with patch('app.api.v1.endpoints.translation.ai_service') as mock_service:
+            mock_service.translate_text_batch = AsyncMock(return_value=[
+                TranslationResponse(**mock_translation_response),
+                Exception("Text translation failed: upstream down")
+            ])
+            response = client.post("/api/v1/translate/text/batch", json={"items": [
+                {"text": "Hello", "target_language": "Spanish"},
+                {"text": "  ", "target_language": "Spanish"},
+                {"text": "Goodbye", "target_language": "German"}
+            ]})
+        
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert results[0]["result"]["translated_text"] == "Hola"
+        assert results[1]["error"] == "Text cannot be empty"
+        assert "upstream down" in results[2]["error"]
+        assert len(mock_service.translate_text_batch.call_args.args[0]) == 2
+    
+    def test_translate_text_batch_too_large(self, client):
+        """Test batch translation above the item limit."""
+        items = [{"text": "Hi", "target_language": "Spanish"}] * 101
+        
+        response = client.post("/api/v1/translate/text/batch", json={"items": items})
+        assert response.status_code == 400
+        assert "Too many items" in response.json()["detail"]
@@ -0,0 +1,97 @@
+import base64
+import hashlib
+import pytest
+from io import BytesIO
+from unittest.mock import patch
+
+from fastapi import UploadFile
+
+from app.services.uploads import BASE64_CHUNK, UploadTooLargeError, encode_data_url, read_upload
+
+
+class CountingFile(BytesIO):
+    """In-memory file that records how many bytes were read."""
+    
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+    
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class TestReadUpload:
+    """Test suite for chunked upload reading."""
+    
+    async def test_reads_and_hashes(self):
+        """Contents and digest match the uploaded bytes."""
+        data = b"x" * 10_000
+        upload = UploadFile(BytesIO(data), size=len(data))
+        
+        result = await read_upload(upload, max_size=20_000, chunk_size=1024)
+        
+        assert result.data == data
+        assert result.size == len(data)
+        assert result.sha256 == hashlib.sha256(data).hexdigest()
+    
+    async def test_rejects_known_size_without_reading(self):
+        """A declared size over the limit is rejected before any read."""
+        file = CountingFile(b"x" * 10_000)
+        upload = UploadFile(file, size=10_000)
+        
+        with pytest.raises(UploadTooLargeError):
+            await read_upload(upload, max_size=5_000, chunk_size=1024)
+        
+        assert file.bytes_read == 0
+    
+    async def test_rejects_unknown_size_early(self):
+        """Without a declared size, reading stops one chunk past the limit."""
+        file = CountingFile(b"x" * 100_000)
+        upload = UploadFile(file)
+        
+        with pytest.raises(UploadTooLargeError):
+            await read_upload(upload, max_size=5_000, chunk_size=1024)
+        
+        assert file.bytes_read <= 5_000 + 1024
+
+
+class TestEncodeDataUrl:
+    """Test suite for single-buffer data URL encoding."""
+    
+    @pytest.mark.parametrize("size", [0, 1, 2, 3, BASE64_CHUNK - 1, BASE64_CHUNK, BASE64_CHUNK + 1, 3 * BASE64_CHUNK + 2])
+    def test_matches_standard_encoding(self, size):
+        """Chunked encoding matches one-shot base64 across chunk boundaries."""
+        data = bytes(range(256)) * (size // 256) + bytes(range(size % 256))
+        
+        url = encode_data_url(data, "image/png")
+        
+        assert url == f"data:image/png;base64,{base64.b64encode(data).decode('ascii')}"
+
+
+class TestUploadLimitsAPI:
+    """Test suite for upload size limits on the endpoints."""
+    
+    def test_translate_image_too_large(self, client, sample_image_file):
+        """Oversized images are rejected with 413."""
+        with patch('app.core.config.settings.MAX_FILE_SIZE', 100):
+            response = client.post(
+                "/api/v1/translate/image",
+                files={"image": sample_image_file},
+                data={"target_language": "Spanish"}
+            )
+        
+        assert response.status_code == 413
+        assert "File too large" in response.json()["detail"]
+    
+    def test_analyze_form_too_large(self, client, sample_image_file):
+        """Oversized form documents are rejected with 413."""
+        with patch('app.core.config.settings.MAX_FILE_SIZE', 100):
+            response = client.post(
+                "/api/v1/forms/analyze",
+                files={"document": sample_image_file},
+                data={"target_language": "English"}
+            )
+        
+        assert response.status_code == 413